@@ -0,0 +1,144 @@
+# ============================================================
+# AI MATCHLAB — BENCHMARK FEED GENERATOR
+# Συνθετικά Betfair-style markets & μεγάλες fixture HTML σελίδες
+# ============================================================
+
+import random
+from typing import Dict, Any, List, Optional
+
+
+STATUSES = ("ACTIVE", "ACTIVE", "ACTIVE", "ACTIVE", "SUSPENDED", "WINNER", "LOSER")
+LEAGUES = (
+    "Premier League", "La Liga", "Serie A", "Bundesliga", "Ligue 1",
+    "Eredivisie", "Primeira Liga", "Super League Greece", "Championship",
+)
+
+
+# ------------------------------------------------------------
+# Markets
+# ------------------------------------------------------------
+def make_ladder(rng: random.Random, base: float, depth: int, side: int) -> List[Dict[str, float]]:
+    """ depth επίπεδα τιμών· side=+1 για lay (ανεβαίνει), -1 για back (κατεβαίνει). """
+    out = []
+    price = base
+    for _ in range(depth):
+        out.append({"price": round(max(1.01, price), 2), "size": round(rng.uniform(2, 500), 2)})
+        price += side * rng.choice((0.01, 0.02, 0.05, 0.1))
+    return out
+
+
+def make_runner(rng: random.Random, selection_id: int, depth: int) -> Dict[str, Any]:
+    back = rng.uniform(1.2, 15.0)
+    # Κάποια runners με μεγάλο spread (volatility) και κάποια χωρίς lay
+    spread = rng.choice((0.01, 0.02, 0.05, 0.1, 0.6, 1.2))
+    lay_depth = 0 if rng.random() < 0.05 else depth
+
+    return {
+        "selectionId": selection_id,
+        "runnerName": f"Runner {selection_id}",
+        "status": rng.choice(STATUSES),
+        "totalMatched": round(rng.uniform(0, 50000), 2),
+        "ex": {
+            "availableToBack": make_ladder(rng, back, depth, -1),
+            "availableToLay": make_ladder(rng, back + spread, lay_depth, +1),
+        },
+    }
+
+
+def make_markets(n_markets: int, n_runners: int = 3, depth: int = 3,
+                 seed: int = 42) -> List[Dict[str, Any]]:
+    """ n_markets raw markets (σχήμα Betfair listMarketBook + catalogue). """
+    rng = random.Random(seed)
+    markets = []
+    for i in range(n_markets):
+        markets.append({
+            "marketId": f"1.{200000000 + i}",
+            "marketName": rng.choice(("Match Odds", "Over/Under 2.5 Goals", "Both teams to Score?")),
+            "eventId": str(30000000 + i // 3),
+            "competition": rng.choice(LEAGUES),
+            "totalMatched": round(rng.uniform(0, 2_000_000), 2),
+            "runners": [
+                make_runner(rng, 47972 + j, depth) for j in range(n_runners)
+            ],
+        })
+    return markets
+
+
+def make_market_changes(markets: List[Dict[str, Any]], n_changes: int,
+                        seed: int = 7) -> List[Dict[str, Any]]:
+    """ Market-change messages (μόνο ένα runner με νέα best prices ανά message). """
+    rng = random.Random(seed)
+    changes = []
+    for _ in range(n_changes):
+        m = rng.choice(markets)
+        r = rng.choice(m["runners"])
+        back = rng.uniform(1.2, 15.0)
+        changes.append({
+            "marketId": m["marketId"],
+            "runners": [{
+                "selectionId": r["selectionId"],
+                "ex": {
+                    "availableToBack": [{"price": round(back, 2), "size": round(rng.uniform(2, 500), 2)}],
+                    "availableToLay": [{"price": round(back + 0.02, 2), "size": round(rng.uniform(2, 500), 2)}],
+                },
+            }],
+        })
+    return changes
+
+
+# ------------------------------------------------------------
+# Live feed (σχήμα του Worker /api/live)
+# ------------------------------------------------------------
+def make_live_feed(n_matches: int, seed: int = 42) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    matches = []
+    for i in range(n_matches):
+        matches.append({
+            "id": str(30000000 + i),
+            "league": rng.choice(LEAGUES),
+            "home": f"Home {i}",
+            "away": f"Away {i}",
+            "minute": rng.randint(0, 95),
+            "score": f"{rng.randint(0, 4)}-{rng.randint(0, 4)}",
+            "status": "LIVE",
+        })
+    return {"ok": True, "matches": matches}
+
+
+# ------------------------------------------------------------
+# Fixtures HTML
+# ------------------------------------------------------------
+def make_fixture_html(n_rows: int = 5000, seed: int = 42,
+                      script_every: int = 25, target_bytes: Optional[int] = None) -> str:
+    """
+    Fixture σελίδα με πίνακα αγώνων και διάσπαρτα <script>/<style>/<meta>
+    (όπως οι σελίδες των πηγών). target_bytes: προσθέτει rows μέχρι το μέγεθος.
+    """
+    rng = random.Random(seed)
+    head = [
+        "<!DOCTYPE html><html><head>",
+        '<meta charset="utf-8"><meta http-equiv="refresh" content="30">',
+        "<style>table{width:100%}td{padding:2px}</style>",
+        "<script>window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}</script>",
+        "</head><body><table class=\"fixtures\">",
+    ]
+    parts = list(head)
+    size = sum(len(p) for p in parts)
+
+    i = 0
+    while i < n_rows or (target_bytes is not None and size < target_bytes):
+        row = (
+            f'<tr data-id="{30000000 + i}"><td class="league">{rng.choice(LEAGUES)}</td>'
+            f"<td>{rng.randint(12, 22)}:{rng.choice(('00', '15', '30', '45'))}</td>"
+            f"<td>Home {i}</td><td>Away {i}</td>"
+            f"<td>{rng.uniform(1.2, 9):.2f}</td><td>{rng.uniform(2.5, 4.5):.2f}</td>"
+            f"<td>{rng.uniform(1.2, 9):.2f}</td></tr>"
+        )
+        if script_every and i % script_every == 0:
+            row += f'<SCRIPT type="text/javascript">track({i}, "</td>");</SCRIPT><meta name="x{i}">'
+        parts.append(row)
+        size += len(row)
+        i += 1
+
+    parts.append("</table></body></html>")
+    return "".join(parts)
@@ -0,0 +1,121 @@
+# ============================================================
+# AI MATCHLAB — BENCHMARK HARNESS
+# Throughput, latency percentiles & peak memory ανά hot path
+# ============================================================
+
+import gc
+import math
+import time
+import tracemalloc
+from typing import Callable, Dict, Any, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """ Nearest-rank percentile πάνω σε ήδη ταξινομημένη λίστα. """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms: List[float], items_per_call: int, elapsed: float) -> Dict[str, Any]:
+    lat = sorted(latencies_ms)
+    calls = len(lat)
+    return {
+        "calls": calls,
+        "items_per_call": items_per_call,
+        "throughput_items_s": round(calls * items_per_call / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(lat) / calls, 4) if calls else None,
+        "p50_ms": _round(percentile(lat, 0.50)),
+        "p95_ms": _round(percentile(lat, 0.95)),
+        "p99_ms": _round(percentile(lat, 0.99)),
+        "max_ms": _round(lat[-1] if lat else None),
+    }
+
+
+def measure(fn: Callable[[], Any], items_per_call: int = 1,
+            repeat: int = 20, warmup: int = 2, memory: bool = True) -> Dict[str, Any]:
+    """
+    Εκτελεί fn() repeat φορές (μετά από warmup) και μετράει κάθε κλήση.
+    Η μνήμη μετριέται σε ξεχωριστή κλήση με tracemalloc
+    ώστε να μην επηρεάζει τα timings.
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        latencies = []
+        t_start = time.perf_counter()
+        for _ in range(repeat):
+            t0 = time.perf_counter_ns()
+            fn()
+            latencies.append((time.perf_counter_ns() - t0) / 1e6)
+        elapsed = time.perf_counter() - t_start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    result = summarize(latencies, items_per_call, elapsed)
+    if memory:
+        result["peak_kb"] = peak_memory_kb(fn)
+    return result
+
+
+def peak_memory_kb(fn: Callable[[], Any]) -> float:
+    """ Peak Python allocations (KB) μιας κλήσης, πάνω από το τρέχον baseline. """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round((peak - base) / 1024, 1)
+
+
+# ------------------------------------------------------------
+# Σύγκριση με baseline
+# ------------------------------------------------------------
+# Πεδία όπου μεγαλύτερη τιμή = χειρότερα
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "peak_kb")
+HIGHER_IS_BETTER = ("throughput_items_s",)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Συγκρίνει δύο results files (ίδια ονόματα benchmarks).
+    Επιστρέφει μία γραμμή ανά metric με ratio και flag regression
+    όταν η μεταβολή προς το χειρότερο ξεπερνά το tolerance.
+    """
+    rows = []
+    base_benches = baseline.get("benchmarks", {})
+
+    for name, cur in current.get("benchmarks", {}).items():
+        base = base_benches.get(name)
+        if not base:
+            continue
+        for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            a, b = base.get(key), cur.get(key)
+            if not a or b is None:
+                continue
+            ratio = b / a
+            worse = ratio - 1 if key in LOWER_IS_BETTER else 1 - ratio
+            rows.append({
+                "benchmark": name,
+                "metric": key,
+                "baseline": a,
+                "current": b,
+                "ratio": round(ratio, 3),
+                "regression": worse > tolerance,
+            })
+    return rows
+
+
+def _round(v: Optional[float]) -> Optional[float]:
+    return None if v is None else round(v, 4)
@@ -0,0 +1,426 @@
+# ============================================================
+# AI MATCHLAB — BENCHMARK RUNNER
+# python -m benchmarks.run [--suite engines,html,routes,push] [--baseline FILE]
+# ============================================================
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List
+
+import httpx
+import numpy as np
+
+from .feed_generator import make_markets, make_market_changes, make_fixture_html
+from .harness import measure, summarize, compare
+from .stand_in_worker import StandInWorker
+from .stand_in_push import StandInPushService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+SUITES = ("engines", "html", "routes", "push")
+
+# Routes του main.py που μετριούνται στο load test
+LOAD_ROUTES = ("/api/health", "/api/ping", "/api/time", "/status", "/live", "/goalmatrix")
+
+
+# ------------------------------------------------------------
+# Engines: normalization / indicators / scoring / pipeline
+# ------------------------------------------------------------
+def bench_engines(args) -> Dict[str, Any]:
+    from services.exchange_engine import exchange_engine
+    from services.goalmatrix_engine import goalmatrix_engine
+    from services.smartmoney_engine import smartmoney_engine
+    from services.analysis_pipeline import analysis_pipeline
+
+    markets = make_markets(args.markets, args.runners, args.depth, seed=args.seed)
+    n = len(markets)
+    normalized = [exchange_engine.normalize_market(m) for m in markets]
+    batch = exchange_engine.normalize_markets_batch(markets)
+    r = args.repeat
+
+    out = {
+        "normalize_dict": measure(
+            lambda: [exchange_engine.normalize_market(m) for m in markets], n, r),
+        "normalize_batch": measure(
+            lambda: exchange_engine.normalize_markets_batch(markets), n, r),
+        "goalmatrix_indicators": measure(
+            lambda: [goalmatrix_engine.generate_indicators(m["runners"]) for m in normalized], n, r),
+        "smartmoney_score_dict": measure(
+            lambda: [smartmoney_engine.score_runners(m["runners"]) for m in normalized], n, r),
+        "smartmoney_score_batch": measure(
+            lambda: smartmoney_engine.score_markets(batch), n, r),
+        "pipeline_analyze_many": measure(
+            lambda: analysis_pipeline.analyze_many(markets), n, max(3, r // 4)),
+    }
+
+    # Incremental ingestion: πρώτα full images, μετά μικρά change messages
+    for m in markets:
+        analysis_pipeline.ingest_change({**m, "img": True})
+    changes = make_market_changes(markets, args.changes, seed=args.seed)
+    out["pipeline_ingest_change"] = measure(
+        lambda: [analysis_pipeline.ingest_change(c) for c in changes], len(changes), r)
+
+    return out
+
+
+# ------------------------------------------------------------
+# HTML cleaning
+# ------------------------------------------------------------
+def bench_html(args) -> Dict[str, Any]:
+    from services.fixtures_engine import fixtures_engine
+    from services.html_sanitizer import HtmlSanitizer
+
+    html = make_fixture_html(args.html_rows, seed=args.seed)
+    size = len(html)
+    chunk = 64 * 1024
+
+    def streamed():
+        s = HtmlSanitizer()
+        parts = [s.feed(html[i:i + chunk]) for i in range(0, size, chunk)]
+        parts.append(s.close())
+        return "".join(parts)
+
+    # throughput_items_s = χαρακτήρες / s
+    return {
+        "clean_html": measure(lambda: fixtures_engine.clean_html(html), size, args.repeat),
+        "sanitize_streamed_64k": measure(streamed, size, args.repeat),
+    }
+
+
+# ------------------------------------------------------------
+# Routes: load test του main.py πάνω σε stand-in Worker
+# ------------------------------------------------------------
+def bench_routes(args) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+
+    with StandInWorker(n_markets=args.markets, n_runners=args.runners, depth=args.depth,
+                       html_rows=args.html_rows, latency_ms=args.worker_latency_ms) as worker:
+        out.update(asyncio.run(_fetch_fixtures(worker, args)))
+
+        tmp = tempfile.mkdtemp(prefix="aimatchlab-bench-")
+        db_path = os.path.join(tmp, "matches.db")
+        shutil.copyfile(os.path.join(ROOT, "db", "matches.db"), db_path)
+
+        port = _free_port()
+        env = {
+            **os.environ,
+            "WORKER_URL": worker.url,
+            "STREAM_MARKETS_PATH": "/api/markets",
+            "STREAM_POLL_INTERVAL": "1",
+            "MATCHES_DB_PATH": db_path,
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            base = f"http://127.0.0.1:{port}"
+            _wait_ready(base + "/api/health")
+            out.update(asyncio.run(_load(base, args)))
+            out["server_process"] = {"peak_rss_kb": _peak_rss_kb(server.pid)}
+        finally:
+            server.terminate()
+            server.wait(10)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    return out
+
+
+async def _fetch_fixtures(worker: StandInWorker, args) -> Dict[str, Any]:
+    """ fixtures_engine.fetch_fixtures: cold (χωρίς cache) και revalidated (304). """
+    from services.provider_client import provider_client
+    from services.fixtures_engine import fixtures_engine
+
+    url = worker.url + "/fixtures.html"
+    html_len = None
+    out = {}
+
+    for name, clear in (("fixtures_fetch_cold", True), ("fixtures_fetch_cached", False)):
+        latencies = []
+        t_start = time.perf_counter()
+        for _ in range(args.repeat):
+            if clear:
+                provider_client.html_cache.clear()
+            t0 = time.perf_counter_ns()
+            html = await fixtures_engine.fetch_fixtures(url)
+            latencies.append((time.perf_counter_ns() - t0) / 1e6)
+            html_len = len(html)
+        out[name] = summarize(latencies, html_len, time.perf_counter() - t_start)
+
+    await provider_client.close()
+    return out
+
+
+async def _load(base: str, args) -> Dict[str, Any]:
+    """ args.concurrency ταυτόχρονοι clients, args.requests requests ανά route. """
+    out = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        for route in LOAD_ROUTES:
+            latencies: List[float] = []
+            errors = 0
+            remaining = args.requests
+
+            async def worker():
+                nonlocal remaining, errors
+                while remaining > 0:
+                    remaining -= 1
+                    t0 = time.perf_counter_ns()
+                    try:
+                        resp = await client.get(route)
+                        if resp.status_code >= 400:
+                            errors += 1
+                    except httpx.HTTPError:
+                        errors += 1
+                    latencies.append((time.perf_counter_ns() - t0) / 1e6)
+
+            t_start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            result = summarize(latencies, 1, time.perf_counter() - t_start)
+            result["errors"] = errors
+            result["concurrency"] = args.concurrency
+            out[f"route {route}"] = result
+
+    return out
+
+
+# ------------------------------------------------------------
+# Push: fan-out σε stand-in push services
+# ------------------------------------------------------------
+def bench_push(args) -> Dict[str, Any]:
+    import random
+    import sqlite3
+
+    rng = random.Random(args.seed)
+    gone = {i for i in range(1, args.subscribers + 1) if rng.random() < args.push_gone}
+    services = [
+        StandInPushService(gone=gone, latency_ms=args.push_latency_ms).start()
+        for _ in range(max(1, args.push_hosts))
+    ]
+
+    tmp = tempfile.mkdtemp(prefix="aimatchlab-bench-")
+    db_path = os.path.join(tmp, "matches.db")
+    shutil.copyfile(os.path.join(ROOT, "db", "matches.db"), db_path)
+    try:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DELETE FROM push_subscriptions")
+            conn.executemany(
+                "INSERT INTO push_subscriptions (id, endpoint, p256dh, auth) VALUES (?, ?, ?, ?)",
+                [(i, services[i % len(services)].endpoint(i), *_push_keys(rng))
+                 for i in range(1, args.subscribers + 1)],
+            )
+        return asyncio.run(_push_fanout(db_path, services, args))
+    finally:
+        for service in services:
+            service.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+async def _push_fanout(db_path: str, services, args) -> Dict[str, Any]:
+    from services.push_fanout import PushFanout, _Notification
+
+    fanout = PushFanout(db_path=db_path, window=0)
+    fanout.start()
+    out = {}
+    try:
+        # Πρώτο πέρασμα: κάνει και το prune των 410
+        for name, repeat in (("push_fanout_cold", 1), ("push_fanout", args.repeat)):
+            latencies, subscriptions = [], 0
+            t_start = time.perf_counter()
+            for k in range(repeat):
+                n = _Notification(f"bench-{k}", "Bench League")
+                n.merge(75, [{"team": "Home", "minute": 60}])
+                t0 = time.perf_counter_ns()
+                result = await fanout.fanout([n])
+                latencies.append((time.perf_counter_ns() - t0) / 1e6)
+                subscriptions = result["subscriptions"]
+            out[name] = summarize(latencies, subscriptions, time.perf_counter() - t_start)
+
+        stats = fanout.stats()
+        out["push_fanout"].update({
+            "hosts": len(services),
+            "encrypted": stats["encrypted"],
+            "failed": stats["failed"],
+            "pruned": stats["pruned"],
+            "request_p95_ms": stats["latency_ms"].get("p95_ms"),
+        })
+    finally:
+        await fanout.stop()
+    return out
+
+
+def _push_keys(rng) -> tuple:
+    """ Έγκυρα p256dh / auth όταν υπάρχει το cryptography (πραγματική κρυπτογράφηση). """
+    import base64
+    from services.push_fanout import ec
+
+    b64 = lambda b: base64.urlsafe_b64encode(b).rstrip(b"=").decode()
+    auth = b64(rng.randbytes(16))
+    if ec is None:
+        return b64(rng.randbytes(65)), auth
+    from cryptography.hazmat.primitives import serialization
+    public = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return b64(public), auth
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server not ready: {url}")
+
+
+def _peak_rss_kb(pid: int):
+    """ VmHWM από /proc (Linux)· None σε άλλα συστήματα. """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# ------------------------------------------------------------
+# Results
+# ------------------------------------------------------------
+def metadata(args) -> Dict[str, Any]:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            k: getattr(args, k) for k in (
+                "markets", "runners", "depth", "changes", "html_rows", "repeat",
+                "seed", "requests", "concurrency", "worker_latency_ms",
+                "subscribers", "push_hosts", "push_gone", "push_latency_ms",
+            )
+        },
+    }
+
+
+def print_results(results: Dict[str, Any]):
+    print(f"{'benchmark':<32} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'items/s':>14} {'peak KB':>10}")
+    for name, r in results["benchmarks"].items():
+        print(
+            f"{name:<32} {_fmt(r.get('p50_ms')):>10} {_fmt(r.get('p95_ms')):>10} "
+            f"{_fmt(r.get('p99_ms')):>10} {_fmt(r.get('throughput_items_s')):>14} "
+            f"{_fmt(r.get('peak_kb', r.get('peak_rss_kb'))):>10}"
+        )
+
+
+def print_comparison(rows: List[Dict[str, Any]], tolerance: float):
+    print(f"\nvs baseline (tolerance {tolerance:.0%}):")
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(
+            f"  {row['benchmark']:<32} {row['metric']:<20} "
+            f"{_fmt(row['baseline']):>12} → {_fmt(row['current']):>12}  x{row['ratio']:<7} {flag}"
+        )
+
+
+def _fmt(v) -> str:
+    if v is None:
+        return "-"
+    if isinstance(v, float):
+        return f"{v:.3f}" if v < 100 else f"{v:,.0f}"
+    return str(v)
+
+
+# ------------------------------------------------------------
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="AI MatchLab hot-path benchmarks")
+    p.add_argument("--suite", default=",".join(SUITES),
+                   help="comma separated: " + ",".join(SUITES))
+    p.add_argument("--markets", type=int, default=2000)
+    p.add_argument("--runners", type=int, default=3)
+    p.add_argument("--depth", type=int, default=3)
+    p.add_argument("--changes", type=int, default=2000)
+    p.add_argument("--html-rows", type=int, default=20000)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--requests", type=int, default=500, help="requests per route (routes suite)")
+    p.add_argument("--concurrency", type=int, default=20)
+    p.add_argument("--worker-latency-ms", type=float, default=0.0)
+    p.add_argument("--subscribers", type=int, default=5000, help="push_subscriptions (push suite)")
+    p.add_argument("--push-hosts", type=int, default=2, help="stand-in push services")
+    p.add_argument("--push-gone", type=float, default=0.02, help="ποσοστό endpoints με 410")
+    p.add_argument("--push-latency-ms", type=float, default=0.0)
+    p.add_argument("--out", default=os.path.join(RESULTS_DIR, "latest.json"))
+    p.add_argument("--baseline", help="results JSON για σύγκριση")
+    p.add_argument("--tolerance", type=float, default=0.10)
+    p.add_argument("--fail-on-regression", action="store_true")
+    args = p.parse_args(argv)
+
+    # Τα services / templates / db φορτώνονται με paths σχετικά με το root
+    os.chdir(ROOT)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = [s for s in suites if s not in SUITES]
+    if unknown:
+        p.error(f"unknown suite(s): {', '.join(unknown)}")
+
+    runners = {"engines": bench_engines, "html": bench_html, "routes": bench_routes, "push": bench_push}
+    results = {"meta": metadata(args), "benchmarks": {}}
+    for suite in suites:
+        print(f"[Benchmarks] ⏳ {suite} ...", flush=True)
+        results["benchmarks"].update(runners[suite](args))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print_results(results)
+    print(f"\n[Benchmarks] ✅ results → {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(results, json.load(f), args.tolerance)
+        print_comparison(rows, args.tolerance)
+        if args.fail_on_regression and any(r["regression"] for r in rows):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
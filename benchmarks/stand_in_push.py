@@ -0,0 +1,117 @@
+# ============================================================
+# AI MATCHLAB — STAND-IN PUSH SERVICE
+# Τοπικός HTTP server στη θέση των Web Push services (benchmarks)
+# ============================================================
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Set
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Πολλές ταυτόχρονες συνδέσεις από τον fan-out: backlog > default 5
+    request_queue_size = 1024
+
+
+class StandInPushService:
+    """
+    Δέχεται POST /push/<id> όπως ένας push service (FCM / Mozilla):
+    - 201 Created για κάθε έγκυρο endpoint
+    - 410 Gone για τα ids του `gone` (ληγμένα subscriptions)
+    - 429 + Retry-After όταν ξεπεραστεί το `max_inflight`
+    και προαιρετική τεχνητή latency.
+    """
+
+    def __init__(self, gone: Optional[Set[int]] = None, latency_ms: float = 0.0,
+                 max_inflight: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.gone = set(gone or ())
+        self.latency_ms = latency_ms
+        self.max_inflight = max_inflight
+        self.requests = 0
+        self.accepted = 0
+        self.bytes = 0
+        self.throttled = 0
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+        self._server = _Server((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoint(self, sub_id: int) -> str:
+        return f"{self.url}/push/{sub_id}"
+
+    # ------------------------------------------------------------
+    def start(self) -> "StandInPushService":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stand-in-push", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------
+    def _handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+
+                with service._lock:
+                    service.requests += 1
+                    service.bytes += length
+                    throttled = bool(service.max_inflight) and service._inflight >= service.max_inflight
+                    if not throttled:
+                        service._inflight += 1
+
+                if throttled:
+                    service.throttled += 1
+                    return self._reply(429, {"Retry-After": "0.05"})
+
+                try:
+                    if service.latency_ms:
+                        time.sleep(service.latency_ms / 1000)
+                    _, _, sub_id = self.path.rpartition("/")
+                    if not sub_id.isdigit() or int(sub_id) in service.gone:
+                        return self._reply(410)
+                    with service._lock:
+                        service.accepted += 1
+                    self._reply(201)
+                finally:
+                    with service._lock:
+                        service._inflight -= 1
+
+            def _reply(self, status: int, headers=None):
+                self.send_response(status)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,110 @@
+# ============================================================
+# AI MATCHLAB — STAND-IN WORKER
+# Τοπικός HTTP server στη θέση του Cloudflare Worker (benchmarks)
+# ============================================================
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+from .feed_generator import make_live_feed, make_markets, make_fixture_html
+
+
+class StandInWorker:
+    """
+    Σερβίρει προκατασκευασμένα responses από ένα thread:
+    - /api/live       → live feed
+    - /api/markets    → {"markets": [...]}
+    - /fixtures.html  → μεγάλη fixture σελίδα
+    ETag / If-None-Match (304) όπως ο πραγματικός Worker
+    και προαιρετική τεχνητή latency.
+    """
+
+    def __init__(self, n_matches: int = 200, n_markets: int = 500, n_runners: int = 3,
+                 depth: int = 3, html_rows: int = 5000, latency_ms: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self._routes: Dict[str, Tuple[bytes, str, str]] = {}
+
+        self.set_route("/api/live", make_live_feed(n_matches))
+        self.set_route("/api/markets", {"markets": make_markets(n_markets, n_runners, depth)})
+        self.set_route("/fixtures.html", make_fixture_html(html_rows), "text/html; charset=utf-8")
+
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------
+    def set_route(self, path: str, body: Any, content_type: str = "application/json"):
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+        self._routes[path] = (data, content_type, etag)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # ------------------------------------------------------------
+    def start(self) -> "StandInWorker":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stand-in-worker", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ------------------------------------------------------------
+    def _handler(self):
+        worker = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                worker.requests += 1
+                if worker.latency_ms:
+                    time.sleep(worker.latency_ms / 1000)
+
+                route = worker._routes.get(self.path.split("?", 1)[0])
+                if route is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                data, content_type, etag = route
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -28,10 +28,16 @@ LIVE_HUB_TIMEOUT = float(os.getenv("EUROGOALS_LIVE_HUB_TIMEOUT", "4.0"))
 # LOGGING
 # ------------------------------------------------------------
 LOG_LEVEL = os.getenv("EUROGOALS_LOG_LEVEL", "INFO").upper()
-
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL, logging.INFO),
-    format="[AI_MATCHLAB] %(asctime)s | %(levelname)s | %(message)s",
-)
+LOG_FORMAT = "[AI_MATCHLAB] %(asctime)s | %(levelname)s | %(message)s"
 
 logger = logging.getLogger("ai_matchlab")
+
+
+def configure_logging():
+    """ Καλείται από το lifespan (όχι στο import)· no-op αν το root έχει ήδη handlers. """
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL, logging.INFO),
+        format=LOG_FORMAT,
+    )
+    # Ένα INFO ανά upstream / push request είναι θόρυβος
+    logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -3,17 +3,54 @@
 # Unified UI Loader + Status Routes
 # ============================================================
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, PlainTextResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
 import datetime as dt
 
+from services.live_stream import live_hub, live_poller, encode_sse
+from services.ingest_scheduler import ingest_scheduler
+from services.metrics import metrics, MetricsMiddleware, LoopLagMonitor, CONTENT_TYPE, stats_families
+from services.profiler import sampling_profiler, ProfilerBusy, PROFILER_TOKEN
+from services.shared_state import shared_state, ingest_lifecycle, ROLE_READER
+from services.page_cache import PageCache
+from services.batch_analysis import batch_response
+from services.live_index import alert_index
+from services.warm_start import warm_start
+from services.offload import cpu_offload
+
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+loop_lag = LoopLagMonitor()
+
+
+# ------------------------------------------------------------
+# LIFESPAN (background poller / clients)
+# ------------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Τίποτα δεν ανοίγει στο import: logging, clients και threads ξεκινούν εδώ
+    async with ingest_lifecycle(shared_state):
+        cpu_offload.start()
+        loop_lag.start()
+        tab_pages.load()
+        yield
+        await loop_lag.stop()
+        await cpu_offload.stop()
+
+
 # ------------------------------------------------------------
 # APP INIT
 # ------------------------------------------------------------
-app = FastAPI(title="AI MATCHLAB Backend")
+app = FastAPI(title="AI MATCHLAB Backend", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 # ------------------------------------------------------------
 # STATIC & TEMPLATES
@@ -21,6 +58,11 @@ app = FastAPI(title="AI MATCHLAB Backend")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+# Τα 9 tabs του index.html: rendered μία φορά, σερβίρονται από μνήμη
+TAB_VIEWS = ("live", "scores", "standings", "leagues", "teams", "ai", "goalmatrix", "smartmoney", "about")
+tab_pages = PageCache(templates.env, "index.html", TAB_VIEWS)
+metrics.add_collector(lambda: stats_families("aimatchlab_pages", tab_pages.stats(), counters=("renders",)))
+
 
 # ============================================================
 # SYSTEM ROUTES
@@ -41,45 +83,105 @@ async def health():
     return {"status": "healthy", "timestamp": dt.datetime.utcnow().isoformat()}
 
 
+@app.get("/api/ready", response_class=JSONResponse)
+async def ready(fresh: bool = False):
+    """
+    cold: κανένα δεδομένο ακόμα (503)
+    warm: σερβίρεται warm-start snapshot, stale μέχρι το πρώτο poll (503 με ?fresh=1)
+    fresh: όλα τα topics έχουν ανανεωθεί από upstream
+    """
+    if shared_state.role == ROLE_READER:
+        shared_state.apply_to_hub()
+    if not live_hub.seq:
+        state = "cold"
+    elif live_hub.stale:
+        state = "warm"
+    else:
+        state = "fresh"
+    ok = state == "fresh" or (state == "warm" and not fresh)
+    return JSONResponse({
+        "ready": ok,
+        "state": state,
+        "stale_topics": sorted(live_hub.stale),
+        "warm_start": warm_start.stats(),
+    }, status_code=200 if ok else 503)
+
+
+# ============================================================
+# METRICS & PROFILING
+# ============================================================
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
+def _is_admin(request: Request) -> bool:
+    token = request.headers.get("x-admin-token") or request.query_params.get("token", "")
+    return bool(PROFILER_TOKEN) and hmac.compare_digest(token.encode(), PROFILER_TOKEN.encode())
+
+
+@app.get("/api/admin/profile", include_in_schema=False)
+async def profile(request: Request, seconds: float = 5.0, interval: float = 0.0):
+    """
+    Sampling profiler για `seconds` δευτερόλεπτα → collapsed stacks
+    (flamegraph.pl / speedscope). Απαιτεί PROFILER_ADMIN_TOKEN.
+    """
+    if not PROFILER_TOKEN:
+        return JSONResponse({"error": "profiler disabled"}, status_code=404)
+    if not _is_admin(request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+
+    try:
+        stacks = await asyncio.to_thread(sampling_profiler.capture, seconds, interval or None)
+    except ProfilerBusy:
+        return JSONResponse({"error": "profiler busy"}, status_code=409)
+
+    return PlainTextResponse(
+        stacks,
+        headers={"Content-Disposition": 'attachment; filename="profile.folded"'},
+    )
+
+
 # ============================================================
 # PRETTY ROUTES → φορτώνουν το index.html με συγκεκριμένο tab
 # ============================================================
 
 @app.get("/live", response_class=HTMLResponse)
 async def live_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "live"})
+    return tab_pages.response(request, "live")
 
 @app.get("/scores", response_class=HTMLResponse)
 async def scores_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "scores"})
+    return tab_pages.response(request, "scores")
 
 @app.get("/standings", response_class=HTMLResponse)
 async def standings_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "standings"})
+    return tab_pages.response(request, "standings")
 
 @app.get("/leagues", response_class=HTMLResponse)
 async def leagues_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "leagues"})
+    return tab_pages.response(request, "leagues")
 
 @app.get("/teams", response_class=HTMLResponse)
 async def teams_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "teams"})
+    return tab_pages.response(request, "teams")
 
 @app.get("/ai", response_class=HTMLResponse)
 async def ai_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "ai"})
+    return tab_pages.response(request, "ai")
 
 @app.get("/goalmatrix", response_class=HTMLResponse)
 async def goalmatrix_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "goalmatrix"})
+    return tab_pages.response(request, "goalmatrix")
 
 @app.get("/smartmoney", response_class=HTMLResponse)
 async def smartmoney_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "smartmoney"})
+    return tab_pages.response(request, "smartmoney")
 
 @app.get("/about", response_class=HTMLResponse)
 async def about_tab(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request, "default_view": "about"})
+    return tab_pages.response(request, "about")
 
 # ============================================================
 # OPTIONAL API ROUTES (placeholders for future AI modules)
@@ -95,6 +197,163 @@ async def time_now():
     return {"utc": dt.datetime.utcnow().isoformat() + "Z"}
 
 
+# ============================================================
+# BATCH ANALYSIS (POST raw markets → NDJSON)
+# ?fields=market_id,smart_score για projection
+# ============================================================
+
+@app.post("/api/goalmatrix/batch")
+async def goalmatrix_batch(request: Request, fields: str = ""):
+    return await batch_response(request, "goalmatrix", fields)
+
+
+@app.post("/api/smartmoney/batch")
+async def smartmoney_batch(request: Request, fields: str = ""):
+    return await batch_response(request, "smartmoney", fields)
+
+
+# ============================================================
+# PRECOMPUTED STATE (χωρίς upstream fetch στο request)
+# ============================================================
+
+@app.get("/api/snapshot", response_class=JSONResponse)
+async def snapshot(topics: str = "", league: str = "", match: str = ""):
+    if shared_state.role == ROLE_READER:
+        # Πλήρες snapshot: τα bytes του writer όπως είναι στο mmap
+        if not (topics or league or match):
+            body = shared_state.read_raw()
+            if body is not None:
+                return Response(body, media_type="application/json")
+        shared_state.apply_to_hub(_split(topics))
+
+    sub = live_hub.subscribe(_split(topics), _split(league), _split(match))
+    live_hub.unsubscribe(sub)
+    return live_hub.snapshot(sub)
+
+
+# ============================================================
+# INDEXED QUERIES (league / team / match / minute)
+# ============================================================
+
+def _minutes(min_minute, max_minute):
+    return {"min_minute": min_minute, "max_minute": max_minute}
+
+
+@app.get("/api/matches", response_class=JSONResponse)
+async def matches(league: str = "", team: str = "", match: str = "",
+                  min_minute: int = None, max_minute: int = None):
+    if shared_state.role == ROLE_READER:
+        shared_state.apply_to_hub(("live",))
+    items = live_hub.query(
+        "live", _split(league), _split(team), _split(match), **_minutes(min_minute, max_minute)
+    )
+    return {"seq": live_hub.seq, "count": len(items), "items": items}
+
+
+@app.get("/api/markets", response_class=JSONResponse)
+async def markets(topic: str = "smartmoney", league: str = "", team: str = "", match: str = "",
+                  min_minute: int = None, max_minute: int = None):
+    if topic not in ("goalmatrix", "smartmoney"):
+        return JSONResponse({"error": "topic must be goalmatrix or smartmoney"}, status_code=400)
+    if shared_state.role == ROLE_READER:
+        # live: join για team / minute
+        shared_state.apply_to_hub((topic, "live"))
+    items = live_hub.query(
+        topic, _split(league), _split(team), _split(match), **_minutes(min_minute, max_minute)
+    )
+    return {"seq": live_hub.seq, "count": len(items), "items": items}
+
+
+@app.get("/api/alerts", response_class=JSONResponse)
+async def alerts(league: str = "", team: str = "", match: str = "",
+                 min_minute: int = None, max_minute: int = None,
+                 since: str = None, until: str = None, limit: int = 500):
+    if alert_index.stale():
+        await asyncio.to_thread(alert_index.sync)
+    rows = alert_index.query(
+        _split(league), _split(team), _split(match),
+        minute=(min_minute, max_minute), event_time=(since, until), limit=max(0, limit),
+    )
+    return {"count": len(rows), "alerts": rows}
+
+
+@app.get("/api/ingest/status", response_class=JSONResponse)
+async def ingest_status():
+    return {
+        **ingest_scheduler.stats(),
+        "shared_state": shared_state.stats(),
+        "warm_start": warm_start.stats(),
+    }
+
+
+# ============================================================
+# LIVE STREAM (SSE + WebSocket)
+# ?topics=live,goalmatrix,smartmoney&league=...&match=...
+# ============================================================
+
+def _split(value: str):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+@app.get("/api/stream")
+async def stream(request: Request, topics: str = "", league: str = "", match: str = ""):
+    if not live_poller.enabled:
+        # Ο client γυρνάει σε polling του /api/snapshot
+        return JSONResponse({"error": "live stream disabled"}, status_code=503)
+    if shared_state.role == ROLE_READER:
+        shared_state.apply_to_hub(_split(topics))
+    sub = live_hub.subscribe(_split(topics), _split(league), _split(match))
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            yield encode_sse(live_hub.snapshot(sub))
+
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(
+                        live_hub.next_message(sub), STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield encode_sse(message)
+        finally:
+            live_hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/api/stream/ws")
+async def stream_ws(websocket: WebSocket):
+    if not live_poller.enabled:
+        await websocket.close(code=1013)
+        return
+    await websocket.accept()
+    params = websocket.query_params
+    if shared_state.role == ROLE_READER:
+        shared_state.apply_to_hub(_split(params.get("topics", "")))
+    sub = live_hub.subscribe(
+        _split(params.get("topics", "")),
+        _split(params.get("league", "")),
+        _split(params.get("match", "")),
+    )
+
+    try:
+        await websocket.send_text(json.dumps(live_hub.snapshot(sub), default=str))
+        while True:
+            message = await live_hub.next_message(sub)
+            await websocket.send_text(json.dumps(message, default=str))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        live_hub.unsubscribe(sub)
+
+
 # ============================================================
 # LOCAL DEV RUNNER
 # ============================================================
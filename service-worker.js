@@ -65,3 +65,50 @@ self.addEventListener("fetch", (event) => {
         })
     );
 });
+
+// -------------------------------------------------
+// PUSH — SmartMoney alerts (services/push_fanout.py)
+// -------------------------------------------------
+self.addEventListener("push", (event) => {
+    let data = {};
+    try {
+        data = event.data ? event.data.json() : {};
+    } catch (e) {
+        data = {};
+    }
+
+    // Χωρίς payload (server χωρίς encryption) → γενικό notification
+    const title = data.teams && data.teams.length
+        ? `SmartMoney: ${data.teams.join(" / ")}`
+        : "AI MatchLab SmartMoney alert";
+    const parts = [];
+    if (data.league) parts.push(data.league);
+    if (data.minute != null) parts.push(`${data.minute}'`);
+    if (data.score != null) parts.push(`score ${data.score}`);
+
+    event.waitUntil(
+        self.registration.showNotification(title, {
+            body: parts.join(" · "),
+            icon: "/static/icons/icon-192.png",
+            tag: data.match_id ? `smartmoney-${data.match_id}` : "smartmoney",
+            renotify: true,
+            data: { url: data.url || "/smartmoney" }
+        })
+    );
+});
+
+self.addEventListener("notificationclick", (event) => {
+    event.notification.close();
+    const url = (event.notification.data && event.notification.data.url) || "/smartmoney";
+    event.waitUntil(
+        self.clients.matchAll({ type: "window", includeUncontrolled: true }).then((list) => {
+            for (const client of list) {
+                if ("focus" in client) {
+                    client.navigate(url);
+                    return client.focus();
+                }
+            }
+            return self.clients.openWindow(url);
+        })
+    );
+});
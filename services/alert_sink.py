@@ -0,0 +1,260 @@
+# ============================================================
+# AI MATCHLAB — ALERT SINK
+# Batched εγγραφή smartmoney_alerts σε SQLite από ξεχωριστό thread
+# ============================================================
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+
+from .metrics import metrics, stats_families
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+DB_PATH = os.getenv("MATCHES_DB_PATH", "db/matches.db")
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", 10000))
+ALERT_BATCH_SIZE = int(os.getenv("ALERT_BATCH_SIZE", 500))
+ALERT_FLUSH_INTERVAL = float(os.getenv("ALERT_FLUSH_INTERVAL", 1.0))
+ALERT_RETENTION_DAYS = float(os.getenv("ALERT_RETENTION_DAYS", 7))
+ALERT_COMPACT_INTERVAL = float(os.getenv("ALERT_COMPACT_INTERVAL", 3600))
+
+COLUMNS = ("match_id", "league", "team", "event_time", "minute", "delta_odds", "intensity")
+
+INSERT_SQL = (
+    f"INSERT INTO smartmoney_alerts ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+)
+
+SCHEMA_SQL = """
+CREATE INDEX IF NOT EXISTS ix_smartmoney_alerts_match_event
+    ON smartmoney_alerts (match_id, event_time);
+CREATE INDEX IF NOT EXISTS ix_smartmoney_alerts_league_created
+    ON smartmoney_alerts (league, created_at);
+
+CREATE TABLE IF NOT EXISTS smartmoney_alert_summaries (
+    match_id VARCHAR NOT NULL PRIMARY KEY,
+    league VARCHAR,
+    alerts INTEGER NOT NULL DEFAULT 0,
+    first_event DATETIME,
+    last_event DATETIME,
+    sum_delta_odds FLOAT NOT NULL DEFAULT 0,
+    max_abs_delta_odds FLOAT NOT NULL DEFAULT 0,
+    sum_intensity FLOAT NOT NULL DEFAULT 0,
+    max_intensity FLOAT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Rollup: παλιά alerts → μία γραμμή ανά match (αθροιστικά)
+COMPACT_SQL = """
+INSERT INTO smartmoney_alert_summaries (
+    match_id, league, alerts, first_event, last_event,
+    sum_delta_odds, max_abs_delta_odds, sum_intensity, max_intensity
+)
+SELECT
+    match_id, MAX(league), COUNT(*), MIN(event_time), MAX(event_time),
+    TOTAL(delta_odds), MAX(ABS(COALESCE(delta_odds, 0))),
+    TOTAL(intensity), MAX(COALESCE(intensity, 0))
+FROM smartmoney_alerts
+WHERE created_at < ? AND match_id IS NOT NULL
+GROUP BY match_id
+ON CONFLICT(match_id) DO UPDATE SET
+    league = COALESCE(excluded.league, league),
+    alerts = alerts + excluded.alerts,
+    first_event = MIN(first_event, excluded.first_event),
+    last_event = MAX(last_event, excluded.last_event),
+    sum_delta_odds = sum_delta_odds + excluded.sum_delta_odds,
+    max_abs_delta_odds = MAX(max_abs_delta_odds, excluded.max_abs_delta_odds),
+    sum_intensity = sum_intensity + excluded.sum_intensity,
+    max_intensity = MAX(max_intensity, excluded.max_intensity),
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+_STOP = object()
+
+
+class AlertSink:
+    """
+    Non-blocking sink για τα SmartMoney alerts:
+    - submit() βάζει γραμμές σε bounded queue (ποτέ δεν μπλοκάρει το event loop)
+    - Ένα writer thread κάνει flush με executemany σε ένα transaction
+    - WAL mode, composite indexes για τα πραγματικά queries
+    - Περιοδικό retention: παλιές γραμμές → smartmoney_alert_summaries
+    """
+
+    def __init__(self, db_path: str = DB_PATH,
+                 maxsize: int = ALERT_QUEUE_SIZE,
+                 batch_size: int = ALERT_BATCH_SIZE,
+                 flush_interval: float = ALERT_FLUSH_INTERVAL,
+                 retention_days: float = ALERT_RETENTION_DAYS,
+                 compact_interval: float = ALERT_COMPACT_INTERVAL):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._compact_now = threading.Event()
+        self._should_compact: Callable[[], bool] = lambda: True
+
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.compacted = 0
+        self.last_flush_ms = 0.0
+
+    # ------------------------------------------------------------
+    # Producer side (event loop)
+    # ------------------------------------------------------------
+    def submit(self, rows: List[Dict[str, Any]]) -> int:
+        """ Επιστρέφει πόσες γραμμές μπήκαν στην queue (οι υπόλοιπες είναι drops). """
+        accepted = 0
+        for row in rows:
+            try:
+                self._queue.put_nowait(tuple(row.get(c) for c in COLUMNS))
+                accepted += 1
+            except queue.Full:
+                self.dropped += 1
+        if accepted < len(rows):
+            print(f"[AlertSink] ⚠ Queue full, dropped {len(rows) - accepted} alerts")
+        return accepted
+
+    def request_compaction(self):
+        self._compact_now.set()
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self, should_compact: Callable[[], bool] = lambda: True):
+        """ should_compact: π.χ. μόνο ο shared-state writer / standalone. """
+        self._should_compact = should_compact
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="alert-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        # Με γεμάτη queue ο writer αδειάζει batches: περιμένουμε θέση έως timeout.
+        # Νεκρός writer (π.χ. αποτυχία connect) δεν θα διάβαζε ποτέ το _STOP.
+        thread, self._thread = self._thread, None
+        if not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print(f"[AlertSink] ⚠ Writer did not drain queue within {timeout}s, not waiting")
+            return
+        thread.join(timeout)
+
+    # ------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA_SQL)
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"[AlertSink] ❌ Cannot open {self.db_path}: {e}")
+            return
+
+        next_compact = time.monotonic() + self.compact_interval
+        running = True
+
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is _STOP:
+                    running = False
+                else:
+                    batch.append(item)
+                    while len(batch) < self.batch_size:
+                        item = self._queue.get_nowait()
+                        if item is _STOP:
+                            running = False
+                            break
+                        batch.append(item)
+            except queue.Empty:
+                pass
+
+            if batch:
+                self._flush(conn, batch)
+
+            if self._compact_now.is_set() or time.monotonic() >= next_compact:
+                self._compact_now.clear()
+                if self._should_compact():
+                    self._compact(conn)
+                next_compact = time.monotonic() + self.compact_interval
+
+        conn.close()
+
+    def _flush(self, conn: sqlite3.Connection, batch: List[tuple]):
+        t0 = time.perf_counter()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(INSERT_SQL, batch)
+            conn.execute("COMMIT")
+            self.written += len(batch)
+            self.flushes += 1
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.dropped += len(batch)
+            print(f"[AlertSink] ❌ Flush error ({len(batch)} rows dropped): {e}")
+        self.last_flush_ms = (time.perf_counter() - t0) * 1000
+
+    def _compact(self, conn: sqlite3.Connection):
+        # Ένα cutoff για rollup και DELETE (ίδια μορφή με το CURRENT_TIMESTAMP, UTC).
+        # Χωρίς match_id δεν υπάρχει summary γραμμή: αυτά μένουν στον πίνακα.
+        cutoff = time.strftime(
+            "%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - self.retention_days * 86400)
+        )
+        try:
+            conn.execute("BEGIN")
+            conn.execute(COMPACT_SQL, (cutoff,))
+            cur = conn.execute(
+                "DELETE FROM smartmoney_alerts WHERE created_at < ? AND match_id IS NOT NULL",
+                (cutoff,),
+            )
+            conn.execute("COMMIT")
+            self.compacted += cur.rowcount
+            if cur.rowcount:
+                print(f"[AlertSink] 🧹 Rolled {cur.rowcount} old alerts into summaries")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"[AlertSink] ❌ Compaction error: {e}")
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "compacted": self.compacted,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+        }
+
+
+# Singleton instance
+alert_sink = AlertSink()
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_alert_sink", alert_sink.stats(),
+    counters=("written", "dropped", "flushes", "compacted"),
+))
@@ -0,0 +1,409 @@
+# ============================================================
+# AI MATCHLAB — ANALYSIS PIPELINE
+# Ένα normalize + shared aggregates → GoalMatrix, SmartMoney, plugins
+# ============================================================
+
+import asyncio
+import os
+import time
+from typing import Dict, Any, List, Optional, Callable, Tuple
+
+import numpy as np
+
+from .exchange_engine import exchange_engine
+from .goalmatrix_engine import goalmatrix_engine
+from .smartmoney_engine import smartmoney_engine
+from .market_batch import MarketBatch, aggregate_runners, aggregate_batch
+from .ladder import market_ladder_aggregates, scalar_ladder_aggregates
+from .movement_store import movement_store
+from .metrics import metrics, FAST_BUCKETS
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+# Markets ανά βήμα του analyze_many_async (μετά από κάθε chunk ο loop παίρνει σειρά)
+PIPELINE_CHUNK = int(os.getenv("PIPELINE_CHUNK", 100))
+
+# Stage: (normalized market, shared aggregates) → payload του stage
+Stage = Callable[[Dict[str, Any], Dict[str, int]], Optional[Dict[str, Any]]]
+
+# Listener για change events του incremental ingestion
+Listener = Callable[[Dict[str, Any]], None]
+
+# Χρόνος ανά εκτέλεση του pipeline (όλα τα markets του call) ανά stage
+STAGE_SECONDS = metrics.histogram(
+    "aimatchlab_pipeline_stage_seconds",
+    "Pipeline time per call and stage (normalize, aggregate, registered stages)",
+    ("stage", "mode"), buckets=FAST_BUCKETS,
+)
+
+
+class PreparedBatch:
+    """
+    Το stateless μέρος του analyze_many: MarketBatch + per-market columns.
+    Picklable (protocol 5: οι NumPy columns ως out-of-band buffers),
+    ώστε να φτιάχνεται και σε άλλο process (βλ. offload).
+    """
+
+    __slots__ = ("batch", "columns", "liquidity", "timings")
+
+    def __init__(self, batch: MarketBatch, columns: Dict[str, np.ndarray],
+                 liquidity: Dict[str, np.ndarray], timings: Optional[Dict[str, float]] = None):
+        self.batch = batch
+        self.columns = columns
+        self.liquidity = liquidity
+        self.timings = timings or {}
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    def slice(self, start: int, end: int) -> "PreparedBatch":
+        return PreparedBatch(
+            self.batch.slice(start, end),
+            {k: v[start:end] for k, v in self.columns.items()},
+            {k: v[start:end] for k, v in self.liquidity.items()},
+        )
+
+
+class AnalysisPipeline:
+    """
+    Κοινή ροή ανάλυσης για κάθε market:
+    - Κανονικοποίηση μία φορά (exchange_engine)
+    - Καταγραφή στο movement_store (ιστορικό odds / volume)
+    - Pressure / volatility / drift aggregates μία φορά
+    - Fan-out στα registered stages (goalmatrix, smartmoney, plugins)
+    - analyze_many: ολόκληρο feed snapshot σε columnar batch
+    - ingest_change: incremental ενημέρωση από market-change messages,
+      ξανατρέχουν μόνο τα stages των οποίων άλλαξαν τα inputs
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Stage] = {}
+        self._stage_inputs: Dict[str, Optional[Tuple[str, ...]]] = {}
+        self._listeners: List[Listener] = []
+
+        # market_id → {"agg": ..., "results": {stage: payload}}
+        self._live: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------
+    # Stage registry
+    # ------------------------------------------------------------
+    def register_stage(self, name: str, stage: Stage,
+                       inputs: Optional[Tuple[str, ...]] = None):
+        """
+        Καταχωρεί indicator plugin. Το αποτέλεσμά του εμφανίζεται
+        στο combined payload κάτω από το key `name`.
+        inputs: τα aggregates από τα οποία εξαρτάται το stage
+        (None → ξανατρέχει σε κάθε αλλαγή runner).
+        """
+        self._stages[name] = stage
+        self._stage_inputs[name] = inputs
+
+    def unregister_stage(self, name: str):
+        self._stages.pop(name, None)
+        self._stage_inputs.pop(name, None)
+
+    def add_listener(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    @property
+    def stages(self) -> List[str]:
+        return list(self._stages)
+
+    # ------------------------------------------------------------
+    # Single market
+    # ------------------------------------------------------------
+    def analyze(self, raw_market: Dict[str, Any],
+                ts: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Παίρνει raw market JSON και επιστρέφει combined payload
+        με τα αποτελέσματα όλων των stages.
+        ts: χρόνος του snapshot για το movement_store (default: τώρα· το replay
+        δίνει τον χρόνο του recording).
+        """
+        t0 = time.perf_counter()
+        market = exchange_engine.normalize_market(raw_market)
+        if not market:
+            return None
+
+        t1 = time.perf_counter()
+        movement_store.record_market(market, ts)
+
+        agg = aggregate_runners(market["runners"])
+        agg.update(smartmoney_engine.movement_aggregates(market["market_id"], market["runners"]))
+        agg.update(market_ladder_aggregates(raw_market.get("runners") or []))
+
+        timings = {"normalize": t1 - t0, "aggregate": time.perf_counter() - t1}
+        payload = self._run_stages(market, agg, timings)
+        _observe(timings, "single")
+        return payload
+
+    # ------------------------------------------------------------
+    # Whole feed snapshot
+    # ------------------------------------------------------------
+    def analyze_many(self, raw_markets: List[Dict[str, Any]],
+                     ts: Optional[float] = None, record: bool = True) -> List[Dict[str, Any]]:
+        """
+        Batch εκδοχή: normalize όλων των markets σε columns,
+        aggregates με ένα bincount, και μετά fan-out ανά market.
+        Markets που δεν κανονικοποιούνται παραλείπονται.
+        record=False: το movement_store μόνο διαβάζεται (markets από clients,
+        π.χ. /api/smartmoney/batch, δεν μπαίνουν στο ιστορικό του feed).
+        """
+        prepared = self.prepare_batch(raw_markets)
+        if not len(prepared):
+            return []
+        return self.finish_batch(prepared, ts, record)
+
+    async def analyze_many_async(self, raw_markets: List[Dict[str, Any]],
+                                 ts: Optional[float] = None, record: bool = True,
+                                 chunk: int = PIPELINE_CHUNK) -> List[Dict[str, Any]]:
+        """
+        analyze_many από τον event loop: ανά chunk markets με await ανάμεσα,
+        ώστε ένα ολόκληρο card να μη μπλοκάρει τα υπόλοιπα requests.
+        Ίδια αποτελέσματα (κάθε market αναλύεται ανεξάρτητα).
+        """
+        ts = time.time() if ts is None else ts
+        out = []
+        for start in range(0, len(raw_markets), max(1, chunk)):
+            if start:
+                await asyncio.sleep(0)
+            out.extend(self.analyze_many(raw_markets[start:start + chunk], ts, record))
+        return out
+
+    def prepare_batch(self, raw_markets: List[Dict[str, Any]]) -> PreparedBatch:
+        """ Normalize + column aggregates· χωρίς movement_store / stages (stateless). """
+        t0 = time.perf_counter()
+        batch = exchange_engine.normalize_markets_batch(raw_markets)
+        t1 = time.perf_counter()
+        if not len(batch):
+            return PreparedBatch(batch, {}, {})
+
+        columns = aggregate_batch(batch)
+        liquidity = {
+            k: v for k, v in exchange_engine.ladder_aggregates_batch(batch).items()
+            if k != "runner_imbalanced"
+        }
+        timings = {"normalize": t1 - t0, "aggregate": time.perf_counter() - t1}
+        return PreparedBatch(batch, columns, liquidity, timings)
+
+    def finish_batch(self, prepared: PreparedBatch, ts: Optional[float] = None,
+                     record: bool = True) -> List[Dict[str, Any]]:
+        """ Movement (movement_store) και stages ανά market ενός PreparedBatch. """
+        t0 = time.perf_counter()
+        batch, cols = prepared.batch, prepared.columns
+        back = cols["back_pressure"].tolist()
+        lay = cols["lay_pressure"].tolist()
+        vol = cols["volatility"].tolist()
+
+        slots = movement_store.record_batch(batch, ts) if record else movement_store.lookup_batch(batch)
+        mv = smartmoney_engine.slot_movement(slots)
+        n, idx = len(batch), batch.market_index
+        drifting = np.bincount(idx[mv["drifting"]], minlength=n).tolist()
+        spikes = np.bincount(idx[mv["spiking"]], minlength=n).tolist()
+        liquidity = {k: v.tolist() for k, v in prepared.liquidity.items()}
+
+        timings = dict(prepared.timings)
+        timings["aggregate"] = timings.get("aggregate", 0.0) + time.perf_counter() - t0
+        out = []
+        for i in range(n):
+            agg = {
+                "back_pressure": back[i],
+                "lay_pressure": lay[i],
+                "volatility": vol[i],
+                "drifting": drifting[i],
+                "volume_spikes": spikes[i],
+            }
+            if liquidity:
+                agg.update(scalar_ladder_aggregates(liquidity, i))
+            out.append(self._run_stages(batch.market(i), agg, timings))
+
+        _observe(timings, "batch")
+        return out
+
+    # ------------------------------------------------------------
+    # Incremental ingestion
+    # ------------------------------------------------------------
+    def ingest_change(self, change: Dict[str, Any],
+                      ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Περνάει ένα market-change message από το exchange_engine image
+        και ενημερώνει μόνο ό,τι επηρεάζεται:
+        - aggregates: αφαιρείται η παλιά και προστίθεται η νέα συνεισφορά
+          μόνο των runners που άλλαξαν
+        - stages: ξανατρέχουν μόνο αν άλλαξε κάποιο από τα inputs τους
+        Επιστρέφει (και στέλνει στους listeners) τα change events.
+        """
+        t0 = time.perf_counter()
+        result = exchange_engine.apply_market_change(change)
+        if result is None:
+            return []
+        t1 = time.perf_counter()
+        timings = {"normalize": t1 - t0}
+
+        market_id = result["market_id"]
+
+        if result["closed"]:
+            self._live.pop(market_id, None)
+            movement_store.forget_market(market_id)
+            return self._emit([{"type": "closed", "market_id": market_id}])
+
+        market = result["market"]
+        changed = result["changed"]
+        state = self._live.get(market_id)
+
+        if state is None or change.get("img"):
+            new_runners = market["runners"]
+            movement_store.record_market(market, ts)
+            agg = aggregate_runners(new_runners)
+            state = {"agg": None, "results": {}}
+            self._live[market_id] = state
+        else:
+            if not changed:
+                return []
+
+            old_runners = [old for old, _ in changed if old is not None]
+            new_runners = [new for _, new in changed]
+            movement_store.record_market({"market_id": market_id, "runners": new_runners}, ts)
+
+            agg = dict(state["agg"])
+            for k, v in aggregate_runners(old_runners).items():
+                agg[k] -= v
+            for k, v in aggregate_runners(new_runners).items():
+                agg[k] += v
+
+        # Drift / spike είναι time-windowed: ξαναϋπολογίζονται για όλους τους runners
+        # (ένα vectorized lookup), ώστε ένα flag να λήγει και χωρίς νέο tick του runner
+        agg.update(smartmoney_engine.movement_aggregates(
+            market_id, market["runners"], time.time() if ts is None else ts,
+        ))
+        agg.update(exchange_engine.image_ladder_aggregates(market_id))
+
+        prev = state["agg"]
+        diff = set(agg) if prev is None else {k for k in agg if agg[k] != prev.get(k)}
+        state["agg"] = agg
+        timings["aggregate"] = time.perf_counter() - t1
+
+        events = [{
+            "type": "runners",
+            "market_id": market_id,
+            "runners": new_runners,
+            "aggregates": agg,
+        }]
+
+        for name, stage in self._stages.items():
+            inputs = self._stage_inputs.get(name)
+            if inputs is not None and name in state["results"] and not diff.intersection(inputs):
+                continue
+
+            t_stage = time.perf_counter()
+            try:
+                data = stage(market, agg)
+            except Exception as e:
+                print(f"[AnalysisPipeline] ⚠ Stage '{name}' error: {e}")
+                data = None
+            timings[name] = time.perf_counter() - t_stage
+
+            if name in state["results"] and state["results"][name] == data:
+                continue
+
+            state["results"][name] = data
+            events.append({
+                "type": "stage",
+                "market_id": market_id,
+                "stage": name,
+                "data": data,
+            })
+
+        _observe(timings, "incremental")
+        return self._emit(events)
+
+    def _emit(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for listener in self._listeners:
+            for event in events:
+                try:
+                    listener(event)
+                except Exception as e:
+                    print(f"[AnalysisPipeline] ⚠ Listener error: {e}")
+        return events
+
+    # ------------------------------------------------------------
+    def live_payload(self, market_id: str) -> Optional[Dict[str, Any]]:
+        """ Combined payload του market όπως το κρατάει το incremental ingestion. """
+        state = self._live.get(market_id)
+        market = exchange_engine.market_image(market_id)
+        if state is None or market is None:
+            return None
+
+        payload = {
+            "market_id": market["market_id"],
+            "market_name": market["market_name"],
+            "total_matched": market["total_matched"],
+            "runners": market["runners"],
+            "aggregates": state["agg"],
+        }
+        payload.update(state["results"])
+        return payload
+
+    # ------------------------------------------------------------
+    def _run_stages(self, market: Dict[str, Any], agg: Dict[str, int],
+                    timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        payload = {
+            "market_id": market["market_id"],
+            "market_name": market["market_name"],
+            "total_matched": market["total_matched"],
+            "runners": market["runners"],
+            "aggregates": agg,
+        }
+
+        for name, stage in self._stages.items():
+            t0 = time.perf_counter()
+            try:
+                payload[name] = stage(market, agg)
+            except Exception as e:
+                print(f"[AnalysisPipeline] ⚠ Stage '{name}' error: {e}")
+                payload[name] = None
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
+
+        return payload
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _observe(timings: Dict[str, float], mode: str):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage=stage, mode=mode).observe(seconds)
+
+
+# ------------------------------------------------------------
+# Default stages
+# ------------------------------------------------------------
+def goalmatrix_stage(market: Dict[str, Any], agg: Dict[str, int]) -> Dict[str, Any]:
+    return {"indicators": goalmatrix_engine.indicators_from_aggregates(agg)}
+
+
+def smartmoney_stage(market: Dict[str, Any], agg: Dict[str, int]) -> Dict[str, Any]:
+    score = smartmoney_engine.score_from_aggregates(agg)
+    return {
+        "smart_score": score,
+        "alerts": smartmoney_engine.generate_alerts(score),
+    }
+
+
+# Singleton instance
+analysis_pipeline = AnalysisPipeline()
+analysis_pipeline.register_stage(
+    "goalmatrix", goalmatrix_stage,
+    inputs=("back_pressure", "lay_pressure", "overround", "imbalance", "max_spread_ticks"),
+)
+analysis_pipeline.register_stage(
+    "smartmoney", smartmoney_stage,
+    inputs=("back_pressure", "lay_pressure", "volatility", "drifting", "volume_spikes", "imbalanced"),
+)
@@ -0,0 +1,169 @@
+# ============================================================
+# AI MATCHLAB — BATCH ANALYSIS
+# POST πολλών raw markets → NDJSON αποτελέσματα (GoalMatrix / SmartMoney)
+# ============================================================
+
+import asyncio
+import os
+import pickle
+from typing import Dict, Any, List, Tuple, AsyncIterator
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .analysis_pipeline import PreparedBatch, analysis_pipeline
+from .live_stream import extract_markets
+from .metrics import metrics
+from .models import dumps_lines, loads
+from .offload import cpu_offload, OFFLOAD_MIN_BODY
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+BATCH_MAX_BODY = int(os.getenv("BATCH_MAX_BODY", 8 * 1024 * 1024))
+BATCH_MAX_MARKETS = int(os.getenv("BATCH_MAX_MARKETS", 20000))
+# Markets ανά analyze_many· μετά από κάθε chunk το loop παίρνει ανάσα
+BATCH_CHUNK = int(os.getenv("BATCH_CHUNK", 100))
+
+NDJSON_TYPE = "application/x-ndjson"
+
+BASE_FIELDS = ("market_id", "market_name", "total_matched", "runners")
+# Ίδιο σχήμα με το analyze_market κάθε engine
+ENGINE_FIELDS = {
+    "goalmatrix": BASE_FIELDS + ("indicators",),
+    "smartmoney": BASE_FIELDS + ("smart_score", "alerts"),
+}
+
+BATCH_MARKETS = metrics.counter(
+    "aimatchlab_batch_markets_total",
+    "Markets analyzed by the batch endpoints",
+    ("engine",),
+)
+BATCH_REQUESTS = metrics.counter(
+    "aimatchlab_batch_requests_total",
+    "Batch analysis requests by engine and status",
+    ("engine", "status"),
+)
+
+
+class BatchError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+    def __reduce__(self):
+        # Περνάει ακέραιο από τον worker process πίσω στο route
+        return BatchError, (self.status, self.message)
+
+
+# ------------------------------------------------------------
+# Request
+# ------------------------------------------------------------
+async def read_body(request: Request, limit: int = BATCH_MAX_BODY) -> bytes:
+    """ Διαβάζει το body με όριο: Content-Length πρώτα, μετά μέτρημα στο stream. """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise BatchError(413, f"Body larger than {limit} bytes")
+
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise BatchError(413, f"Body larger than {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def parse_markets(body: bytes, content_type: str = "") -> List[Dict[str, Any]]:
+    """ JSON list, {"markets": [...]} (όπως το feed) ή NDJSON (ένα market ανά γραμμή). """
+    try:
+        if content_type.startswith(NDJSON_TYPE):
+            data = [loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            data = extract_markets(loads(body))
+    except ValueError as e:
+        raise BatchError(400, f"Invalid JSON: {e}")
+
+    markets = [m for m in data if isinstance(m, dict)]
+    if len(markets) > BATCH_MAX_MARKETS:
+        raise BatchError(413, f"More than {BATCH_MAX_MARKETS} markets")
+    return markets
+
+
+def parse_fields(engine: str, fields: str) -> Tuple[str, ...]:
+    """ ?fields=market_id,smart_score → projection (κενό → όλα τα fields). """
+    allowed = ENGINE_FIELDS[engine]
+    wanted = tuple(f.strip() for f in fields.split(",") if f.strip())
+    if not wanted:
+        return allowed
+    unknown = [f for f in wanted if f not in allowed]
+    if unknown:
+        raise BatchError(400, f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})")
+    return wanted
+
+
+def prepare_body(body, content_type: str = "") -> PreparedBatch:
+    """
+    Job του cpu_offload (worker process): parse + normalize + column aggregates.
+    body: bytes ή memoryview πάνω στο shared memory (το JSON διαβάζεται χωρίς αντίγραφο).
+    """
+    if content_type.startswith(NDJSON_TYPE):
+        body = bytes(body)
+    return analysis_pipeline.prepare_batch(parse_markets(body, content_type))
+
+
+# ------------------------------------------------------------
+# Response
+# ------------------------------------------------------------
+def project(payload: Dict[str, Any], engine: str, fields: Tuple[str, ...]) -> Dict[str, Any]:
+    stage = payload.get(engine) or {}
+    return {f: payload[f] if f in BASE_FIELDS else stage.get(f) for f in fields}
+
+
+async def stream_results(markets: List[Dict[str, Any]], engine: str,
+                         fields: Tuple[str, ...], chunk: int = BATCH_CHUNK) -> AsyncIterator[bytes]:
+    """ Ένα NDJSON block ανά chunk, μόλις υπολογιστεί. """
+    for start in range(0, len(markets), chunk):
+        results = analysis_pipeline.analyze_many(markets[start:start + chunk], record=False)
+        BATCH_MARKETS.labels(engine=engine).inc(len(results))
+        if results:
+            yield dumps_lines(project(p, engine, fields) for p in results)
+        await asyncio.sleep(0)
+
+
+async def stream_prepared(prepared: PreparedBatch, engine: str,
+                          fields: Tuple[str, ...], chunk: int = BATCH_CHUNK) -> AsyncIterator[bytes]:
+    """ Όπως το stream_results, για batch που κανονικοποιήθηκε στο process pool. """
+    for start in range(0, len(prepared), chunk):
+        part = prepared.slice(start, min(start + chunk, len(prepared)))
+        results = analysis_pipeline.finish_batch(part, record=False)
+        BATCH_MARKETS.labels(engine=engine).inc(len(results))
+        if results:
+            yield dumps_lines(project(p, engine, fields) for p in results)
+        await asyncio.sleep(0)
+
+
+async def batch_response(request: Request, engine: str, fields: str = ""):
+    try:
+        projection = parse_fields(engine, fields)
+        body = await read_body(request)
+        content_type = request.headers.get("content-type", "")
+        if cpu_offload.should_offload(len(body), OFFLOAD_MIN_BODY):
+            # Μεγάλο body: parse / normalize στο process pool, εδώ μόνο movement + stages
+            prepared = await cpu_offload.run(prepare_body, pickle.PickleBuffer(body), content_type)
+            results = stream_prepared(prepared, engine, projection)
+        else:
+            cpu_offload.count_inline(prepare_body.__name__)
+            results = stream_results(parse_markets(body, content_type), engine, projection)
+    except BatchError as e:
+        BATCH_REQUESTS.labels(engine=engine, status=e.status).inc()
+        return JSONResponse({"error": e.message}, status_code=e.status)
+
+    BATCH_REQUESTS.labels(engine=engine, status=200).inc()
+    return StreamingResponse(
+        results,
+        media_type=NDJSON_TYPE,
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
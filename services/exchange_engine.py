@@ -5,34 +5,53 @@
 
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+
+from .market_batch import MarketBatch, build_market_batch, detect_movement_columns, STATUS_CODES
+from .models import Market, Runner, RunnerStatus, Movement, LadderLevel
+from .ladder import (
+    LADDER_DEPTH, VWAP_STAKE, ladder_aggregates, liquidity_aggregates, runner_liquidity,
+    spread_ticks, vwap_to_stake, book_imbalance, overround,
+)
+
 
 class ExchangeEngine:
     """
     Ενοποιεί τα δεδομένα από τον Provider:
-    - Κανονικοποίηση markets
+    - Κανονικοποίηση markets (Market / Runner models με dict views)
     - Καθαρισμός odds
     - Εμπλουτισμός runners
     - Flags για movement
+    - Columnar batch mode για ολόκληρο feed (normalize_markets_batch)
+    - Πλήρες ladder (fixed-depth arrays) & liquidity metrics
+    - Incremental ingestion: μόνιμο normalized image ανά market
+      που ενημερώνεται από market-change messages
     """
 
+    def __init__(self):
+        # market_id → {"market": Market, "raw": {sel: raw runner}, "pos": {sel: index},
+        #              "liquidity": {sel: runner_liquidity contribution}}
+        self._images: Dict[str, Dict[str, Any]] = {}
+
     # ------------------------------------------------------------
     # Normalize exchange market data
     # ------------------------------------------------------------
-    def normalize_market(self, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def normalize_market(self, raw: Dict[str, Any], depth: int = 0) -> Optional[Market]:
         """
         Παίρνει ένα raw exchange market JSON
         και επιστρέφει καθαρό, normalized object.
+        depth > 0: κρατάει και τα πρώτα `depth` επίπεδα ladder ανά runner.
         """
         if not raw or "runners" not in raw:
             return None
 
         try:
-            market = {
-                "market_id": raw.get("marketId", ""),
-                "market_name": raw.get("marketName", ""),
-                "total_matched": raw.get("totalMatched", 0),
-                "runners": self.normalize_runners(raw.get("runners", [])),
-            }
+            market = Market(
+                raw.get("marketId", ""),
+                raw.get("marketName", ""),
+                _number(raw.get("totalMatched", 0) or 0),
+                self.normalize_runners(raw.get("runners", []), depth),
+            )
 
             return market
 
@@ -43,7 +62,7 @@ class ExchangeEngine:
     # ------------------------------------------------------------
     # Normalize runners / odds
     # ------------------------------------------------------------
-    def normalize_runners(self, runners: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def normalize_runners(self, runners: List[Dict[str, Any]], depth: int = 0) -> List[Runner]:
         out = []
 
         for r in runners:
@@ -51,19 +70,22 @@ class ExchangeEngine:
                 back = r.get("ex", {}).get("availableToBack", [])
                 lay = r.get("ex", {}).get("availableToLay", [])
 
-                runner = {
-                    "selection_id": r.get("selectionId"),
-                    "name": r.get("runnerName"),
-                    "status": r.get("status", "ACTIVE"),
+                runner = Runner(
+                    r.get("selectionId"),
+                    r.get("runnerName"),
+                    RunnerStatus.parse(r.get("status")),
 
-                    "back_odds": back[0]["price"] if back else None,
-                    "back_size": back[0]["size"] if back else None,
+                    _number(back[0]["price"]) if back else None,
+                    _number(back[0]["size"]) if back else None,
 
-                    "lay_odds": lay[0]["price"] if lay else None,
-                    "lay_size": lay[0]["size"] if lay else None,
+                    _number(lay[0]["price"]) if lay else None,
+                    _number(lay[0]["size"]) if lay else None,
+                    _number(r.get("totalMatched")),
 
-                    "movement": self.detect_movement(back, lay)
-                }
+                    self.movement_code(back, lay),
+                    LadderLevel.from_raw(back, depth) if depth else (),
+                    LadderLevel.from_raw(lay, depth) if depth else (),
+                )
 
                 out.append(runner)
 
@@ -72,6 +94,171 @@ class ExchangeEngine:
 
         return out
 
+    # ------------------------------------------------------------
+    # Batch normalize (columnar)
+    # ------------------------------------------------------------
+    def normalize_markets_batch(self, raw_markets: List[Dict[str, Any]]) -> MarketBatch:
+        """
+        Κανονικοποιεί όλα τα markets ενός refresh σε ένα πέρασμα.
+        Επιστρέφει MarketBatch με NumPy columns· τα dicts του
+        normalize_market είναι διαθέσιμα lazily (batch.market(i)).
+        Markets χωρίς "runners" παραλείπονται (βλ. batch.source_index).
+        """
+        return build_market_batch(raw_markets or [])
+
+    # ------------------------------------------------------------
+    def detect_movement_batch(self, back_price: np.ndarray, lay_price: np.ndarray) -> np.ndarray:
+        """
+        Vectorized movement flags (int8 codes, βλ. MOVEMENT_LABELS)
+        πάνω στις best back / best lay columns.
+        """
+        return detect_movement_columns(back_price, lay_price)
+
+    # ------------------------------------------------------------
+    # Ladder / liquidity metrics
+    # ------------------------------------------------------------
+    def ladder_metrics(self, batch: MarketBatch, stake: float = VWAP_STAKE) -> Dict[str, np.ndarray]:
+        """
+        Vectorized metrics πάνω στο ladder του batch:
+        ανά runner spread_ticks, back/lay VWAP μέχρι `stake` (+ fill ratio),
+        imbalance· ανά market overround.
+        """
+        ladder = batch.ladder
+        if ladder is None:
+            return {}
+
+        back_vwap, back_fill = vwap_to_stake(ladder.back_price, ladder.back_size, stake)
+        lay_vwap, lay_fill = vwap_to_stake(ladder.lay_price, ladder.lay_size, stake)
+        active = batch.status == STATUS_CODES["ACTIVE"]
+
+        return {
+            "spread_ticks": spread_ticks(ladder),
+            "back_vwap": back_vwap,
+            "back_fill": back_fill,
+            "lay_vwap": lay_vwap,
+            "lay_fill": lay_fill,
+            "imbalance": book_imbalance(ladder),
+            "overround": overround(batch.back_price, batch.market_index, len(batch), active),
+        }
+
+    def ladder_aggregates_batch(self, batch: MarketBatch) -> Dict[str, np.ndarray]:
+        """ Per-market liquidity aggregates (overround, imbalance, ...) ή {} χωρίς ladder. """
+        if batch.ladder is None:
+            return {}
+        return ladder_aggregates(
+            batch.ladder, batch.market_index, len(batch), batch.back_price,
+            active=batch.status == STATUS_CODES["ACTIVE"],
+        )
+
+    def image_ladder_aggregates(self, market_id: str) -> Dict[str, Any]:
+        """
+        Liquidity aggregates του μόνιμου image (incremental ingestion)·
+        οι συνεισφορές ανά runner ενημερώνονται μόνο για όσους ήρθαν στο change.
+        """
+        image = self._images.get(market_id)
+        if image is None:
+            return {}
+        return liquidity_aggregates(image["liquidity"].values())
+
+    # ------------------------------------------------------------
+    # Incremental ingestion (market-change messages)
+    # ------------------------------------------------------------
+    def apply_market_change(self, change: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Εφαρμόζει market-change message στο μόνιμο image του market.
+        Το message έχει το σχήμα του raw market, αλλά μόνο με ό,τι άλλαξε:
+        {"marketId": ..., "runners": [{"selectionId": ..., "ex": {"availableToBack": [...]}}]}
+        - "img": true → πλήρες image (αντικαθιστά το υπάρχον)
+        - "status": "CLOSED" → το image αφαιρείται
+
+        Επιστρέφει {"market_id", "market", "changed": [(old_runner, new_runner), ...],
+        "closed"} ή None αν το message δεν είναι έγκυρο.
+        Runner που δεν άλλαξε στην ουσία (odds / size / status) δεν εμφανίζεται στο "changed".
+        """
+        market_id = (change or {}).get("marketId")
+        if not market_id:
+            return None
+
+        if change.get("status") == "CLOSED":
+            image = self._images.pop(market_id, None)
+            return {
+                "market_id": market_id,
+                "market": image["market"] if image else None,
+                "changed": [],
+                "closed": True,
+            }
+
+        image = self._images.get(market_id)
+        if image is None or change.get("img"):
+            image = {
+                "market": Market(market_id),
+                "raw": {},
+                "pos": {},
+                "liquidity": {},
+            }
+            self._images[market_id] = image
+
+        market = image["market"]
+        if "marketName" in change:
+            market.market_name = change["marketName"]
+        if "totalMatched" in change:
+            try:
+                market.total_matched = _number(change["totalMatched"] or 0)
+            except (TypeError, ValueError):
+                print(f"[ExchangeEngine] ⚠ Invalid totalMatched in change for {market_id}")
+
+        changed = []
+        for delta in change.get("runners") or []:
+            try:
+                pair = self._patch_runner(image, delta)
+            except Exception as e:
+                print(f"[ExchangeEngine] ⚠ Error on runner change: {e}")
+                continue
+            if pair is not None:
+                changed.append(pair)
+
+        return {
+            "market_id": market_id,
+            "market": market,
+            "changed": changed,
+            "closed": False,
+        }
+
+    def _patch_runner(self, image: Dict[str, Any], delta: Dict[str, Any]):
+        sel = delta.get("selectionId")
+        if sel is None:
+            return None
+
+        old_raw = image["raw"].get(sel, {})
+        raw = {**old_raw, **delta}
+        if "ex" in delta:
+            raw["ex"] = {**old_raw.get("ex", {}), **delta["ex"]}
+
+        runner = self.normalize_runners([raw])
+        if not runner:
+            return None
+        runner = runner[0]
+        liquidity = runner_liquidity(raw) if LADDER_DEPTH > 0 else None
+        image["raw"][sel] = raw
+        image["liquidity"][sel] = liquidity
+
+        runners = image["market"].runners
+        pos = image["pos"].get(sel)
+        if pos is None:
+            image["pos"][sel] = len(runners)
+            runners.append(runner)
+            return (None, runner)
+
+        old = runners[pos]
+        if old == runner:
+            return None
+        runners[pos] = runner
+        return (old, runner)
+
+    def market_image(self, market_id: str) -> Optional[Market]:
+        image = self._images.get(market_id)
+        return image["market"] if image else None
+
     # ------------------------------------------------------------
     # Movement detection
     # ------------------------------------------------------------
@@ -80,23 +267,32 @@ class ExchangeEngine:
         Μικρή λογική για movement flag.
         Χρησιμοποιείται σαν input για GoalMatrix & SmartMoney.
         """
+        return self.movement_code(back, lay).label
+
+    def movement_code(self, back: List[Dict[str, Any]], lay: List[Dict[str, Any]]) -> Movement:
+        """ Ίδιο με detect_movement, ως Movement (int) για τα Runner models. """
         try:
             if not back or not lay:
-                return "none"
+                return Movement.NONE
 
             b = back[0]["price"]
             l = lay[0]["price"]
 
             # Simple interpretation:
             if b < l:
-                return "pressure_to_back"
+                return Movement.BACK
             if l < b:
-                return "pressure_to_lay"
+                return Movement.LAY
 
         except:
             pass
 
-        return "none"
+        return Movement.NONE
+
+
+def _number(value: Any) -> Optional[float]:
+    """ Ίδιος έλεγχος με το build_market_batch: "abc" → ValueError (ο runner παραλείπεται). """
+    return None if value is None else float(value)
 
 
 # Singleton instance
@@ -0,0 +1,283 @@
+# ============================================================
+# AI MATCHLAB — FEED RECORDER
+# Append-only, compressed log των raw upstream payloads (replay / backtest)
+# ============================================================
+
+import datetime as dt
+import fcntl
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Any, Iterator, Optional, Iterable, NamedTuple
+
+from .metrics import metrics, stats_families
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+# Κενό → χωρίς recording. "{date}" → ένα αρχείο ανά ημέρα (UTC), π.χ.
+# FEED_RECORD_PATH=recordings/feed-{date}.log. Αρχείο που γράφει ήδη άλλο process → <path>.<pid>
+FEED_RECORD_PATH = os.getenv("FEED_RECORD_PATH", "").strip()
+FEED_RECORD_LEVEL = int(os.getenv("FEED_RECORD_LEVEL", 6))
+FEED_RECORD_QUEUE = int(os.getenv("FEED_RECORD_QUEUE", 1000))
+
+# File header, μετά records: [compressed len, ts, path len, raw len] path zlib(payload)
+MAGIC = b"AIMLREC1"
+_RECORD = struct.Struct("<IdHI")
+
+_STOP = object()
+
+
+class FeedRecord(NamedTuple):
+    ts: float
+    path: str
+    data: bytes
+
+
+class FeedRecorder:
+    """
+    Καταγράφει κάθε raw payload του ProviderClient.get_json:
+    - record() από το event loop: μόνο put σε bounded queue (drop αν γεμίσει)
+    - Ένα writer thread κάνει zlib + append + flush ανά batch
+    - Length-prefixed records, ώστε ένα κομμένο τελευταίο record
+      (crash στη μέση) να αγνοείται στο replay
+    """
+
+    def __init__(self, path: str = FEED_RECORD_PATH, level: int = FEED_RECORD_LEVEL,
+                 maxsize: int = FEED_RECORD_QUEUE):
+        self.path = path
+        self.level = level
+        self._queue: "queue.Queue" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+
+        self.recorded = 0
+        self.dropped = 0
+        self.bytes_raw = 0
+        self.bytes_written = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._thread is not None
+
+    # ------------------------------------------------------------
+    # Producer side (event loop)
+    # ------------------------------------------------------------
+    def record(self, path: str, data: bytes, ts: Optional[float] = None):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait((time.time() if ts is None else ts, path, data))
+        except queue.Full:
+            self.dropped += 1
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self):
+        if self._thread is not None or not self.path:
+            return
+        self._thread = threading.Thread(target=self._run, name="feed-recorder", daemon=True)
+        self._thread.start()
+        print(f"[FeedRecorder] ⏺ Recording upstream JSON to {self.path}")
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------
+    def _run(self):
+        f = None
+        current = None
+        running = True
+
+        while running:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in items:
+                if item is _STOP:
+                    running = False
+                    break
+
+                ts, path, data = item
+                filename = log_filename(self.path, ts)
+                try:
+                    if filename != current:
+                        if f is not None:
+                            f.close()
+                        f = _open_log(filename)
+                        current = filename
+                    self._write(f, ts, path, data)
+                except OSError as e:
+                    self.dropped += 1
+                    print(f"[FeedRecorder] ❌ Write error on {filename}: {e}")
+
+            if f is not None:
+                try:
+                    f.flush()
+                except OSError:
+                    pass
+
+        if f is not None:
+            f.close()
+
+    def _write(self, f, ts: float, path: str, data: bytes):
+        body = zlib.compress(data, self.level)
+        key = path.encode("utf-8")[:0xFFFF]
+        f.write(_RECORD.pack(len(body), ts, len(key), len(data)))
+        f.write(key)
+        f.write(body)
+        self.recorded += 1
+        self.bytes_raw += len(data)
+        self.bytes_written += _RECORD.size + len(key) + len(body)
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": int(self.enabled),
+            "queued": self._queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "bytes_raw": self.bytes_raw,
+            "bytes_written": self.bytes_written,
+        }
+
+
+# ------------------------------------------------------------
+# Reader (mmap, χωρίς φόρτωμα όλου του αρχείου)
+# ------------------------------------------------------------
+class FeedLog:
+    """
+    Σειριακή ανάγνωση ενός recording: μόνο τα headers διαβάζονται για
+    φίλτρα (path / χρόνος), το payload αποσυμπιέζεται μόνο όταν χρειαστεί.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[FeedRecord]:
+        return self.records()
+
+    def records(self, paths: Optional[Iterable[str]] = None,
+                start: Optional[float] = None, end: Optional[float] = None) -> Iterator[FeedRecord]:
+        """ paths: prefixes (π.χ. "/api/markets")· start / end: epoch seconds. """
+        prefixes = tuple(paths or ())
+        with open(self.filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= len(MAGIC):
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"{self.filename}: not a feed recording")
+
+                size = len(mm)
+                off = len(MAGIC)
+                while off + _RECORD.size <= size:
+                    clen, ts, plen, _ = _RECORD.unpack_from(mm, off)
+                    body_start = off + _RECORD.size + plen
+                    body_end = body_start + clen
+                    if body_end > size:
+                        self.truncated = True
+                        return
+
+                    if end is not None and ts > end:
+                        return
+                    path = mm[off + _RECORD.size:body_start].decode("utf-8", "replace")
+                    off = body_end
+
+                    if start is not None and ts < start:
+                        continue
+                    if prefixes and not path.startswith(prefixes):
+                        continue
+
+                    with memoryview(mm) as mv:
+                        data = zlib.decompress(mv[body_start:body_end])
+                    yield FeedRecord(ts, path, data)
+
+                if off != size:
+                    self.truncated = True
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def log_filename(template: str, ts: float) -> str:
+    if "{date}" not in template:
+        return template
+    day = dt.datetime.fromtimestamp(ts, dt.timezone.utc).strftime("%Y-%m-%d")
+    return template.replace("{date}", day)
+
+
+def _open_log(filename: str):
+    """
+    Append σε αρχείο που γράφει μόνο αυτό το process (flock). Αν το κρατάει
+    άλλος worker (π.χ. πολλοί standalone workers), γράφουμε σε <filename>.<pid>
+    αντί να μπλέκονται τα records ή να κόβει ο ένας το μισό record του άλλου.
+    """
+    folder = os.path.dirname(filename)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    f = _lock_log(filename) or _lock_log(f"{filename}.{os.getpid()}")
+    if f is None:
+        raise OSError(f"{filename} is locked by another recorder")
+    _repair_tail(f.name)
+    if os.fstat(f.fileno()).st_size == 0:
+        f.write(MAGIC)
+    return f
+
+
+def _lock_log(filename: str):
+    f = open(filename, "ab")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def _repair_tail(filename: str):
+    """ Κόβει μισό τελευταίο record (crash στη μέση), ώστε το append να μείνει αναγνώσιμο. """
+    try:
+        size = os.path.getsize(filename)
+    except OSError:
+        return
+    if size <= len(MAGIC):
+        return
+
+    with open(filename, "r+b") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise OSError(f"{filename} exists and is not a feed recording")
+            off = len(MAGIC)
+            while off + _RECORD.size <= size:
+                clen, _, plen, _ = _RECORD.unpack_from(mm, off)
+                nxt = off + _RECORD.size + plen + clen
+                if nxt > size:
+                    break
+                off = nxt
+        if off != size:
+            print(f"[FeedRecorder] ⚠ Truncating {size - off} bytes of partial record in {filename}")
+            f.truncate(off)
+
+
+# Singleton instance
+feed_recorder = FeedRecorder()
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_feed_recorder", feed_recorder.stats(),
+    counters=("recorded", "dropped", "bytes_raw", "bytes_written"),
+))
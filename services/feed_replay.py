@@ -0,0 +1,209 @@
+# ============================================================
+# AI MATCHLAB — FEED REPLAY
+# Recordings → analysis_pipeline σε 1x / Nx / max speed (backtest offline)
+# ============================================================
+
+import argparse
+import asyncio
+import datetime as dt
+import glob
+import inspect
+import json
+import time
+from typing import Dict, Any, List, Optional, Callable, Iterable, Iterator
+
+import numpy as np
+
+from .feed_recorder import FeedLog, FeedRecord
+from .analysis_pipeline import AnalysisPipeline, analysis_pipeline
+from .live_stream import extract_markets, extract_matches
+from .models import loads
+from .smartmoney_engine import ALERT_THRESHOLDS, ALERT_LEVELS
+
+
+# Handler: (record, decoded JSON) → None (ή awaitable)
+Handler = Callable[[FeedRecord, Any], Any]
+
+
+class FeedReplayer:
+    """
+    Διαβάζει ένα ή περισσότερα recordings με τη σειρά (mmap, record-προς-record)
+    και τα δίνει σε ένα handler:
+    - speed=1 πραγματικός χρόνος, speed=N N φορές γρηγορότερα,
+      speed=0 όσο γρήγορα γίνεται (χωρίς sleeps)
+    - paths / start / end φιλτράρουν πριν την αποσυμπίεση
+    """
+
+    def __init__(self, filenames: Iterable[str], speed: float = 0.0,
+                 paths: Optional[Iterable[str]] = None,
+                 start: Optional[float] = None, end: Optional[float] = None):
+        self.filenames = list(filenames)
+        self.speed = max(0.0, speed)
+        self.paths = tuple(paths or ())
+        self.start = start
+        self.end = end
+
+        self.records = 0
+        self.bytes = 0
+        self.errors = 0
+        self.lag_max = 0.0
+        self.truncated: List[str] = []
+
+    def iter_records(self) -> Iterator[FeedRecord]:
+        for filename in self.filenames:
+            log = FeedLog(filename)
+            yield from log.records(self.paths, self.start, self.end)
+            if log.truncated:
+                self.truncated.append(filename)
+
+    # ------------------------------------------------------------
+    async def run(self, handler: Handler) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        t0 = loop.time()
+        first_ts = None
+        last_ts = None
+
+        for rec in self.iter_records():
+            if first_ts is None:
+                first_ts = rec.ts
+            last_ts = rec.ts
+
+            if self.speed > 0:
+                delay = (rec.ts - first_ts) / self.speed - (loop.time() - t0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.lag_max = max(self.lag_max, -delay)
+            elif self.records % 256 == 0:
+                # Max speed: δίνουμε πού και πού τη σειρά στο loop
+                await asyncio.sleep(0)
+
+            self.records += 1
+            self.bytes += len(rec.data)
+            try:
+                result = handler(rec, loads(rec.data))
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.errors += 1
+                print(f"[FeedReplay] ⚠ {rec.path} @ {rec.ts:.3f}: {e}")
+
+        elapsed = loop.time() - t0
+        span = (last_ts - first_ts) if first_ts is not None else 0.0
+        return {
+            "records": self.records,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "recorded_span_s": round(span, 3),
+            "elapsed_s": round(elapsed, 3),
+            "speedup": round(span / elapsed, 2) if elapsed > 0 else None,
+            "max_lag_s": round(self.lag_max, 3),
+            "truncated": self.truncated,
+        }
+
+
+class PipelineSink:
+    """
+    Default handler: κάθε payload περνάει από το analysis_pipeline με τον
+    χρόνο του recording (movement windows όπως στην παραγωγή):
+    - market-change message ({"marketId", "runners"}) → ingest_change
+    - markets feed → analyze_many
+    - live feed → μόνο μέτρηση matches
+    on_result(record, results / change events) για custom backtests (π.χ. νέο scoring).
+    """
+
+    def __init__(self, pipeline: AnalysisPipeline = analysis_pipeline,
+                 on_result: Optional[Callable[[FeedRecord, List[Dict[str, Any]]], None]] = None):
+        self.pipeline = pipeline
+        self.on_result = on_result
+
+        self.markets = 0
+        self.changes = 0
+        self.matches = 0
+        self.alerts = [0] * len(ALERT_LEVELS)
+        self.analysis_s = 0.0
+
+    def __call__(self, rec: FeedRecord, data: Any):
+        t0 = time.perf_counter()
+        if isinstance(data, dict) and data.get("marketId") and "runners" in data:
+            self.changes += 1
+            events = self.pipeline.ingest_change(data, rec.ts)
+            payloads = [e["data"] for e in events if e.get("stage") == "smartmoney" and e["data"]]
+            if self.on_result is not None:
+                self.on_result(rec, events)
+        else:
+            markets = [m for m in extract_markets(data) if isinstance(m, dict) and "runners" in m]
+            if not markets:
+                self.matches += len(extract_matches(data))
+                return
+            results = self.pipeline.analyze_many(markets, rec.ts)
+            self.markets += len(results)
+            payloads = [p["smartmoney"] for p in results if p.get("smartmoney")]
+            if self.on_result is not None:
+                self.on_result(rec, results)
+        self.analysis_s += time.perf_counter() - t0
+
+        if payloads:
+            scores = np.fromiter((p["smart_score"] for p in payloads), dtype=np.int64)
+            levels = np.searchsorted(np.asarray(ALERT_THRESHOLDS), scores, side="right")
+            for level, count in enumerate(np.bincount(levels, minlength=len(ALERT_LEVELS))):
+                self.alerts[level] += int(count)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "markets": self.markets,
+            "changes": self.changes,
+            "matches": self.matches,
+            "alerts": dict(zip(ALERT_LEVELS, self.alerts)),
+            "analysis_s": round(self.analysis_s, 3),
+        }
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """ ISO 8601 (UTC αν δεν έχει zone) ή epoch seconds. """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    t = dt.datetime.fromisoformat(value)
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=dt.timezone.utc)
+    return t.timestamp()
+
+
+# ------------------------------------------------------------
+# CLI: python -m services.feed_replay recordings/feed-*.log --speed 0
+# ------------------------------------------------------------
+async def _main(args) -> Dict[str, Any]:
+    files = sorted({f for pattern in args.files for f in (glob.glob(pattern) or [pattern])})
+    replayer = FeedReplayer(
+        files, speed=args.speed, paths=args.path,
+        start=_parse_time(args.start), end=_parse_time(args.end),
+    )
+    sink = PipelineSink()
+    out = await replayer.run(sink)
+    out.update(sink.stats())
+    out["files"] = files
+    return out
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay recorded feeds through the analysis pipeline")
+    parser.add_argument("files", nargs="+", help="recording files ή glob patterns")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = πραγματικός χρόνος, 0 = max")
+    parser.add_argument("--path", action="append", help="μόνο paths με αυτό το prefix (επαναλαμβάνεται)")
+    parser.add_argument("--start", help="ISO 8601 ή epoch seconds")
+    parser.add_argument("--end", help="ISO 8601 ή epoch seconds")
+    args = parser.parse_args(argv)
+
+    out = asyncio.run(_main(args))
+    print(json.dumps(out, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
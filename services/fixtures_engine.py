@@ -3,15 +3,16 @@
 # Ανάκτηση & καθαρισμός HTML fixtures
 # ============================================================
 
-import re
 from typing import Optional
 from .provider_client import provider_client
+from .html_sanitizer import HtmlSanitizer, sanitize_html
 
 
 class FixturesEngine:
     """
-    Παίρνει HTML από εξωτερικές πηγές μέσω provider_client.get_html()
-    Καθαρίζει το HTML από περιττές script/css
+    Παίρνει HTML από εξωτερικές πηγές μέσω provider_client
+    Καθαρίζει το HTML από περιττές script/css (streaming, ένα πέρασμα)
+    Το καθαρό HTML μένει cached ανά URL (ETag / Last-Modified revalidation)
     Δίνει fallback αν δεν υπάρχει πρόσβαση
     """
 
@@ -21,12 +22,7 @@ class FixturesEngine:
         Παίρνει fixtures HTML μέσω HTTP.
         Επιστρέφει πάντα καθαρό HTML string ή fallback message.
         """
-        html = await provider_client.get_html(url)
-
-        if not html:
-            return self.fallback_html()
-
-        cleaned = self.clean_html(html)
+        cleaned = await provider_client.get_html_filtered(url, HtmlSanitizer)
         return cleaned or self.fallback_html()
 
     # ------------------------------------------------------------
@@ -37,16 +33,8 @@ class FixturesEngine:
         """
 
         try:
-            # Αφαίρεση CSS
-            html = re.sub(r"<style.*?>.*?</style>", "", html, flags=re.DOTALL)
-
-            # Αφαίρεση JS
-            html = re.sub(r"<script.*?>.*?</script>", "", html, flags=re.DOTALL)
-
-            # Αφαίρεση meta refresh / redirects
-            html = re.sub(r"<meta.*?>", "", html)
-
-            return html
+            # Αφαίρεση CSS / JS / meta refresh σε ένα πέρασμα
+            return sanitize_html(html)
 
         except Exception as e:
             print(f"[FixturesEngine] ❌ clean_html error: {e}")
@@ -5,6 +5,8 @@
 
 from typing import Dict, Any, List, Optional
 from .exchange_engine import exchange_engine
+from .ladder import market_ladder_aggregates
+from .market_batch import aggregate_runners
 
 
 class GoalMatrixEngine:
@@ -13,6 +15,7 @@ class GoalMatrixEngine:
     - Αναλύει movement από exchange_engine
     - Προσδιορίζει direction: positive / negative / neutral
     - Υπολογίζει μικρά indicators (pressure, stability)
+    - Liquidity indicators από το ladder (overround, imbalance, spread)
     """
 
     # ------------------------------------------------------------
@@ -27,7 +30,7 @@ class GoalMatrixEngine:
             return None
 
         runners = market.get("runners", [])
-        indicators = self.generate_indicators(runners)
+        indicators = self.generate_indicators(runners, raw_market.get("runners") or [])
 
         return {
             "market_id": market["market_id"],
@@ -38,22 +41,29 @@ class GoalMatrixEngine:
         }
 
     # ------------------------------------------------------------
-    def generate_indicators(self, runners: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def generate_indicators(self, runners: List[Dict[str, Any]],
+                            raw_runners: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Δημιουργεί συνοπτικούς δείκτες για το GoalMatrix panel.
         Απλό, γρήγορο, χωρίς περίπλοκο AI (για v1).
+        Με raw_runners και τα liquidity indicators από το ladder
+        (ίδια indicators με το AnalysisPipeline).
         """
 
-        back_pressure = 0
-        lay_pressure = 0
+        agg = aggregate_runners(runners)
+        if raw_runners is not None:
+            agg.update(market_ladder_aggregates(raw_runners))
+        return self.indicators_from_aggregates(agg)
 
-        for r in runners:
-            mv = r.get("movement", "none")
+    # ------------------------------------------------------------
+    def indicators_from_aggregates(self, agg: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Indicators από έτοιμα shared aggregates
+        (χρησιμοποιείται από το AnalysisPipeline).
+        """
 
-            if mv == "pressure_to_back":
-                back_pressure += 1
-            elif mv == "pressure_to_lay":
-                lay_pressure += 1
+        back_pressure = agg["back_pressure"]
+        lay_pressure = agg["lay_pressure"]
 
         indicator = "neutral"
 
@@ -66,7 +76,11 @@ class GoalMatrixEngine:
             "positive_pressure": back_pressure,
             "negative_pressure": lay_pressure,
             "direction": indicator,
-            "confidence": self.compute_confidence(back_pressure, lay_pressure)
+            "confidence": self.compute_confidence(back_pressure, lay_pressure),
+            # Liquidity (από το ladder· None όταν δεν υπάρχει βάθος)
+            "overround": agg.get("overround"),
+            "book_imbalance": agg.get("imbalance"),
+            "max_spread_ticks": agg.get("max_spread_ticks"),
         }
 
     # ------------------------------------------------------------
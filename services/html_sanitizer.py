@@ -0,0 +1,197 @@
+# ============================================================
+# AI MATCHLAB — HTML SANITIZER
+# Streaming αφαίρεση <script>, <style>, <meta> σε ένα πέρασμα
+# ============================================================
+
+import re
+from typing import Optional
+
+
+# Tags που αφαιρούνται μαζί με το περιεχόμενό τους
+_BLOCK_TAGS = ("script", "style")
+# Tags που αφαιρείται μόνο το ίδιο το tag
+_VOID_TAGS = ("meta",)
+
+_ALL_TAGS = _BLOCK_TAGS + _VOID_TAGS
+_COMMENT = "!--"
+_LOOKAHEAD = max(len(t) for t in _ALL_TAGS) + 2     # "<" + name + delimiter
+_DELIMS = " \t\r\n\f/>"
+# Χαρακτήρες μετά το "<" που ανοίγουν πραγματικό tag (όχι κείμενο "a < b")
+_TAG_START = re.compile(r"[a-z/!?]")
+_TAG_STOP = re.compile(r"[\"'>]")
+# Κείμενο και ολοκληρωμένα tags χωρίς quotes που περνούν αυτούσια (fast path)
+_PLAIN = re.compile(
+    r"(?:[^<]+"
+    r"|<(?!(?:" + "|".join(_ALL_TAGS) + r")[ \t\r\n\f/>]|!--)[a-z/!?][^\"'<>]*>"
+    r"|<(?=[^a-z/!?]))*",
+    re.IGNORECASE,
+)
+
+
+class HtmlSanitizer:
+    """
+    State machine που δέχεται το HTML σε chunks (π.χ. από httpx aiter_text)
+    και επιστρέφει το καθαρό HTML σταδιακά:
+    - <script ...>...</script> και <style ...>...</style> αφαιρούνται ολόκληρα
+    - <meta ...> αφαιρείται
+    - Comments και τα υπόλοιπα tags (με quoted attributes) περνούν αυτούσια,
+      οπότε ένα "<script" μέσα τους δεν ξεκινά αφαίρεση
+    - Κρατάει μόνο μικρό tail ανάμεσα στα chunks (ποτέ όλη τη σελίδα)
+    """
+
+    def __init__(self):
+        self._buf = ""
+        # None → κείμενο, "tag" → μέσα σε <meta ...>, "</script" κλπ → μέσα σε block
+        self._skip: Optional[str] = None
+        # Αυτούσιο πέρασμα: "tag" → μέσα σε άλλο tag, "-->" → μέσα σε comment
+        self._pass: Optional[str] = None
+        # Ανοιχτό quote attribute μέσα σε tag (skip ή pass)
+        self._quote: Optional[str] = None
+
+    # ------------------------------------------------------------
+    def feed(self, chunk: str) -> str:
+        buf = self._buf + chunk
+        low = buf.lower()
+        out = []
+        pos = 0
+        n = len(buf)
+
+        while pos < n:
+            if self._pass == "tag":
+                gt = self._tag_end(buf, pos)
+                if gt < 0:
+                    out.append(buf[pos:])
+                    pos = n
+                    break
+                out.append(buf[pos:gt + 1])
+                self._pass = None
+                pos = gt + 1
+
+            elif self._pass is not None:
+                end = buf.find(self._pass, pos)
+                if end < 0:
+                    # Κρατάμε μόνο όσο χρειάζεται για "-->" που κόβεται στο όριο
+                    keep = max(pos, n - len(self._pass) + 1)
+                    out.append(buf[pos:keep])
+                    pos = keep
+                    break
+                end += len(self._pass)
+                out.append(buf[pos:end])
+                self._pass = None
+                pos = end
+
+            elif self._skip is None:
+                plain = _PLAIN.match(buf, pos).end()
+                if plain > pos:
+                    out.append(buf[pos:plain])
+                    pos = plain
+                    continue
+
+                lt = buf.find("<", pos)
+                if lt < 0:
+                    out.append(buf[pos:])
+                    pos = n
+                    break
+
+                out.append(buf[pos:lt])
+
+                # Χρειαζόμαστε αρκετούς χαρακτήρες για να αποφασίσουμε
+                if n - lt < _LOOKAHEAD and not self._decided(low, lt):
+                    pos = lt
+                    break
+
+                tag = self._match_tag(low, lt)
+                if tag is None:
+                    if low.startswith(_COMMENT, lt + 1):
+                        self._pass = "-->"
+                        out.append("<" + _COMMENT)
+                        pos = lt + 1 + len(_COMMENT)
+                    elif _TAG_START.match(low, lt + 1):
+                        self._pass = "tag"
+                        out.append("<")
+                        pos = lt + 1
+                    else:
+                        out.append("<")
+                        pos = lt + 1
+                elif tag in _BLOCK_TAGS:
+                    self._skip = "</" + tag
+                    pos = lt + 1 + len(tag)
+                else:
+                    self._skip = "tag"
+                    pos = lt + 1 + len(tag)
+
+            elif self._skip == "tag":
+                gt = self._tag_end(buf, pos)
+                if gt < 0:
+                    pos = n
+                    break
+                self._skip = None
+                pos = gt + 1
+
+            else:
+                end = low.find(self._skip, pos)
+                if end < 0:
+                    # Κρατάμε μόνο όσο χρειάζεται για end tag που κόβεται στο όριο
+                    pos = max(pos, n - len(self._skip) + 1)
+                    break
+                # Μετά το "</script" προσπερνάμε μέχρι το ">" σαν απλό tag
+                self._skip = "tag"
+                pos = end + 2
+
+        self._buf = buf[pos:]
+        return "".join(out)
+
+    # ------------------------------------------------------------
+    def close(self) -> str:
+        """ Τέλος εγγράφου: ό,τι έμεινε σε κείμενο επιστρέφεται όπως είναι. """
+        rest = self._buf if self._skip is None else ""
+        self._buf = ""
+        self._skip = None
+        self._pass = None
+        self._quote = None
+        return rest
+
+    # ------------------------------------------------------------
+    def _tag_end(self, buf: str, pos: int) -> int:
+        """ Θέση του ">" που κλείνει το tag (εκτός quotes), -1 αν δεν ήρθε ακόμα. """
+        n = len(buf)
+        while pos < n:
+            if self._quote is not None:
+                q = buf.find(self._quote, pos)
+                if q < 0:
+                    return -1
+                self._quote = None
+                pos = q + 1
+                continue
+            m = _TAG_STOP.search(buf, pos)
+            if m is None:
+                return -1
+            if m.group() == ">":
+                return m.start()
+            self._quote = m.group()
+            pos = m.end()
+        return -1
+
+    # ------------------------------------------------------------
+    @staticmethod
+    def _match_tag(low: str, lt: int) -> Optional[str]:
+        for tag in _ALL_TAGS:
+            end = lt + 1 + len(tag)
+            if low.startswith(tag, lt + 1) and (end >= len(low) or low[end] in _DELIMS):
+                return tag
+        return None
+
+    @staticmethod
+    def _decided(low: str, lt: int) -> bool:
+        """ True αν το tail μετά το "<" δεν μπορεί πια να γίνει κάποιο από τα tags. """
+        tail = low[lt + 1:]
+        for tag in _ALL_TAGS + (_COMMENT,):
+            if tag.startswith(tail) or tail.startswith(tag):
+                return False
+        return True
+
+
+def sanitize_html(html: str) -> str:
+    """ Ολόκληρο document σε ένα βήμα (ίδιο αποτέλεσμα με το streaming). """
+    s = HtmlSanitizer()
+    return s.feed(html) + s.close()
@@ -0,0 +1,293 @@
+# ============================================================
+# AI MATCHLAB — INGEST SCHEDULER
+# Ένας asyncio scheduler για όλα τα upstream feeds (adaptive cadence)
+# ============================================================
+
+import asyncio
+import os
+import random
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from .metrics import metrics, MetricFamily
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις (βλ. README: SMARTMONEY_REFRESH_INTERVAL / EURO_GOALS_REFRESH)
+# ------------------------------------------------------------
+INGEST_INPLAY_INTERVAL = float(os.getenv(
+    "INGEST_INPLAY_INTERVAL", os.getenv("STREAM_POLL_INTERVAL", 5.0)
+))
+INGEST_PREMATCH_INTERVAL = float(os.getenv(
+    "INGEST_PREMATCH_INTERVAL", os.getenv("SMARTMONEY_REFRESH_INTERVAL", 60.0)
+))
+INGEST_IDLE_INTERVAL = float(os.getenv(
+    "INGEST_IDLE_INTERVAL", os.getenv("EURO_GOALS_REFRESH", 3600.0)
+))
+INGEST_JITTER = float(os.getenv("INGEST_JITTER", 0.1))
+INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", 4))
+
+# Match / feed states
+STATE_INPLAY = "inplay"
+STATE_PREMATCH = "prematch"
+STATE_FINISHED = "finished"
+STATE_IDLE = "idle"
+
+INTERVALS = {
+    STATE_INPLAY: INGEST_INPLAY_INTERVAL,
+    STATE_PREMATCH: INGEST_PREMATCH_INTERVAL,
+    STATE_FINISHED: INGEST_IDLE_INTERVAL,
+    STATE_IDLE: INGEST_IDLE_INTERVAL,
+}
+
+# Μέγιστος ύπνος του loop (νέα jobs / αλλαγές cadence πιάνονται αμέσως μέσω _wake)
+_MAX_SLEEP = 1.0
+
+JobFn = Callable[[], Awaitable[Optional[str]]]
+
+
+class IngestJob:
+    """ Ένα feed: async fn που επιστρέφει το state του (→ επόμενο interval). """
+
+    __slots__ = (
+        "name", "fn", "state", "next_run", "task", "remove_when_finished",
+        "runs", "skipped", "errors", "last_duration", "last_error",
+    )
+
+    def __init__(self, name: str, fn: JobFn, state: str, remove_when_finished: bool):
+        self.name = name
+        self.fn = fn
+        self.state = state
+        self.next_run = 0.0
+        self.task: Optional[asyncio.Task] = None
+        self.remove_when_finished = remove_when_finished
+
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_duration = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+
+class IngestScheduler:
+    """
+    Κεντρικό polling για όλα τα feeds (αντί για fetch ανά browser tab):
+    - Cadence ανά job από το state του: inplay γρήγορα, prematch αργά,
+      finished / idle σπάνια (ή αφαίρεση του job)
+    - Jitter στα intervals ώστε τα jobs να μη συγχρονίζονται
+    - Global concurrency cap (semaphore) για όλα τα upstream fetches
+    - Αν το προηγούμενο run ενός job τρέχει ακόμα, ο κύκλος παραλείπεται
+    """
+
+    def __init__(self, max_concurrency: int = INGEST_MAX_CONCURRENCY,
+                 jitter: float = INGEST_JITTER,
+                 intervals: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.jitter = max(0.0, min(jitter, 0.9))
+        self.intervals = dict(intervals or INTERVALS)
+
+        self._jobs: Dict[str, IngestJob] = {}
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------
+    def add_job(self, name: str, fn: JobFn, state: str = STATE_PREMATCH,
+                delay: float = 0.0, remove_when_finished: bool = False):
+        """ Νέο job (ή αντικατάσταση)· τρέχει μετά από `delay` δευτερόλεπτα. """
+        job = IngestJob(name, fn, state, remove_when_finished)
+        job.next_run = time.monotonic() + delay
+        self._jobs[name] = job
+        if self._wake is not None:
+            self._wake.set()
+
+    def remove_job(self, name: str):
+        self._jobs.pop(name, None)
+
+    def has_job(self, name: str) -> bool:
+        return name in self._jobs
+
+    def jobs(self, prefix: str = "") -> List[str]:
+        return [name for name in self._jobs if name.startswith(prefix)]
+
+    def set_state(self, name: str, state: str):
+        """ Αλλαγή cadence απ' έξω (π.χ. το live feed ξέρει ότι ένα match ξεκίνησε). """
+        job = self._jobs.get(name)
+        if job is None or job.state == state:
+            return
+        job.state = state
+        job.next_run = min(job.next_run, time.monotonic() + self.interval_for(state))
+        if self._wake is not None:
+            self._wake.set()
+
+    def interval_for(self, state: str) -> float:
+        base = self.intervals.get(state, self.intervals[STATE_PREMATCH])
+        return base * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self):
+        if self._task is not None:
+            return
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        running = [j.task for j in self._jobs.values() if j.running]
+        for task in running:
+            task.cancel()
+        await asyncio.gather(self._task, *running, return_exceptions=True)
+        self._task = None
+
+    # ------------------------------------------------------------
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+
+            for job in list(self._jobs.values()):
+                if job.next_run > now:
+                    continue
+                # Fixed-rate: το επόμενο run μετριέται από την αρχή αυτού
+                job.next_run = now + self.interval_for(job.state)
+                if job.running:
+                    job.skipped += 1
+                    continue
+                job.task = asyncio.create_task(self._execute(job, now))
+
+            upcoming = min((j.next_run for j in self._jobs.values()), default=now + _MAX_SLEEP)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wake.wait(), max(0.0, min(_MAX_SLEEP, upcoming - time.monotonic()))
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _execute(self, job: IngestJob, started: float):
+        async with self._sem:
+            t0 = time.perf_counter()
+            try:
+                state = await job.fn()
+                job.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.errors += 1
+                job.last_error = str(e)
+                state = None
+                print(f"[IngestScheduler] ❌ job '{job.name}' error: {e}")
+            job.last_duration = time.perf_counter() - t0
+            job.runs += 1
+
+        if state and state != job.state:
+            job.state = state
+            job.next_run = started + self.interval_for(state)
+
+        if job.state == STATE_FINISHED and job.remove_when_finished:
+            if self._jobs.get(job.name) is job:
+                del self._jobs[job.name]
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "running": self._task is not None,
+            "max_concurrency": self.max_concurrency,
+            "jobs": {
+                name: {
+                    "state": j.state,
+                    "running": j.running,
+                    "runs": j.runs,
+                    "skipped": j.skipped,
+                    "errors": j.errors,
+                    "last_duration_ms": round(j.last_duration * 1000, 3),
+                    "next_in_s": round(max(0.0, j.next_run - now), 3),
+                    "last_error": j.last_error,
+                }
+                for name, j in list(self._jobs.items())
+            },
+        }
+
+    def collect_metrics(self) -> List[MetricFamily]:
+        """ Ανά είδος job (ό,τι είναι πριν το ":"), ώστε τα per-match jobs να μην ανεβάζουν cardinality. """
+        totals: Dict[str, Dict[str, float]] = {}
+        states: Dict[str, int] = {}
+        for name, j in list(self._jobs.items()):
+            kind = name.split(":", 1)[0]
+            t = totals.setdefault(kind, {"runs": 0, "skipped": 0, "errors": 0})
+            t["runs"] += j.runs
+            t["skipped"] += j.skipped
+            t["errors"] += j.errors
+            states[j.state] = states.get(j.state, 0) + 1
+
+        out = []
+        for key in ("runs", "skipped", "errors"):
+            fam = MetricFamily(f"aimatchlab_ingest_{key}_total", "counter", f"Ingest job {key} by job kind")
+            for kind, t in totals.items():
+                fam.add({"job": kind}, t[key])
+            out.append(fam)
+
+        fam = MetricFamily("aimatchlab_ingest_jobs", "gauge", "Scheduled ingest jobs by state")
+        for state, count in states.items():
+            fam.add({"state": state}, count)
+        out.append(fam)
+        return out
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+_INPLAY = {"LIVE", "INPLAY", "IN_PLAY", "1H", "2H", "HT", "ET", "BT", "P", "PLAYING", "OPEN_INPLAY"}
+_FINISHED = {
+    "FT", "AET", "PEN", "FINISHED", "ENDED", "CLOSED", "CANCELLED", "CANCELED",
+    "POSTPONED", "ABANDONED", "AWARDED", "FULL_TIME", "MATCH FINISHED",
+}
+
+
+def match_state(item: Dict[str, Any]) -> str:
+    """ inplay / prematch / finished από τα συνήθη πεδία των feeds (Worker / Betfair / TheSportsDB). """
+    if item.get("inplay") or item.get("inPlay"):
+        return STATE_INPLAY
+
+    status = item.get("status") or item.get("strStatus") or item.get("state") or ""
+    status = str(status).strip().upper()
+    if status in _FINISHED:
+        return STATE_FINISHED
+    if status in _INPLAY:
+        return STATE_INPLAY
+
+    minute = item.get("minute")
+    if isinstance(minute, str):
+        minute = minute.strip().rstrip("'")
+        if minute.upper() in _INPLAY:
+            return STATE_INPLAY
+        minute = int(minute) if minute.isdigit() else None
+    if isinstance(minute, (int, float)) and minute > 0:
+        return STATE_INPLAY
+
+    return STATE_PREMATCH
+
+
+def feed_state(states: List[str]) -> str:
+    """ Το γρηγορότερο state ενός feed με πολλά matches (idle αν δεν έχει κανένα ενεργό). """
+    if STATE_INPLAY in states:
+        return STATE_INPLAY
+    if STATE_PREMATCH in states:
+        return STATE_PREMATCH
+    return STATE_IDLE
+
+
+# Singleton instance
+ingest_scheduler = IngestScheduler()
+metrics.add_collector(ingest_scheduler.collect_metrics)
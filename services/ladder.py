@@ -0,0 +1,345 @@
+# ============================================================
+# AI MATCHLAB — LADDER
+# Fixed-depth price/size ladders & liquidity metrics (NumPy)
+# ============================================================
+
+import math
+import os
+from array import array
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+# 0 → χωρίς ladder (μόνο best back / lay, όπως πριν)
+LADDER_DEPTH = max(0, int(os.getenv("EXCHANGE_LADDER_DEPTH", 10)))
+VWAP_STAKE = float(os.getenv("EXCHANGE_VWAP_STAKE", 100.0))
+IMBALANCE_THRESHOLD = float(os.getenv("EXCHANGE_IMBALANCE_THRESHOLD", 0.8))
+
+_PRICE_SIZE = itemgetter("price", "size")
+
+# Betfair price ladder: (από, έως, βήμα)
+TICK_BANDS = (
+    (1.01, 2.0, 0.01),
+    (2.0, 3.0, 0.02),
+    (3.0, 4.0, 0.05),
+    (4.0, 6.0, 0.1),
+    (6.0, 10.0, 0.2),
+    (10.0, 20.0, 0.5),
+    (20.0, 30.0, 1.0),
+    (30.0, 50.0, 2.0),
+    (50.0, 100.0, 5.0),
+    (100.0, 1000.0, 10.0),
+)
+
+_BAND_LO = np.array([b[0] for b in TICK_BANDS])
+_BAND_STEP = np.array([b[2] for b in TICK_BANDS])
+# Πρώτο tick κάθε band (σωρευτικά)
+_BAND_START = np.concatenate((
+    [0], np.cumsum([round((hi - lo) / step) for lo, hi, step in TICK_BANDS])[:-1]
+)).astype(np.float64)
+
+
+_BAND_LO_LIST = _BAND_LO.tolist()
+_BAND_START_LIST = _BAND_START.tolist()
+
+
+def price_to_ticks(prices: np.ndarray) -> np.ndarray:
+    """ Θέση κάθε τιμής στο Betfair ladder (1.01 → 0). NaN μένει NaN. """
+    p = np.clip(np.asarray(prices, dtype=np.float64), TICK_BANDS[0][0], TICK_BANDS[-1][1])
+    with np.errstate(invalid="ignore"):
+        band = np.clip(np.searchsorted(_BAND_LO, p, side="right") - 1, 0, len(TICK_BANDS) - 1)
+    ticks = _BAND_START[band] + np.round((p - _BAND_LO[band]) / _BAND_STEP[band])
+    return np.where(np.isnan(p), np.nan, ticks)
+
+
+class Ladder:
+    """
+    Ladder όλων των runners ενός batch σε fixed-depth arrays:
+    - back_price / back_size / lay_price / lay_size: (n_runners, depth) float32
+    - Επίπεδα που λείπουν είναι NaN
+    Μνήμη: 16 bytes × depth ανά runner (160 B στο depth 10), ανεξάρτητα
+    από το πόσα επίπεδα στέλνει ο provider.
+    """
+
+    __slots__ = ("back_price", "back_size", "lay_price", "lay_size")
+
+    def __init__(self, back_price: np.ndarray, back_size: np.ndarray,
+                 lay_price: np.ndarray, lay_size: np.ndarray):
+        self.back_price = back_price
+        self.back_size = back_size
+        self.lay_price = lay_price
+        self.lay_size = lay_size
+
+    @property
+    def depth(self) -> int:
+        return self.back_price.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.back_price, self.back_size, self.lay_price, self.lay_size))
+
+    def __len__(self) -> int:
+        return self.back_price.shape[0]
+
+    def row(self, i: int) -> Dict[str, List[List[float]]]:
+        """ Dict view ενός runner: {"back": [[price, size], ...], "lay": [...]} χωρίς τα κενά. """
+        return {
+            "back": _levels(self.back_price[i], self.back_size[i]),
+            "lay": _levels(self.lay_price[i], self.lay_size[i]),
+        }
+
+
+# ------------------------------------------------------------
+# Builders
+# ------------------------------------------------------------
+class LadderBuilder:
+    """
+    Μαζεύει τα επίπεδα runner-προς-runner σε δύο flat lists (price, size
+    εναλλάξ ανά πλευρά)· ένα np.array στο τέλος, όχι ένα ανά runner.
+    checked=True: κάθε τιμή περνάει από as_float, ώστε ένα μη αριθμητικό
+    level να σκάει στο add() (βλ. add_or_pad) και όχι στο build().
+    """
+
+    __slots__ = ("depth", "checked", "_pad", "back", "lay")
+
+    def __init__(self, depth: int = LADDER_DEPTH, checked: bool = False):
+        self.depth = depth
+        self.checked = checked
+        self._pad = [float("nan")] * (2 * depth)
+        self.back: List[float] = []
+        self.lay: List[float] = []
+
+    def add(self, back: Optional[List[Dict[str, Any]]], lay: Optional[List[Dict[str, Any]]]):
+        # Πρώτα και οι δύο πλευρές, μετά extend: ένα λάθος level δεν αφήνει μισό runner
+        b = self._side(back)
+        l = self._side(lay)
+        self.back.extend(b)
+        self.lay.extend(l)
+
+    def add_or_pad(self, back, lay):
+        """ add() με checked τιμές· χαλασμένο ladder → runner χωρίς ρευστότητα (NaN). """
+        try:
+            self.add(back, lay)
+        except (KeyError, TypeError, ValueError):
+            self.add(None, None)
+
+    def _side(self, levels) -> List[float]:
+        if not levels:
+            return self._pad
+        out = []
+        for lvl in levels[:self.depth]:
+            out.extend(_PRICE_SIZE(lvl))
+        if self.checked:
+            out = [as_float(v) for v in out]
+        out.extend(self._pad[len(out):])
+        return out
+
+    def build(self) -> Ladder:
+        shape = (len(self.back) // (2 * self.depth), self.depth, 2)
+        back = np.asarray(self.back, dtype=np.float32).reshape(shape)
+        lay = np.asarray(self.lay, dtype=np.float32).reshape(shape)
+        return Ladder(
+            np.ascontiguousarray(back[:, :, 0]), np.ascontiguousarray(back[:, :, 1]),
+            np.ascontiguousarray(lay[:, :, 0]), np.ascontiguousarray(lay[:, :, 1]),
+        )
+
+
+def ladder_from_runners(raw_runners: List[Dict[str, Any]], depth: int = LADDER_DEPTH) -> Ladder:
+    """ Ladder από raw Betfair runners (ex.availableToBack / availableToLay). """
+    builder = LadderBuilder(depth, checked=True)
+    for r in raw_runners:
+        ex = r.get("ex") or {}
+        # Μία γραμμή ανά runner (ευθυγράμμιση με τους raw runners)
+        builder.add_or_pad(ex.get("availableToBack"), ex.get("availableToLay"))
+    return builder.build()
+
+
+def as_float(value: Any) -> float:
+    """ None → NaN· ό,τι δεν είναι αριθμός (π.χ. "abc") → ValueError / TypeError. """
+    return float("nan") if value is None else float(value)
+
+
+# ------------------------------------------------------------
+# Derived metrics (ανά runner)
+# ------------------------------------------------------------
+def spread_ticks(ladder: Ladder) -> np.ndarray:
+    """ Ticks ανάμεσα σε best back και best lay (NaN αν λείπει πλευρά). """
+    return price_to_ticks(ladder.lay_price[:, 0]) - price_to_ticks(ladder.back_price[:, 0])
+
+
+def vwap_to_stake(prices: np.ndarray, sizes: np.ndarray, stake: float = VWAP_STAKE):
+    """
+    Μέση σταθμισμένη τιμή για να γεμίσει `stake` περνώντας τα επίπεδα
+    με τη σειρά. Επιστρέφει (vwap, filled_ratio)· με ανεπαρκή ρευστότητα
+    το vwap αφορά ό,τι γέμισε και filled_ratio < 1.
+    """
+    p = np.nan_to_num(prices.astype(np.float64), nan=0.0)
+    s = np.nan_to_num(sizes.astype(np.float64), nan=0.0)
+
+    before = np.cumsum(s, axis=1) - s
+    take = np.clip(stake - before, 0.0, s)
+    filled = take.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vwap = np.where(filled > 0, (p * take).sum(axis=1) / filled, np.nan)
+    return vwap, filled / stake if stake > 0 else np.zeros_like(filled)
+
+
+def book_imbalance(ladder: Ladder) -> np.ndarray:
+    """ (back liquidity − lay liquidity) / σύνολο, σε [-1, 1]· NaN χωρίς ρευστότητα. """
+    back = np.nansum(ladder.back_size, axis=1, dtype=np.float64)
+    lay = np.nansum(ladder.lay_size, axis=1, dtype=np.float64)
+    total = back + lay
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (back - lay) / total, np.nan)
+
+
+# ------------------------------------------------------------
+# Ανά market
+# ------------------------------------------------------------
+def overround(best_back: np.ndarray, market_index: np.ndarray, n_markets: int,
+              active: Optional[np.ndarray] = None) -> np.ndarray:
+    """ Σ 1/best_back ανά market (book %)· runners χωρίς τιμή δεν μετράνε. """
+    bp = np.asarray(best_back, dtype=np.float64)
+    mask = np.isfinite(bp) & (bp > 0)
+    if active is not None:
+        mask &= active
+    implied = np.zeros_like(bp)
+    implied[mask] = 1.0 / bp[mask]
+    return np.bincount(market_index, weights=implied, minlength=n_markets)
+
+
+def ladder_aggregates(ladder: Ladder, market_index: np.ndarray, n_markets: int,
+                      best_back: np.ndarray, active: Optional[np.ndarray] = None,
+                      threshold: float = IMBALANCE_THRESHOLD) -> Dict[str, np.ndarray]:
+    """
+    Aggregates ρευστότητας ανά market για GoalMatrix / SmartMoney:
+    - overround: book % από τα best back
+    - imbalance: back vs lay ρευστότητα σε όλο το ladder του market
+    - imbalanced: runners με |imbalance| >= threshold
+    - max_spread_ticks: το μεγαλύτερο spread (ticks) του market
+    """
+    back = np.bincount(market_index, weights=np.nansum(ladder.back_size, axis=1), minlength=n_markets)
+    lay = np.bincount(market_index, weights=np.nansum(ladder.lay_size, axis=1), minlength=n_markets)
+    total = back + lay
+    with np.errstate(invalid="ignore", divide="ignore"):
+        imbalance = np.where(total > 0, (back - lay) / total, 0.0)
+
+    runner_imb = book_imbalance(ladder)
+    with np.errstate(invalid="ignore"):
+        imbalanced = np.abs(runner_imb) >= threshold
+
+    ticks = np.nan_to_num(spread_ticks(ladder), nan=0.0)
+    max_ticks = np.zeros(n_markets)
+    np.maximum.at(max_ticks, market_index, ticks)
+
+    return {
+        "overround": overround(best_back, market_index, n_markets, active),
+        "imbalance": imbalance,
+        "imbalanced": np.bincount(market_index, weights=imbalanced, minlength=n_markets).astype(np.int64),
+        "max_spread_ticks": max_ticks.astype(np.int64),
+        "runner_imbalanced": imbalanced,
+    }
+
+
+def market_ladder_aggregates(raw_runners: List[Dict[str, Any]],
+                             depth: int = LADDER_DEPTH) -> Dict[str, Any]:
+    """ Τα ίδια aggregates (scalars) για ένα market από τους raw runners του. """
+    if depth <= 0:
+        return {}
+    ladder = ladder_from_runners(raw_runners, depth)
+    n = len(ladder)
+    active = np.array([r.get("status", "ACTIVE") == "ACTIVE" for r in raw_runners], dtype=bool)
+    agg = ladder_aggregates(
+        ladder, np.zeros(n, dtype=np.int64), 1, ladder.back_price[:, 0], active
+    )
+    return scalar_ladder_aggregates(agg, 0)
+
+
+# ------------------------------------------------------------
+# Ανά runner (incremental ingestion)
+# ------------------------------------------------------------
+def runner_liquidity(raw_runner: Dict[str, Any],
+                     depth: int = LADDER_DEPTH) -> Tuple[float, float, float, float]:
+    """
+    Συνεισφορά ενός raw runner στα market_ladder_aggregates, σε pure Python
+    (τα λίγα levels ενός runner δεν αξίζουν NumPy overhead):
+    (implied probability, back ρευστότητα, lay ρευστότητα, spread ticks).
+    """
+    ex = raw_runner.get("ex") or {}
+    builder = LadderBuilder(depth, checked=True)
+    builder.add_or_pad(ex.get("availableToBack"), ex.get("availableToLay"))
+    # Ίδια ακρίβεια με το Ladder (float32)
+    back = array("f", builder.back).tolist()
+    lay = array("f", builder.lay).tolist()
+
+    best_back = back[0]
+    implied = 0.0
+    if raw_runner.get("status", "ACTIVE") == "ACTIVE" and math.isfinite(best_back) and best_back > 0:
+        implied = 1.0 / best_back
+
+    ticks = _price_ticks(lay[0]) - _price_ticks(best_back)
+    return (
+        implied,
+        sum(v for v in back[1::2] if v == v),
+        sum(v for v in lay[1::2] if v == v),
+        0.0 if ticks != ticks else ticks,
+    )
+
+
+def liquidity_aggregates(contributions: Iterable[Tuple[float, float, float, float]],
+                         depth: int = LADDER_DEPTH,
+                         threshold: float = IMBALANCE_THRESHOLD) -> Dict[str, Any]:
+    """ Ίδια scalars με το market_ladder_aggregates, από runner_liquidity contributions. """
+    if depth <= 0:
+        return {}
+    book = back = lay = max_ticks = 0.0
+    imbalanced = 0
+    for implied, b, l, ticks in contributions:
+        book += implied
+        back += b
+        lay += l
+        if b + l > 0 and abs(b - l) / (b + l) >= threshold:
+            imbalanced += 1
+        if ticks > max_ticks:
+            max_ticks = ticks
+    total = back + lay
+    return {
+        "overround": round(book, 4),
+        "imbalance": round((back - lay) / total if total > 0 else 0.0, 4),
+        "imbalanced": imbalanced,
+        "max_spread_ticks": int(max_ticks),
+    }
+
+
+def _price_ticks(price: float) -> float:
+    """ Scalar price_to_ticks (NaN μένει NaN). """
+    if price != price:
+        return price
+    p = min(max(price, TICK_BANDS[0][0]), TICK_BANDS[-1][1])
+    band = min(max(bisect_right(_BAND_LO_LIST, p) - 1, 0), len(TICK_BANDS) - 1)
+    lo, _, step = TICK_BANDS[band]
+    return _BAND_START_LIST[band] + round((p - lo) / step)
+
+
+def scalar_ladder_aggregates(agg: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+    """ Aggregates του market i ως Python scalars (για τα stages). """
+    return {
+        "overround": round(float(agg["overround"][i]), 4),
+        "imbalance": round(float(agg["imbalance"][i]), 4),
+        "imbalanced": int(agg["imbalanced"][i]),
+        "max_spread_ticks": int(agg["max_spread_ticks"][i]),
+    }
+
+
+def _levels(prices: np.ndarray, sizes: np.ndarray) -> List[List[float]]:
+    return [
+        [round(p, 2), round(s, 2)]
+        for p, s in zip(prices.tolist(), sizes.tolist()) if p == p
+    ]
@@ -0,0 +1,373 @@
+# ============================================================
+# AI MATCHLAB — LIVE INDEX
+# Secondary indexes (league / team / match, minute / event_time) στη μνήμη
+# ============================================================
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+import datetime as dt
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Set, Hashable
+
+from .metrics import metrics, stats_families
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+DB_PATH = os.getenv("MATCHES_DB_PATH", "db/matches.db")
+ALERT_INDEX_HOURS = float(os.getenv("ALERT_INDEX_HOURS", 6))
+ALERT_INDEX_MAX = int(os.getenv("ALERT_INDEX_MAX", 200000))
+# Κάθε πόσο (το πολύ) ένα query διαβάζει τα νέα rows του smartmoney_alerts
+ALERT_INDEX_REFRESH = float(os.getenv("ALERT_INDEX_REFRESH", 1.0))
+ALERT_INDEX_PAGE = 5000
+
+ALERT_COLUMNS = ("id", "match_id", "league", "team", "event_time", "minute", "delta_odds", "intensity")
+
+Range = Tuple[Any, Any]
+
+
+class SecondaryIndex:
+    """
+    Indexes πάνω σε ένα σύνολο από items (key → fields):
+    - hashed: field → value → set(keys), multi-valued fields (π.χ. teams) με tuple
+    - ranged: field → ταξινομημένη λίστα (value, key) για range queries
+    Το query ξεκινά από τον μικρότερο υποψήφιο (hash set ή range slice)
+    και ελέγχει μόνο αυτόν, οπότε κοστίζει ανάλογα με το αποτέλεσμα.
+    """
+
+    def __init__(self, hashed: Iterable[str] = (), ranged: Iterable[str] = ()):
+        self.hashed = tuple(hashed)
+        self.ranged = tuple(ranged)
+        self._fields: Dict[Hashable, Dict[str, Any]] = {}
+        self._hash: Dict[str, Dict[Any, Set[Hashable]]] = {f: {} for f in self.hashed}
+        self._sorted: Dict[str, List[Tuple[Any, Hashable]]] = {f: [] for f in self.ranged}
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields
+
+    # ------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------
+    def add(self, key: Hashable, fields: Dict[str, Any]):
+        old = self._fields.get(key)
+        if old is not None:
+            if old == fields:
+                return
+            self.remove(key)
+
+        self._fields[key] = fields
+        for f in self.hashed:
+            for v in _values(fields.get(f)):
+                self._hash[f].setdefault(v, set()).add(key)
+        for f in self.ranged:
+            v = fields.get(f)
+            if v is not None:
+                insort(self._sorted[f], (v, key))
+
+    def remove(self, key: Hashable):
+        fields = self._fields.pop(key, None)
+        if fields is None:
+            return
+        for f in self.hashed:
+            index = self._hash[f]
+            for v in _values(fields.get(f)):
+                keys = index.get(v)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[v]
+        for f in self.ranged:
+            v = fields.get(f)
+            if v is None:
+                continue
+            entries = self._sorted[f]
+            i = bisect_left(entries, (v, key))
+            if i < len(entries) and entries[i] == (v, key):
+                del entries[i]
+
+    def clear(self):
+        self._fields.clear()
+        for index in self._hash.values():
+            index.clear()
+        for entries in self._sorted.values():
+            entries.clear()
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        return self._fields.get(key)
+
+    def values(self, field: str) -> List[Any]:
+        """ Οι διακριτές τιμές ενός hashed field (π.χ. όλα τα leagues). """
+        return list(self._hash[field])
+
+    def query(self, eq: Optional[Dict[str, Iterable[Any]]] = None,
+              ranges: Optional[Dict[str, Range]] = None) -> List[Hashable]:
+        """
+        eq: field → αποδεκτές τιμές (OR), ranges: field → (lo, hi) inclusive,
+        None = ανοιχτό άκρο. Διαφορετικά fields συνδυάζονται με AND.
+        """
+        eq = {f: _values(v) for f, v in (eq or {}).items() if v}
+        ranges = {f: r for f, r in (ranges or {}).items() if r and r != (None, None)}
+        if not eq and not ranges:
+            return list(self._fields)
+
+        # Υποψήφιοι: hash sets ανά field (union των τιμών) ή range slices
+        candidates = []
+        for f, wanted in eq.items():
+            index = self._hash[f]
+            sets = [index[v] for v in wanted if v in index]
+            size = sum(len(s) for s in sets)
+            candidates.append((size, "eq", f, sets))
+        for f, (lo, hi) in ranges.items():
+            entries = self._sorted[f]
+            i = 0 if lo is None else bisect_left(entries, (lo,))
+            j = len(entries) if hi is None else _upper(entries, hi)
+            candidates.append((max(0, j - i), "range", f, (i, j)))
+
+        size, kind, field, source = min(candidates, key=lambda c: c[0])
+        if size == 0:
+            return []
+        if kind == "eq":
+            keys = source[0] if len(source) == 1 else set().union(*source)
+        else:
+            keys = [k for _, k in self._sorted[field][source[0]:source[1]]]
+
+        checks = [c for c in candidates if c[2] != field or c[1] != kind]
+        if not checks:
+            return list(keys)
+
+        out = []
+        for key in keys:
+            fields = self._fields[key]
+            if all(_match(key, fields, c, ranges) for c in checks):
+                out.append(key)
+        return out
+
+    # ------------------------------------------------------------
+    def memory_bytes(self) -> int:
+        """ Εκτίμηση (shallow sizes των δομών, χωρίς τα ίδια τα values). """
+        size = sys.getsizeof(self._fields) + len(self._fields) * _sample_size(self._fields)
+        for index in self._hash.values():
+            size += sys.getsizeof(index) + sum(sys.getsizeof(s) for s in index.values())
+        for entries in self._sorted.values():
+            size += sys.getsizeof(entries) + len(entries) * 56
+        return size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "items": len(self._fields),
+            **{f"distinct_{f}": len(self._hash[f]) for f in self.hashed},
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+# ------------------------------------------------------------
+# Alerts (tail του smartmoney_alerts)
+# ------------------------------------------------------------
+class AlertIndex:
+    """
+    Τα πρόσφατα SmartMoney alerts στη μνήμη (ALERT_INDEX_HOURS / ALERT_INDEX_MAX):
+    - Φορτώνονται και μετά διαβάζονται incrementally με id > last_id
+      (ίδιο σε κάθε process, writer ή reader του shared state)
+    - Hash indexes σε league / team / match_id, sorted σε minute / event_time
+    """
+
+    def __init__(self, db_path: str = DB_PATH, hours: float = ALERT_INDEX_HOURS,
+                 max_alerts: int = ALERT_INDEX_MAX, refresh: float = ALERT_INDEX_REFRESH):
+        self.db_path = db_path
+        self.hours = hours
+        self.max_alerts = max_alerts
+        self.refresh = refresh
+
+        self.index = SecondaryIndex(("league", "team", "match_id"), ("minute", "event_time"))
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._order: "deque[int]" = deque()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.last_id = 0
+        self._warm = False
+        self._synced_at = 0.0
+
+        self.loaded = 0
+        self.evicted = 0
+        self.syncs = 0
+        self.last_sync_ms = 0.0
+
+    # ------------------------------------------------------------
+    def stale(self) -> bool:
+        return time.monotonic() - self._synced_at >= self.refresh
+
+    def sync(self) -> int:
+        """ Νέα rows από τη βάση (blocking· καλείται με asyncio.to_thread). """
+        with self._lock:
+            t0 = time.perf_counter()
+            try:
+                added = self._sync()
+            except sqlite3.Error as e:
+                print(f"[AlertIndex] ⚠ Sync error: {e}")
+                added = 0
+            self._evict()
+            self._synced_at = time.monotonic()
+            self.syncs += 1
+            self.last_sync_ms = (time.perf_counter() - t0) * 1000
+            return added
+
+    def _sync(self) -> int:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA busy_timeout=5000")
+
+        cols = ", ".join(ALERT_COLUMNS)
+        added = 0
+        if not self._warm:
+            # Πρώτο load: μόνο το παράθυρο retention, νεότερα πρώτα
+            rows = self._conn.execute(
+                f"SELECT {cols} FROM smartmoney_alerts WHERE event_time >= ? "
+                f"ORDER BY id DESC LIMIT ?",
+                (self._cutoff(), self.max_alerts),
+            ).fetchall()
+            for row in reversed(rows):
+                self._add(row)
+            added = len(rows)
+            self.last_id = max(self.last_id, self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM smartmoney_alerts"
+            ).fetchone()[0])
+            self._warm = True
+
+        while True:
+            rows = self._conn.execute(
+                f"SELECT {cols} FROM smartmoney_alerts WHERE id > ? ORDER BY id LIMIT ?",
+                (self.last_id, ALERT_INDEX_PAGE),
+            ).fetchall()
+            for row in rows:
+                self._add(row)
+            added += len(rows)
+            if len(rows) < ALERT_INDEX_PAGE:
+                break
+
+        self.loaded += added
+        return added
+
+    def _add(self, row: tuple):
+        alert = dict(zip(ALERT_COLUMNS, row))
+        alert_id = alert["id"]
+        self.last_id = max(self.last_id, alert_id)
+        if alert_id in self._rows:
+            return
+        self._rows[alert_id] = alert
+        self._order.append(alert_id)
+        self.index.add(alert_id, {
+            "league": alert["league"],
+            "team": norm_team(alert["team"]),
+            "match_id": None if alert["match_id"] is None else str(alert["match_id"]),
+            "minute": alert["minute"],
+            "event_time": alert["event_time"],
+        })
+
+    def _evict(self):
+        cutoff = self._cutoff()
+        while self._order:
+            oldest = self._rows[self._order[0]]
+            if len(self._order) <= self.max_alerts and (oldest["event_time"] or "") >= cutoff:
+                break
+            self._order.popleft()
+            del self._rows[oldest["id"]]
+            self.index.remove(oldest["id"])
+            self.evicted += 1
+
+    def _cutoff(self) -> str:
+        return (dt.datetime.utcnow() - dt.timedelta(hours=self.hours)).isoformat(sep=" ")
+
+    # ------------------------------------------------------------
+    def query(self, leagues: Iterable[str] = (), teams: Iterable[str] = (),
+              matches: Iterable[str] = (), minute: Range = (None, None),
+              event_time: Range = (None, None), limit: int = 500) -> List[Dict[str, Any]]:
+        """ Νεότερα πρώτα. event_time: ISO strings ("T" ή κενό, όπως στη βάση). """
+        event_time = tuple(_db_time(v) for v in event_time)
+        with self._lock:
+            ids = self.index.query(
+                {"league": leagues, "team": [norm_team(t) for t in teams], "match_id": matches},
+                {"minute": minute, "event_time": event_time},
+            )
+            ids = sorted(ids, reverse=True)[:limit] if limit else sorted(ids, reverse=True)
+            return [self._rows[i] for i in ids]
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index.stats()
+        index["memory_bytes"] += sys.getsizeof(self._rows) + len(self._rows) * _sample_size(self._rows)
+        return {
+            **index,
+            "last_id": self.last_id,
+            "loaded": self.loaded,
+            "evicted": self.evicted,
+            "syncs": self.syncs,
+            "last_sync_ms": round(self.last_sync_ms, 3),
+        }
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _db_time(value: Optional[str]) -> Optional[str]:
+    """ "2025-11-04T14:19" → "2025-11-04 14:19" (τα rows συγκρίνονται λεξικογραφικά). """
+    return value.replace("T", " ", 1) if isinstance(value, str) else value
+
+
+def _values(v: Any) -> tuple:
+    if v is None:
+        return ()
+    if isinstance(v, (tuple, list, set, frozenset)):
+        return tuple(x for x in v if x is not None)
+    return (v,)
+
+
+def _upper(entries: List[Tuple[Any, Hashable]], hi: Any) -> int:
+    """ Πρώτη θέση με value > hi (τα keys μπορεί να μη συγκρίνονται μεταξύ τους). """
+    lo, end = 0, len(entries)
+    while lo < end:
+        mid = (lo + end) // 2
+        if entries[mid][0] <= hi:
+            lo = mid + 1
+        else:
+            end = mid
+    return lo
+
+
+def _match(key: Hashable, fields: Dict[str, Any], check: tuple, ranges: Dict[str, Range]) -> bool:
+    _, kind, f, source = check
+    if kind == "eq":
+        return any(key in s for s in source)
+    v = fields.get(f)
+    if v is None:
+        return False
+    lo, hi = ranges[f]
+    return (lo is None or v >= lo) and (hi is None or v <= hi)
+
+
+def _sample_size(items: Dict[Any, Dict[str, Any]]) -> int:
+    """ Μέγεθος ενός dict-item (όλα έχουν τα ίδια keys)· 0 όταν είναι άδειο. """
+    for v in items.values():
+        return sys.getsizeof(v)
+    return 0
+
+
+def norm_team(team: Any) -> Any:
+    return team.strip().casefold() if isinstance(team, str) else team
+
+
+# Singleton instance
+alert_index = AlertIndex()
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_alert_index", alert_index.stats(),
+    counters=("loaded", "evicted", "syncs"),
+))
@@ -0,0 +1,615 @@
+# ============================================================
+# AI MATCHLAB — LIVE STREAM
+# Ένα backend ingestion → diffs προς όλους τους SSE / WebSocket clients
+# ============================================================
+
+import asyncio
+import json
+import os
+import re
+from typing import Dict, Any, List, Optional, Iterable, Set, Collection
+
+from .provider_client import provider_client, WORKER_URL
+from .analysis_pipeline import analysis_pipeline
+from .smartmoney_engine import smartmoney_engine
+from .alert_sink import alert_sink
+from .push_fanout import push_fanout
+from .live_index import SecondaryIndex, norm_team
+from .metrics import metrics, stats_families
+from .ingest_scheduler import (
+    IngestScheduler, ingest_scheduler, match_state, feed_state,
+    STATE_INPLAY, STATE_PREMATCH, STATE_FINISHED,
+)
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+STREAM_LIVE_PATH = os.getenv("STREAM_LIVE_PATH", "/api/live")
+STREAM_MARKETS_PATH = os.getenv("STREAM_MARKETS_PATH", "").strip()
+# Markets ανά match, π.χ. "/api/markets?event={match_id}" (κενό → απενεργοποιημένο)
+STREAM_MATCH_MARKETS_PATH = os.getenv("STREAM_MATCH_MARKETS_PATH", "").strip()
+STREAM_CLIENT_QUEUE = int(os.getenv("STREAM_CLIENT_QUEUE", 16))
+
+TOPICS = ("live", "goalmatrix", "smartmoney")
+
+_RESYNC = object()
+
+
+class Subscription:
+    """
+    Ένας συνδεδεμένος client:
+    - topics / leagues / matches: φίλτρα (κενό = όλα)
+    - bounded queue με diffs· αν ο client αργεί και η queue γεμίσει,
+      οι diffs πετιούνται και ο client παίρνει νέο snapshot
+    """
+
+    def __init__(self, topics: Iterable[str], leagues: Iterable[str],
+                 matches: Iterable[str], maxsize: int = STREAM_CLIENT_QUEUE):
+        self.topics: Set[str] = set(topics) or set(TOPICS)
+        self.leagues: Set[str] = set(leagues)
+        self.matches: Set[str] = set(matches)
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    # ------------------------------------------------------------
+    def accepts(self, topic: str, league: Optional[str], match_id: Optional[str]) -> bool:
+        if topic not in self.topics:
+            return False
+        if self.leagues and league not in self.leagues:
+            return False
+        if self.matches and match_id not in self.matches:
+            return False
+        return True
+
+    def offer(self, message: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Αργός client: τα diffs δεν έχουν πια αξία, μόνο το τελευταίο snapshot
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+
+
+class LiveHub:
+    """
+    Κρατάει την τελευταία κατάσταση ανά topic (live / goalmatrix / smartmoney)
+    και στέλνει μόνο τις αλλαγές σε κάθε subscriber.
+    Ανά topic ένα SecondaryIndex (league / match / team, minute) που
+    ενημερώνεται μαζί με το state, για τα filtered snapshots και queries.
+    stale: topics που ήρθαν από warm-start snapshot και δεν έχουν
+    ανανεωθεί ακόμα από upstream (φαίνονται στο snapshot των clients).
+    """
+
+    def __init__(self):
+        self._state: Dict[str, Dict[str, Any]] = {t: {} for t in TOPICS}
+        self._meta: Dict[str, Dict[str, tuple]] = {t: {} for t in TOPICS}
+        self._index: Dict[str, SecondaryIndex] = {
+            t: SecondaryIndex(("league", "match", "team"), ("minute",)) for t in TOPICS
+        }
+        self._subs: Set[Subscription] = set()
+        self.stale: Set[str] = set()
+        self.seq = 0
+        # hub seq της τελευταίας αλλαγής items ανά topic (per-topic snapshot encode / decode)
+        self.topic_seq: Dict[str, int] = {t: 0 for t in TOPICS}
+
+    # ------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------
+    def subscribe(self, topics: Iterable[str] = (), leagues: Iterable[str] = (),
+                  matches: Iterable[str] = ()) -> Subscription:
+        sub = Subscription(
+            [t for t in topics if t in TOPICS], leagues, matches
+        )
+        self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subs.discard(sub)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+    def subscribed_topics(self) -> Set[str]:
+        return set().union(*(sub.topics for sub in self._subs))
+
+    async def next_message(self, sub: Subscription) -> Dict[str, Any]:
+        """ Επόμενο message για τον client (diff ή snapshot μετά από drop). """
+        message = await sub.queue.get()
+        if message is _RESYNC:
+            return self.snapshot(sub)
+        return message
+
+    # ------------------------------------------------------------
+    # Publish
+    # ------------------------------------------------------------
+    def publish(self, topic: str, items: Dict[str, Any], replace: bool = False,
+                removed: Iterable[str] = (), stale: bool = False,
+                keep: Collection[str] = ()):
+        """
+        Ενημερώνει το topic και στέλνει diff (upserts / removed).
+        replace=True: τα items είναι όλη η κατάσταση του topic,
+        ό,τι λείπει θεωρείται removed (εκτός από τα keys του keep).
+        stale=True: τα items είναι από snapshot (warm start), όχι από upstream.
+        """
+        was_stale = topic in self.stale
+        if stale:
+            self.stale.add(topic)
+        else:
+            self.stale.discard(topic)
+
+        state = self._state[topic]
+        meta = self._meta[topic]
+
+        upserts = {k: v for k, v in items.items() if state.get(k) != v}
+        if replace:
+            removed = [k for k in state if k not in items and k not in keep]
+        else:
+            removed = [k for k in removed if k in state]
+
+        if not upserts and not removed:
+            if was_stale != stale:
+                # Ίδια items, άλλο stale flag: νέο seq ώστε ο shared-state writer να το δημοσιεύσει
+                self.seq += 1
+            return
+
+        index = self._index[topic]
+        removed_meta = {k: meta.pop(k, (None, None)) for k in removed}
+        for k in removed:
+            state.pop(k, None)
+            index.remove(k)
+        for k, v in upserts.items():
+            state[k] = v
+            meta[k] = item_meta(v, k)
+            index.add(k, item_fields(v, meta[k]))
+
+        self.seq += 1
+        self.topic_seq[topic] = self.seq
+
+        for sub in list(self._subs):
+            sub_upserts = {
+                k: v for k, v in upserts.items() if sub.accepts(topic, *meta[k])
+            }
+            sub_removed = [
+                k for k in removed if sub.accepts(topic, *removed_meta[k])
+            ]
+            if not sub_upserts and not sub_removed:
+                continue
+
+            sub.offer({
+                "type": "diff",
+                "seq": self.seq,
+                "topic": topic,
+                "upserts": sub_upserts,
+                "removed": sub_removed,
+            })
+
+    # ------------------------------------------------------------
+    def snapshot(self, sub: Optional[Subscription] = None) -> Dict[str, Any]:
+        topics = {}
+        for topic in TOPICS:
+            if sub is not None and topic not in sub.topics:
+                continue
+            state = self._state[topic]
+            if sub is None or not (sub.leagues or sub.matches):
+                topics[topic] = dict(state)
+                continue
+            # Ίδια κριτήρια με το Subscription.accepts, μέσω του index
+            keys = self._index[topic].query({"league": sub.leagues, "match": sub.matches})
+            topics[topic] = {k: state[k] for k in keys}
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "topics": topics,
+            "stale": sorted(self.stale.intersection(topics)),
+        }
+
+    def query(self, topic: str, leagues: Iterable[str] = (), teams: Iterable[str] = (),
+              matches: Iterable[str] = (), min_minute: Optional[int] = None,
+              max_minute: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Filtered items ενός topic. Για τα goalmatrix / smartmoney, team και
+        minute έρχονται από το match τους στο live topic (join μέσω match).
+        """
+        teams = [norm_team(t) for t in teams]
+        minute = (min_minute, max_minute)
+        eq = {"league": leagues, "match": matches}
+
+        if topic != "live" and (teams or minute != (None, None)):
+            live = self._index["live"]
+            match_ids = {
+                live.get(k)["match"]
+                for k in live.query({"team": teams, "match": matches}, {"minute": minute})
+            }
+            eq["match"] = [m for m in match_ids if m is not None]
+            if not eq["match"]:
+                return {}
+            keys = self._index[topic].query(eq)
+        else:
+            eq["team"] = teams
+            keys = self._index[topic].query(eq, {"minute": minute})
+
+        state = self._state[topic]
+        return {k: state[k] for k in keys}
+
+    def get(self, topic: str, key: str) -> Optional[Dict[str, Any]]:
+        return self._state[topic].get(key)
+
+    def items(self, topic: str) -> Dict[str, Any]:
+        """ Όλα τα items του topic (live view, όχι αντίγραφο). """
+        return self._state[topic]
+
+    def distinct(self, topic: str, field: str) -> List[Any]:
+        """ Π.χ. όλα τα leagues / teams του live topic. """
+        return self._index[topic].values(field)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subs),
+            "seq": self.seq,
+            "items": {t: len(s) for t, s in self._state.items()},
+            "dropped": sum(s.dropped for s in self._subs),
+            "stale_topics": len(self.stale),
+            "index_memory_bytes": {t: i.memory_bytes() for t, i in self._index.items()},
+        }
+
+
+class LivePoller:
+    """
+    Τα live / markets feeds για τον ingest_scheduler:
+    - Worker live feed → topic "live" (και cadence από τα match states)
+    - (προαιρετικά) raw markets feed → analysis_pipeline → goalmatrix / smartmoney
+    - (προαιρετικά) markets ανά match, ένα job ανά match με δικό του cadence
+    - Change events του incremental ingestion → αντίστοιχα topics
+    - Νέα SmartMoney alerts → alert_sink (smartmoney_alerts) και push_fanout
+    """
+
+    def __init__(self, hub: LiveHub, scheduler: IngestScheduler = ingest_scheduler):
+        self.hub = hub
+        self.scheduler = scheduler
+        self._started = False
+        self._scores: Dict[str, int] = {}
+        # market_id → (event_id, competition) από τα raw markets
+        self._events: Dict[str, tuple] = {}
+        # match_id → market keys που δημοσίευσε το job του match (replace=False)
+        self._match_markets: Dict[str, Set[str]] = {}
+        self._match_states: Dict[str, str] = {}
+        self._live_state = STATE_PREMATCH
+
+    @property
+    def enabled(self) -> bool:
+        """ Χωρίς WORKER_URL κανένα process δεν κάνει poll (ούτε ο shared-state writer). """
+        return bool(WORKER_URL)
+
+    # ------------------------------------------------------------
+    def start(self):
+        if self._started:
+            return
+        if not self.enabled:
+            print("[LivePoller] ⚠ WORKER_URL missing, live stream poller disabled.")
+            return
+        self._started = True
+        analysis_pipeline.add_listener(self.on_pipeline_event)
+        self.scheduler.add_job("live", self.poll_live, STATE_INPLAY)
+        if STREAM_MARKETS_PATH:
+            self.scheduler.add_job("markets", self.poll_markets, STATE_INPLAY)
+
+    async def stop(self):
+        analysis_pipeline.remove_listener(self.on_pipeline_event)
+        if not self._started:
+            return
+        for name in ["live", "markets", *self.scheduler.jobs("match:")]:
+            self.scheduler.remove_job(name)
+        self._started = False
+
+    # ------------------------------------------------------------
+    # Jobs (επιστρέφουν το state → cadence του επόμενου run)
+    # ------------------------------------------------------------
+    async def poll_live(self) -> str:
+        live = await provider_client.get_json(STREAM_LIVE_PATH)
+        if live is None:
+            return self._live_state
+
+        items, states = {}, {}
+        for m in extract_matches(live):
+            match_id = item_meta(m)[1]
+            if match_id is not None:
+                items[match_id] = m
+                states[match_id] = match_state(m)
+        self.hub.publish("live", items, replace=True)
+
+        if STREAM_MATCH_MARKETS_PATH:
+            self.sync_match_jobs(states)
+
+        self._live_state = feed_state(list(states.values()))
+        self.scheduler.set_state("markets", self._live_state)
+        return self._live_state
+
+    async def poll_markets(self) -> str:
+        feed = await provider_client.get_json(STREAM_MARKETS_PATH)
+        markets = extract_markets(feed)
+        if markets:
+            self.remember_events(markets)
+            self.publish_analysis(await analysis_pipeline.analyze_many_async(markets))
+        # Το markets feed ακολουθεί το γρηγορότερο state των matches
+        return self._live_state
+
+    def sync_match_jobs(self, states: Dict[str, str]):
+        """ Ένα job ανά match· το state του live feed ορίζει το cadence του. """
+        self._match_states = states
+        for match_id, state in states.items():
+            name = f"match:{match_id}"
+            if self.scheduler.has_job(name):
+                self.scheduler.set_state(name, state)
+            elif state != STATE_FINISHED:
+                self.scheduler.add_job(
+                    name, self._match_job(match_id), state, remove_when_finished=True
+                )
+        for name in self.scheduler.jobs("match:"):
+            if name[6:] not in states:
+                self.scheduler.remove_job(name)
+                self.drop_match(name[6:])
+
+    def _match_job(self, match_id: str):
+        name = f"match:{match_id}"
+        path = STREAM_MATCH_MARKETS_PATH.format(match_id=match_id)
+
+        async def run() -> Optional[str]:
+            feed = await provider_client.get_json(path)
+            markets = extract_markets(feed)
+            keys = set()
+            if markets:
+                self.remember_events(markets)
+                keys = self.publish_analysis(
+                    await analysis_pipeline.analyze_many_async(markets), replace=False,
+                )
+
+            # Το state το ορίζει το live feed (set_state)· εδώ μόνο τα markets.
+            # Τελευταίο run (ή job που αφαιρέθηκε στο μεταξύ): τα markets του match φεύγουν
+            if (
+                (markets and all(m.get("status") == "CLOSED" for m in markets))
+                or self._match_states.get(match_id) == STATE_FINISHED
+                or not self.scheduler.has_job(name)
+            ):
+                self._match_markets[match_id] = keys
+                self.drop_match(match_id)
+                return STATE_FINISHED
+
+            if feed is not None:
+                # Markets που έφυγαν από το feed του match
+                self.drop_markets(self._match_markets.get(match_id, set()) - keys)
+                self._match_markets[match_id] = keys
+            return None
+
+        return run
+
+    def drop_match(self, match_id: str):
+        self.drop_markets(self._match_markets.pop(match_id, ()))
+
+    async def poll_once(self):
+        """ Ένας πλήρης κύκλος live + markets (χωρίς scheduler, π.χ. scripts). """
+        await self.poll_live()
+        if STREAM_MARKETS_PATH:
+            await self.poll_markets()
+
+    def remember_events(self, markets: List[Dict[str, Any]]):
+        for m in markets:
+            if not isinstance(m, dict):
+                continue
+            market_id = m.get("marketId") or m.get("market_id")
+            event_id = m.get("eventId") or m.get("event_id")
+            if market_id is not None and event_id is not None:
+                self._events[str(market_id)] = (
+                    str(event_id), m.get("competition") or m.get("league"),
+                )
+
+    def with_event(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """ event_id / competition στο payload (match filters, indexes, alert rows). """
+        event = self._events.get(str(payload["market_id"]))
+        if event is not None:
+            payload.setdefault("event_id", event[0])
+            payload.setdefault("competition", event[1])
+        return payload
+
+    def publish_analysis(self, results: List[Dict[str, Any]], replace: bool = True) -> Set[str]:
+        """
+        replace=False για μερικά feeds (ένα match) ώστε να μη σβήνονται τα υπόλοιπα·
+        με replace=True μένουν τα markets των match jobs. Επιστρέφει τα keys που δημοσιεύτηκαν.
+        """
+        gm, sm = {}, {}
+        for p in results:
+            key = str(p["market_id"])
+            base = compact_market(self.with_event(p))
+            if p.get("goalmatrix") is not None:
+                gm[key] = {**base, **p["goalmatrix"]}
+            if p.get("smartmoney") is not None:
+                sm[key] = {**base, **p["smartmoney"]}
+                self.persist_alerts(p, p["smartmoney"]["smart_score"])
+        keep = set().union(*self._match_markets.values()) if replace else ()
+        self.hub.publish("goalmatrix", gm, replace=replace, keep=keep)
+        self.hub.publish("smartmoney", sm, replace=replace, keep=keep)
+        published = gm.keys() | sm.keys()
+        if replace:
+            # Markets που απλώς έφυγαν από το feed (χωρίς "closed" event)
+            self.prune(published | keep)
+        return published
+
+    def prune(self, keep):
+        """ Κρατάει scores / events μόνο για τα markets του keep. """
+        for state in (self._scores, self._events):
+            for key in [k for k in state if k not in keep]:
+                del state[key]
+
+    def drop_markets(self, keys: Iterable[str]):
+        """ Αφαιρεί markets από τα topics μαζί με τα scores / events τους. """
+        keys = list(keys)
+        if not keys:
+            return
+        for key in keys:
+            self._scores.pop(key, None)
+            self._events.pop(key, None)
+        self.hub.publish("goalmatrix", {}, removed=keys)
+        self.hub.publish("smartmoney", {}, removed=keys)
+
+    def on_pipeline_event(self, event: Dict[str, Any]):
+        key = str(event["market_id"])
+
+        if event["type"] == "closed":
+            self.drop_markets([key])
+            return
+
+        if event["type"] == "stage" and event["stage"] in TOPICS and event["data"]:
+            payload = analysis_pipeline.live_payload(event["market_id"]) or {}
+            if payload:
+                self.with_event(payload)
+            self.hub.publish(
+                event["stage"],
+                {key: {**compact_market(payload), **event["data"]}},
+            )
+            if event["stage"] == "smartmoney" and payload:
+                self.persist_alerts(payload, event["data"]["smart_score"])
+
+    # ------------------------------------------------------------
+    # Warm start
+    # ------------------------------------------------------------
+    def export_state(self) -> Dict[str, Any]:
+        """ Scores / events για το warm-start snapshot (χωρίς διπλά alerts μετά από restart). """
+        return {
+            "scores": dict(self._scores),
+            "events": {k: list(v) for k, v in self._events.items()},
+        }
+
+    def restore_state(self, state: Dict[str, Any]):
+        # setdefault: ό,τι έχει ήδη έρθει από upstream είναι νεότερο
+        for key, score in (state.get("scores") or {}).items():
+            self._scores.setdefault(key, score)
+        for key, event in (state.get("events") or {}).items():
+            self._events.setdefault(key, tuple(event))
+
+    def match_minute(self, market: Dict[str, Any]) -> Optional[int]:
+        """ Λεπτό του match του market από το live topic (join με event_id). """
+        event_id = market.get("event_id")
+        item = self.hub.get("live", str(event_id)) if event_id is not None else None
+        return item_minute(item) if item else None
+
+    def persist_alerts(self, market: Dict[str, Any], score: int):
+        """ Γράφει alerts μόνο όταν αλλάζει το score του market (όχι σε κάθε poll). """
+        key = str(market["market_id"])
+        if self._scores.get(key) == score:
+            return
+        self._scores[key] = score
+
+        rows = smartmoney_engine.alert_rows(market, score, minute=self.match_minute(market))
+        if rows:
+            alert_sink.submit(rows)
+            push_fanout.notify(market, score, rows)
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def item_meta(item: Dict[str, Any], key: Optional[str] = None) -> tuple:
+    """ (league, match_id) ενός item για το topic filtering. """
+    league = item.get("league") or item.get("competition") or item.get("strLeague")
+    if isinstance(league, dict):
+        league = league.get("name")
+
+    match_id = (
+        item.get("match_id") or item.get("event_id") or item.get("id")
+        or item.get("idEvent") or item.get("market_id") or key
+    )
+    return league, None if match_id is None else str(match_id)
+
+
+def item_fields(item: Dict[str, Any], meta: tuple) -> Dict[str, Any]:
+    """ Τα indexed fields ενός item: league / match (όπως item_meta), teams, minute. """
+    teams = []
+    for keys in (("home", "homeTeam", "home_team", "strHomeTeam"),
+                 ("away", "awayTeam", "away_team", "strAwayTeam")):
+        for k in keys:
+            team = item.get(k)
+            if isinstance(team, dict):
+                team = team.get("name")
+            if team:
+                teams.append(norm_team(team))
+                break
+
+    return {
+        "league": meta[0],
+        "match": meta[1],
+        "team": tuple(teams),
+        "minute": item_minute(item),
+    }
+
+
+def item_minute(item: Dict[str, Any]) -> Optional[int]:
+    return parse_minute(item.get("minute", item.get("intProgress")))
+
+
+_MINUTE_RE = re.compile(r"\d+")
+_MINUTE_LABELS = {"HT": 45, "FT": 90, "AET": 120}
+
+
+def parse_minute(value: Any) -> Optional[int]:
+    """ 67 / "67'" / "90+3" → 67 / 67 / 90, "HT" → 45· ό,τι άλλο → None. """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper()
+    if text in _MINUTE_LABELS:
+        return _MINUTE_LABELS[text]
+    m = _MINUTE_RE.match(text)
+    return int(m.group()) if m else None
+
+
+def extract_matches(raw: Any) -> List[Dict[str, Any]]:
+    """ Ίδια λογική με το extractMatches του aimatchlab.js. """
+    if isinstance(raw, list):
+        return raw
+    if not isinstance(raw, dict):
+        return []
+    for key in ("normalizedPreview", "matches", "events"):
+        if isinstance(raw.get(key), list):
+            return raw[key]
+    data = raw.get("data")
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        return data["events"]
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def extract_markets(raw: Any) -> List[Dict[str, Any]]:
+    if isinstance(raw, list):
+        return raw
+    if isinstance(raw, dict) and isinstance(raw.get("markets"), list):
+        return raw["markets"]
+    return []
+
+
+def compact_market(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """ Market χωρίς runners (οι clients του stream θέλουν μόνο τα indicators). """
+    base = {
+        "market_id": payload.get("market_id"),
+        "market_name": payload.get("market_name"),
+        "total_matched": payload.get("total_matched"),
+    }
+    if payload.get("event_id") is not None:
+        base["event_id"] = payload["event_id"]
+        base["competition"] = payload.get("competition")
+    return base
+
+
+def encode_sse(message: Dict[str, Any]) -> str:
+    data = json.dumps(message, separators=(",", ":"), default=str)
+    return f"id: {message['seq']}\nevent: {message['type']}\ndata: {data}\n\n"
+
+
+# Singleton instances
+live_hub = LiveHub()
+live_poller = LivePoller(live_hub)
+metrics.add_collector(lambda: stats_families("aimatchlab_live_hub", live_hub.stats()))
@@ -0,0 +1,348 @@
+# ============================================================
+# AI MATCHLAB — MARKET BATCH
+# Columnar (NumPy) αναπαράσταση πολλών markets / runners
+# ============================================================
+
+from typing import Dict, Any, List, Optional, Iterator
+
+import numpy as np
+
+from .ladder import Ladder, LadderBuilder, LADDER_DEPTH, as_float
+from .models import Market, Runner, RunnerStatus, Movement
+
+
+# ------------------------------------------------------------
+# Σταθεροί κωδικοί (ίδιοι σε όλα τα batches, βλ. models)
+# ------------------------------------------------------------
+STATUS_CODES = {s.name: int(s) for s in RunnerStatus if s is not RunnerStatus.UNKNOWN}
+STATUS_UNKNOWN = int(RunnerStatus.UNKNOWN)
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+MOVEMENT_NONE = int(Movement.NONE)
+MOVEMENT_BACK = int(Movement.BACK)
+MOVEMENT_LAY = int(Movement.LAY)
+
+# code → enum member χωρίς το κόστος του Enum.__call__ ανά runner
+_STATUS_ENUM = {int(s): s for s in RunnerStatus}
+_MOVEMENT_ENUM = tuple(Movement)
+
+
+def detect_movement_columns(back_price: np.ndarray, lay_price: np.ndarray) -> np.ndarray:
+    """
+    Vectorized εκδοχή του ExchangeEngine.detect_movement:
+    back < lay → pressure_to_back, lay < back → pressure_to_lay.
+    NaN (λείπει τιμή) → none, αφού κάθε σύγκριση με NaN είναι False.
+    """
+    out = np.zeros(back_price.shape[0], dtype=np.int8)
+    out[back_price < lay_price] = MOVEMENT_BACK
+    out[lay_price < back_price] = MOVEMENT_LAY
+    return out
+
+
+class MarketBatch:
+    """
+    Όλοι οι runners όλων των markets σε NumPy columns.
+    - Ανά market: ids, names, total_matched, offsets στους runners
+    - Ανά runner: market_index, selection_id, best back/lay price & size,
+      status code, movement code, matched volume
+    - ladder: όλο το βάθος (fixed-depth arrays, βλ. Ladder) ή None
+    Τα Market / Runner του normalize_market φτιάχνονται μόνο όταν ζητηθούν (market(i)).
+    """
+
+    def __init__(self,
+                 market_ids: List[Any],
+                 market_names: List[Any],
+                 total_matched: np.ndarray,
+                 offsets: np.ndarray,
+                 source_index: np.ndarray,
+                 selection_id: np.ndarray,
+                 runner_names: List[Any],
+                 status: np.ndarray,
+                 back_price: np.ndarray,
+                 back_size: np.ndarray,
+                 lay_price: np.ndarray,
+                 lay_size: np.ndarray,
+                 matched: np.ndarray,
+                 ladder: Optional[Ladder] = None):
+        self.market_ids = market_ids
+        self.market_names = market_names
+        self.total_matched = total_matched
+        self.offsets = offsets
+        self.source_index = source_index
+
+        self.selection_id = selection_id
+        self.runner_names = runner_names
+        self.status = status
+        self.back_price = back_price
+        self.back_size = back_size
+        self.lay_price = lay_price
+        self.lay_size = lay_size
+        self.matched = matched
+        self.ladder = ladder
+
+        self.market_index = np.repeat(
+            np.arange(len(market_ids), dtype=np.int32), np.diff(offsets)
+        )
+        self.movement = detect_movement_columns(back_price, lay_price)
+
+        self._dicts: Dict[int, Market] = {}
+
+    # ------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.market_ids)
+
+    @property
+    def n_runners(self) -> int:
+        return int(self.offsets[-1])
+
+    # ------------------------------------------------------------
+    # Lazy views (ίδιο σχήμα με normalize_market)
+    # ------------------------------------------------------------
+    def market(self, i: int) -> Market:
+        cached = self._dicts.get(i)
+        if cached is not None:
+            return cached
+
+        market = Market(
+            self.market_ids[i], self.market_names[i],
+            self.total_matched[i].item(), self.runners(i),
+        )
+        self._dicts[i] = market
+        return market
+
+    def runners(self, i: int) -> List[Runner]:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+
+        sel = self.selection_id[start:end].tolist()
+        status = self.status[start:end].tolist()
+        bp = _nan_to_none(self.back_price[start:end])
+        bs = _nan_to_none(self.back_size[start:end])
+        lp = _nan_to_none(self.lay_price[start:end])
+        ls = _nan_to_none(self.lay_size[start:end])
+        tm = _nan_to_none(self.matched[start:end])
+        mv = self.movement[start:end].tolist()
+        names = self.runner_names[start:end]
+
+        return [
+            Runner(
+                sel[k] if sel[k] >= 0 else None, names[k],
+                _STATUS_ENUM.get(status[k], RunnerStatus.UNKNOWN),
+                bp[k], bs[k], lp[k], ls[k], tm[k], _MOVEMENT_ENUM[mv[k]],
+            )
+            for k in range(end - start)
+        ]
+
+    def to_dicts(self) -> Iterator[Market]:
+        for i in range(len(self.market_ids)):
+            yield self.market(i)
+
+    def slice(self, start: int, end: int) -> "MarketBatch":
+        """ Markets [start, end) ως νέο batch· οι columns είναι views, όχι αντίγραφα. """
+        r0, r1 = int(self.offsets[start]), int(self.offsets[end])
+        ladder = self.ladder
+        if ladder is not None:
+            ladder = Ladder(
+                ladder.back_price[r0:r1], ladder.back_size[r0:r1],
+                ladder.lay_price[r0:r1], ladder.lay_size[r0:r1],
+            )
+        return MarketBatch(
+            market_ids=self.market_ids[start:end],
+            market_names=self.market_names[start:end],
+            total_matched=self.total_matched[start:end],
+            offsets=self.offsets[start:end + 1] - r0,
+            source_index=self.source_index[start:end],
+            selection_id=self.selection_id[r0:r1],
+            runner_names=self.runner_names[r0:r1],
+            status=self.status[r0:r1],
+            back_price=self.back_price[r0:r1],
+            back_size=self.back_size[r0:r1],
+            lay_price=self.lay_price[r0:r1],
+            lay_size=self.lay_size[r0:r1],
+            matched=self.matched[r0:r1],
+            ladder=ladder,
+        )
+
+
+# ------------------------------------------------------------
+# Builder: ένα πέρασμα πάνω στα raw markets
+# ------------------------------------------------------------
+def build_market_batch(raw_markets: List[Dict[str, Any]],
+                       depth: int = LADDER_DEPTH) -> MarketBatch:
+    """
+    depth: επίπεδα ladder ανά runner (0 → χωρίς ladder, μόνο best prices).
+    Runners με μη αριθμητικές best τιμές (π.χ. "price": "abc" από client)
+    παραλείπονται, markets με μη αριθμητικό totalMatched επίσης· χαλασμένα
+    βαθύτερα levels δίνουν runner χωρίς ladder.
+    """
+    try:
+        return _build_market_batch(raw_markets, depth)
+    except (TypeError, ValueError):
+        # Σπάνιο: το np.asarray βρήκε μη αριθμητική τιμή → πέρασμα με έλεγχο ανά runner
+        return _build_market_batch(raw_markets, depth, checked=True)
+
+
+def _build_market_batch(raw_markets: List[Dict[str, Any]], depth: int,
+                        checked: bool = False) -> MarketBatch:
+    nan = float("nan")
+    ladder = LadderBuilder(depth, checked) if depth > 0 else None
+    status_codes = STATUS_CODES
+
+    market_ids: List[Any] = []
+    market_names: List[Any] = []
+    market_matched: List[float] = []
+    offsets: List[int] = [0]
+    source_index: List[int] = []
+
+    sel_ids: List[int] = []
+    names: List[Any] = []
+    status: List[int] = []
+    bp: List[float] = []
+    bs: List[float] = []
+    lp: List[float] = []
+    ls: List[float] = []
+    tv: List[float] = []
+
+    for mi, raw in enumerate(raw_markets):
+        if not raw or "runners" not in raw:
+            continue
+        total = raw.get("totalMatched", 0) or 0
+        if checked:
+            try:
+                total = as_float(total)
+            except (TypeError, ValueError):
+                print(f"[MarketBatch] ⚠ Skipping market {raw.get('marketId')}: invalid totalMatched")
+                continue
+
+        for r in raw.get("runners") or ():
+            try:
+                ex = r.get("ex") or {}
+                back = ex.get("availableToBack")
+                lay = ex.get("availableToLay")
+
+                if back:
+                    b_price, b_size = back[0]["price"], back[0]["size"]
+                else:
+                    b_price = b_size = nan
+                if lay:
+                    l_price, l_size = lay[0]["price"], lay[0]["size"]
+                else:
+                    l_price = l_size = nan
+
+                sid = r.get("selectionId")
+                code = status_codes.get(r.get("status", "ACTIVE"), STATUS_UNKNOWN)
+                matched = r.get("totalMatched")
+                if checked:
+                    b_price, b_size = as_float(b_price), as_float(b_size)
+                    l_price, l_size = as_float(l_price), as_float(l_size)
+                    matched = as_float(matched)
+                    if sid is not None:
+                        sid = int(sid)
+                if ladder is None:
+                    pass
+                elif checked:
+                    # Όπως το market_ladder_aggregates: χαλασμένο βάθος δεν κόβει τον runner
+                    ladder.add_or_pad(back, lay)
+                else:
+                    ladder.add(back, lay)
+            except Exception as e:
+                print(f"[MarketBatch] ⚠ Error on runner normalize: {e}")
+                continue
+
+            sel_ids.append(sid if sid is not None else -1)
+            names.append(r.get("runnerName"))
+            status.append(code)
+            bp.append(b_price)
+            bs.append(b_size)
+            lp.append(l_price)
+            ls.append(l_size)
+            tv.append(nan if matched is None else matched)
+
+        market_ids.append(raw.get("marketId", ""))
+        market_names.append(raw.get("marketName", ""))
+        market_matched.append(total)
+        offsets.append(len(sel_ids))
+        source_index.append(mi)
+
+    return MarketBatch(
+        market_ids=market_ids,
+        market_names=market_names,
+        total_matched=np.asarray(market_matched, dtype=np.float64),
+        offsets=np.asarray(offsets, dtype=np.int64),
+        source_index=np.asarray(source_index, dtype=np.int64),
+        selection_id=np.asarray(sel_ids, dtype=np.int64),
+        runner_names=names,
+        status=np.asarray(status, dtype=np.int8),
+        back_price=np.asarray(bp, dtype=np.float64),
+        back_size=np.asarray(bs, dtype=np.float64),
+        lay_price=np.asarray(lp, dtype=np.float64),
+        lay_size=np.asarray(ls, dtype=np.float64),
+        matched=np.asarray(tv, dtype=np.float64),
+        ladder=ladder.build() if ladder is not None else None,
+    )
+
+
+def _nan_to_none(col: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in col.tolist()]
+
+
+# ------------------------------------------------------------
+# Shared aggregates (pressure / volatility) για GoalMatrix & SmartMoney
+# ------------------------------------------------------------
+VOLATILITY_SPREAD = 0.5
+
+
+def aggregate_runners(runners: List[Runner]) -> Dict[str, int]:
+    """
+    Ένα πέρασμα πάνω στους normalized runners ενός market:
+    - back_pressure / lay_pressure: πλήθος runners ανά movement flag
+    - volatility: runners με |back - lay| >= VOLATILITY_SPREAD
+    Runner objects διαβάζονται από τα slots (int movement)· παλιά dicts
+    δουλεύουν ακόμα μέσω του _runner_fields.
+    """
+    back_pressure = 0
+    lay_pressure = 0
+    volatility = 0
+
+    for r in runners:
+        if type(r) is Runner:
+            mv, bo, lo = r.movement, r.back_odds, r.lay_odds
+        else:
+            mv, bo, lo = _runner_fields(r)
+
+        if mv == MOVEMENT_BACK:
+            back_pressure += 1
+        elif mv == MOVEMENT_LAY:
+            lay_pressure += 1
+
+        if bo and lo and abs(bo - lo) >= VOLATILITY_SPREAD:
+            volatility += 1
+
+    return {
+        "back_pressure": back_pressure,
+        "lay_pressure": lay_pressure,
+        "volatility": volatility,
+    }
+
+
+def _runner_fields(r: Dict[str, Any]):
+    return Movement.parse(r.get("movement", "none")), r.get("back_odds"), r.get("lay_odds")
+
+
+def aggregate_batch(batch: MarketBatch) -> Dict[str, np.ndarray]:
+    """
+    Ίδια aggregates με το aggregate_runners, για όλα τα markets
+    ενός MarketBatch μαζί (bincount ανά market_index).
+    """
+    n = len(batch)
+    idx = batch.market_index
+    mv = batch.movement
+
+    spread = np.abs(batch.back_price - batch.lay_price)
+    with np.errstate(invalid="ignore"):
+        volatile = (spread >= VOLATILITY_SPREAD) & (batch.back_price != 0) & (batch.lay_price != 0)
+
+    return {
+        "back_pressure": np.bincount(idx[mv == MOVEMENT_BACK], minlength=n),
+        "lay_pressure": np.bincount(idx[mv == MOVEMENT_LAY], minlength=n),
+        "volatility": np.bincount(idx[volatile], minlength=n),
+    }
@@ -0,0 +1,336 @@
+# ============================================================
+# AI MATCHLAB — METRICS
+# Histograms / counters / collectors σε Prometheus text format
+# ============================================================
+
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Iterable, Tuple
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", 0.5))
+
+# Σε seconds (ίδια όρια με το LATENCY_BUCKETS_MS του transport)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricFamily:
+    """ Ένα metric (name / type / help) με τα samples του για ένα scrape. """
+
+    __slots__ = ("name", "kind", "help", "samples")
+
+    def __init__(self, name: str, kind: str, help: str = ""):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        # (suffix, labels, value)
+        self.samples: List[Tuple[str, Dict[str, Any], float]] = []
+
+    def add(self, labels: Dict[str, Any], value: float, suffix: str = "") -> "MetricFamily":
+        self.samples.append((suffix, labels, value))
+        return self
+
+    def add_histogram(self, labels: Dict[str, Any], bounds: Iterable[float],
+                      counts: List[int], total: float) -> "MetricFamily":
+        """ counts: ανά bucket (όχι σωρευτικά), τελευταίο = +Inf. """
+        acc = 0
+        for le, c in zip([*bounds, "+Inf"], counts):
+            acc += c
+            self.add({**labels, "le": _fmt_le(le)}, acc, "_bucket")
+        self.add(labels, total, "_sum")
+        self.add(labels, acc, "_count")
+        return self
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _Family:
+    """ Metric με labels: .labels(route="/x") → Histogram / Counter. """
+
+    def __init__(self, name: str, kind: str, help: str,
+                 labelnames: Tuple[str, ...], factory: Callable[[], Any]):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = labelnames
+        self._factory = factory
+        self._children: Dict[Labels, Any] = {}
+
+    def labels(self, **labels: Any):
+        key = tuple((k, str(labels[k])) for k in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._factory()
+        return child
+
+    def collect(self) -> MetricFamily:
+        fam = MetricFamily(self.name, self.kind, self.help)
+        for key, child in list(self._children.items()):
+            labels = dict(key)
+            if self.kind == "histogram":
+                fam.add_histogram(labels, child.bounds, child.counts, child.sum)
+            else:
+                fam.add(labels, child.value)
+        return fam
+
+
+class MetricsRegistry:
+    """
+    Ελάχιστο Prometheus registry χωρίς εξωτερικό dependency:
+    - histogram() / counter() με labels για ό,τι μετράμε inline
+    - add_collector(): callbacks που παράγουν MetricFamily τη στιγμή
+      του scrape (cache stats, transport, queues) — μηδενικό κόστος στο hot path
+    """
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    # ------------------------------------------------------------
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> _Family:
+        return self._register(name, "histogram", help, labelnames, lambda: Histogram(buckets))
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> _Family:
+        return self._register(name, "counter", help, labelnames, Counter)
+
+    def _register(self, name, kind, help, labelnames, factory) -> _Family:
+        fam = self._families.get(name)
+        if fam is None:
+            fam = self._families[name] = _Family(name, kind, help, tuple(labelnames), factory)
+        return fam
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        self._collectors.append(collector)
+
+    # ------------------------------------------------------------
+    def collect(self) -> List[MetricFamily]:
+        out = [f.collect() for f in self._families.values()]
+        for collector in self._collectors:
+            try:
+                out.extend(collector())
+            except Exception as e:
+                print(f"[Metrics] ⚠ Collector error: {e}")
+        return out
+
+    def render(self) -> str:
+        lines = []
+        for fam in self.collect():
+            if fam.help:
+                lines.append(f"# HELP {fam.name} {_escape_help(fam.help)}")
+            lines.append(f"# TYPE {fam.name} {fam.kind}")
+            for suffix, labels, value in fam.samples:
+                lines.append(f"{fam.name}{suffix}{_fmt_labels(labels)} {_fmt_value(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+# ------------------------------------------------------------
+# Route latency (pure ASGI middleware)
+# ------------------------------------------------------------
+class MetricsMiddleware:
+    """
+    Μετράει κάθε HTTP request ανά route template (όχι raw path,
+    ώστε να μην εκρήγνυται η cardinality). Τα streaming routes
+    μετριούνται μέχρι το πρώτο byte (response start).
+    """
+
+    def __init__(self, app, registry: Optional["MetricsRegistry"] = None):
+        self.app = app
+        reg = registry or metrics
+        self.latency = reg.histogram(
+            "aimatchlab_http_request_duration_seconds",
+            "HTTP request latency (time to response start)",
+            ("method", "route", "code"),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                status["t"] = time.perf_counter() - t0
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.latency.labels(
+                method=scope.get("method", ""),
+                route=route_label(scope),
+                code=status["code"],
+            ).observe(status.get("t", time.perf_counter() - t0))
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    if scope.get("path", "").startswith("/static/"):
+        return "/static"
+    return "<unmatched>"
+
+
+# ------------------------------------------------------------
+# Event-loop lag
+# ------------------------------------------------------------
+class LoopLagMonitor:
+    """
+    Task που κοιμάται `interval` και μετράει πόσο αργότερα ξύπνησε.
+    Η διαφορά είναι ο χρόνος που το loop ήταν μπλοκαρισμένο.
+    """
+
+    def __init__(self, registry: Optional["MetricsRegistry"] = None,
+                 interval: float = LOOP_LAG_INTERVAL):
+        reg = registry or metrics
+        self.interval = interval
+        self.lag = reg.histogram(
+            "aimatchlab_event_loop_lag_seconds",
+            "Event loop scheduling delay", buckets=FAST_BUCKETS,
+        )
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+        reg.add_collector(self.collect)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        hist = self.lag.labels()
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - t0 - self.interval)
+            hist.observe(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def collect(self) -> List[MetricFamily]:
+        return [
+            MetricFamily("aimatchlab_event_loop_lag_last_seconds", "gauge",
+                         "Most recent event loop lag sample").add({}, self.last_lag),
+            MetricFamily("aimatchlab_event_loop_lag_max_seconds", "gauge",
+                         "Max event loop lag since start").add({}, self.max_lag),
+        ]
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def stats_families(prefix: str, stats: Dict[str, Any],
+                   counters: Iterable[str] = ()) -> List[MetricFamily]:
+    """
+    Ένα stats() dict ενός service → gauges (ή counters για τα `counters` keys).
+    Nested dicts αριθμών γίνονται ένα metric με label "key".
+    """
+    counters = set(counters)
+    out = []
+    for k, v in stats.items():
+        kind = "counter" if k in counters else "gauge"
+        name = f"{prefix}_{k}_total" if kind == "counter" else f"{prefix}_{k}"
+        if isinstance(v, dict):
+            fam = MetricFamily(name, kind)
+            for key, sub in v.items():
+                if isinstance(sub, (int, float)):
+                    fam.add({"key": key}, sub)
+            if fam.samples:
+                out.append(fam)
+        elif isinstance(v, (int, float)):
+            out.append(MetricFamily(name, kind).add({}, v))
+    return out
+
+
+def _fmt_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape_value(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _escape_value(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _fmt_le(le) -> str:
+    return le if isinstance(le, str) else repr(float(le))
+
+
+def _fmt_value(v: Any) -> str:
+    if v is None:
+        return "NaN"
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    if isinstance(v, float):
+        if v != v:
+            return "NaN"
+        if v in (float("inf"), float("-inf")):
+            return "+Inf" if v > 0 else "-Inf"
+        return repr(v)
+    return str(v)
+
+
+# Singleton registry
+metrics = MetricsRegistry()
@@ -0,0 +1,285 @@
+# ============================================================
+# AI MATCHLAB — MODELS
+# Compact (__slots__) Market / Runner / LadderLevel με dict views
+# ============================================================
+
+import json
+from collections.abc import Mapping
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# ------------------------------------------------------------
+# Enums (ίδιοι κωδικοί με τα columns του MarketBatch)
+# ------------------------------------------------------------
+class RunnerStatus(IntEnum):
+    UNKNOWN = -1
+    ACTIVE = 0
+    SUSPENDED = 1
+    WINNER = 2
+    LOSER = 3
+    REMOVED = 4
+    PLACED = 5
+    HIDDEN = 6
+
+    @classmethod
+    def parse(cls, value: Any) -> "RunnerStatus":
+        if value is None:
+            return cls.ACTIVE
+        return _STATUS_BY_NAME.get(value, cls.UNKNOWN)
+
+
+class Movement(IntEnum):
+    NONE = 0
+    BACK = 1
+    LAY = 2
+
+    @property
+    def label(self) -> str:
+        """ Το παλιό string flag ("none" / "pressure_to_back" / "pressure_to_lay"). """
+        return MOVEMENT_LABELS[self]
+
+    @classmethod
+    def parse(cls, value: Any) -> "Movement":
+        if isinstance(value, int):
+            return cls(value)
+        return _MOVEMENT_BY_LABEL.get(value, cls.NONE)
+
+
+_STATUS_BY_NAME = {s.name: s for s in RunnerStatus if s is not RunnerStatus.UNKNOWN}
+MOVEMENT_LABELS = ("none", "pressure_to_back", "pressure_to_lay")
+_MOVEMENT_BY_LABEL = {label: Movement(code) for code, label in enumerate(MOVEMENT_LABELS)}
+
+
+# ------------------------------------------------------------
+# Models
+# ------------------------------------------------------------
+class LadderLevel:
+    """ Ένα επίπεδο του ladder (price, size). """
+
+    __slots__ = ("price", "size")
+
+    def __init__(self, price: float, size: float):
+        self.price = price
+        self.size = size
+
+    def __iter__(self):
+        yield self.price
+        yield self.size
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, LadderLevel):
+            return self.price == other.price and self.size == other.size
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"LadderLevel({self.price!r}, {self.size!r})"
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"price": self.price, "size": self.size}
+
+    @classmethod
+    def from_raw(cls, levels: Optional[List[Dict[str, Any]]], depth: int) -> Tuple["LadderLevel", ...]:
+        if not levels or depth <= 0:
+            return ()
+        return tuple(cls(lvl["price"], lvl["size"]) for lvl in levels[:depth])
+
+
+class _Model(Mapping):
+    """
+    Read-only dict view πάνω στα slots: market["runners"], r.get("movement"),
+    dict(r), == με dict κλπ. δουλεύουν όπως με τα παλιά dicts.
+    Οι subclasses ορίζουν _KEYS (τα keys του dict view) και _view(key).
+    """
+
+    __slots__ = ()
+    _KEYS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return self._view(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._KEYS:
+            return default
+        return self._view(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def _view(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if type(other) is type(self):
+            return self._values() == other._values()
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, k) for k in self.__slots__)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: self._view(k) for k in self._KEYS}
+
+    def to_json(self) -> bytes:
+        return dumps(self)
+
+
+class Runner(_Model):
+    """
+    Normalized runner. status / movement είναι IntEnum· στο dict view
+    (και στο JSON) εμφανίζονται ως τα παλιά strings.
+    back / lay: όλο το βάθος ως LadderLevel (κενό όταν δεν ζητήθηκε).
+    """
+
+    __slots__ = (
+        "selection_id", "name", "status",
+        "back_odds", "back_size", "lay_odds", "lay_size",
+        "total_matched", "movement", "back", "lay",
+    )
+    _KEYS = (
+        "selection_id", "name", "status",
+        "back_odds", "back_size", "lay_odds", "lay_size",
+        "total_matched", "movement",
+    )
+
+    def __init__(self, selection_id: Optional[int], name: Optional[str],
+                 status: RunnerStatus = RunnerStatus.ACTIVE,
+                 back_odds: Optional[float] = None, back_size: Optional[float] = None,
+                 lay_odds: Optional[float] = None, lay_size: Optional[float] = None,
+                 total_matched: Optional[float] = None,
+                 movement: Movement = Movement.NONE,
+                 back: Tuple[LadderLevel, ...] = (), lay: Tuple[LadderLevel, ...] = ()):
+        self.selection_id = selection_id
+        self.name = name
+        self.status = status
+        self.back_odds = back_odds
+        self.back_size = back_size
+        self.lay_odds = lay_odds
+        self.lay_size = lay_size
+        self.total_matched = total_matched
+        self.movement = movement
+        self.back = back
+        self.lay = lay
+
+    def _view(self, key: str) -> Any:
+        if key == "status":
+            return self.status.name
+        if key == "movement":
+            return MOVEMENT_LABELS[self.movement]
+        return getattr(self, key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "selection_id": self.selection_id,
+            "name": self.name,
+            "status": self.status.name,
+            "back_odds": self.back_odds,
+            "back_size": self.back_size,
+            "lay_odds": self.lay_odds,
+            "lay_size": self.lay_size,
+            "total_matched": self.total_matched,
+            "movement": MOVEMENT_LABELS[self.movement],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Runner":
+        """ Από το παλιό dict σχήμα (normalize_runners / cache / JSON). """
+        return cls(
+            d.get("selection_id"), d.get("name"), RunnerStatus.parse(d.get("status")),
+            d.get("back_odds"), d.get("back_size"), d.get("lay_odds"), d.get("lay_size"),
+            d.get("total_matched"), Movement.parse(d.get("movement", "none")),
+        )
+
+
+class Market(_Model):
+    """ Normalized market: ίδια keys με το παλιό dict, runners ως List[Runner]. """
+
+    __slots__ = ("market_id", "market_name", "total_matched", "runners")
+    _KEYS = __slots__
+
+    def __init__(self, market_id: Any, market_name: Any = "", total_matched: Any = 0,
+                 runners: Optional[List[Runner]] = None):
+        self.market_id = market_id
+        self.market_name = market_name
+        self.total_matched = total_matched
+        self.runners = runners if runners is not None else []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "market_id": self.market_id,
+            "market_name": self.market_name,
+            "total_matched": self.total_matched,
+            "runners": [r.to_dict() for r in self.runners],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Market":
+        return cls(
+            d.get("market_id", ""), d.get("market_name", ""), d.get("total_matched", 0),
+            [r if isinstance(r, Runner) else Runner.from_dict(r) for r in d.get("runners") or ()],
+        )
+
+
+# ------------------------------------------------------------
+# JSON
+# ------------------------------------------------------------
+def json_default(obj: Any) -> Any:
+    """ default= για json.dumps / orjson.dumps: models → dict view, enums → string. """
+    if isinstance(obj, _Model):
+        return obj.to_dict()
+    if isinstance(obj, LadderLevel):
+        return [obj.price, obj.size]
+    if isinstance(obj, Movement):
+        return obj.label
+    if isinstance(obj, RunnerStatus):
+        return obj.name
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Γρήγορο JSON (bytes) για payloads που περιέχουν models.
+    orjson όταν υπάρχει (τα models περνάνε από json_default μία φορά
+    το καθένα), αλλιώς compact json.dumps.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default)
+    return json.dumps(obj, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    """ JSON από bytes / str / memoryview (π.χ. πάνω σε mmap, χωρίς αντίγραφο με orjson). """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def dumps_lines(objs: Iterable[Any]) -> bytes:
+    """ NDJSON: ένα JSON object ανά γραμμή (για streaming responses). """
+    if orjson is not None:
+        opt = orjson.OPT_APPEND_NEWLINE
+        return b"".join(orjson.dumps(o, default=json_default, option=opt) for o in objs)
+    return b"".join(
+        json.dumps(o, separators=(",", ":"), default=json_default).encode("utf-8") + b"\n"
+        for o in objs
+    )
@@ -0,0 +1,317 @@
+# ============================================================
+# AI MATCHLAB — MOVEMENT STORE
+# Ιστορικό odds / matched volume ανά selection (ring buffers)
+# ============================================================
+
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from .metrics import metrics, stats_families
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+HISTORY_SAMPLES = int(os.getenv("MOVEMENT_HISTORY_SAMPLES", 60))
+MAX_SELECTIONS = int(os.getenv("MOVEMENT_MAX_SELECTIONS", 50000))
+EWMA_ALPHA = float(os.getenv("MOVEMENT_EWMA_ALPHA", 0.2))
+
+Key = Tuple[str, int]
+
+
+class MovementStore:
+    """
+    In-memory ιστορικό ανά (market_id, selection_id):
+    - Κάθε selection έχει ένα slot σε προ-δεσμευμένα NumPy arrays
+      (ts, best back, best lay, matched volume) μήκους HISTORY_SAMPLES
+    - Append O(1), σταθερό μέγεθος μνήμης ανά selection
+    - Windowed queries: price delta, volume spike rate, EWMA drift
+    - Όταν γεμίσει, το slot που ενημερώθηκε παλαιότερα ανακυκλώνεται
+    """
+
+    def __init__(self, samples: int = HISTORY_SAMPLES,
+                 max_selections: int = MAX_SELECTIONS,
+                 ewma_alpha: float = EWMA_ALPHA,
+                 initial_capacity: int = 1024):
+        self.samples = samples
+        self.max_selections = max_selections
+        self.ewma_alpha = ewma_alpha
+
+        self._slots: Dict[Key, int] = {}
+        self._keys: List[Optional[Key]] = []
+        self._free: List[int] = []
+        self._capacity = 0
+        self._allocate(min(initial_capacity, max_selections))
+
+    # ------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------
+    def _allocate(self, capacity: int):
+        old = self._capacity
+        w = self.samples
+
+        ts = np.full((capacity, w), np.nan, dtype=np.float64)
+        back = np.full((capacity, w), np.nan, dtype=np.float32)
+        lay = np.full((capacity, w), np.nan, dtype=np.float32)
+        vol = np.full((capacity, w), np.nan, dtype=np.float32)
+        head = np.zeros(capacity, dtype=np.int32)
+        ewma = np.zeros(capacity, dtype=np.float64)
+        last_seen = np.zeros(capacity, dtype=np.float64)
+
+        if old:
+            ts[:old] = self.ts
+            back[:old] = self.back
+            lay[:old] = self.lay
+            vol[:old] = self.vol
+            head[:old] = self.head
+            ewma[:old] = self.ewma
+            last_seen[:old] = self.last_seen
+
+        self.ts, self.back, self.lay, self.vol = ts, back, lay, vol
+        self.head, self.ewma, self.last_seen = head, ewma, last_seen
+
+        self._keys.extend([None] * (capacity - old))
+        self._free.extend(range(capacity - 1, old - 1, -1))
+        self._capacity = capacity
+
+    def _reset(self, slot: int):
+        self.ts[slot] = np.nan
+        self.back[slot] = np.nan
+        self.lay[slot] = np.nan
+        self.vol[slot] = np.nan
+        self.head[slot] = 0
+        self.ewma[slot] = 0.0
+
+    # ------------------------------------------------------------
+    def slot_for(self, market_id: str, selection_id: int) -> int:
+        """ Επιστρέφει (ή δεσμεύει) το slot ενός selection. """
+        key = (market_id, selection_id)
+        slot = self._slots.get(key)
+        if slot is not None:
+            # Δεσμευμένο μέχρι το _write: ένας επόμενος runner του ίδιου batch δεν το ανακυκλώνει
+            self.last_seen[slot] = np.inf
+            return slot
+
+        if not self._free:
+            if self._capacity < self.max_selections:
+                self._allocate(min(self._capacity * 2, self.max_selections))
+            else:
+                self._evict_oldest()
+
+        slot = self._free.pop()
+        self._reset(slot)
+        self._slots[key] = slot
+        self._keys[slot] = key
+        # Δεν ανακυκλώνεται πριν γραφτεί το πρώτο sample του
+        self.last_seen[slot] = np.inf
+        return slot
+
+    def _evict_oldest(self):
+        slot = int(np.argmin(self.last_seen))
+        key = self._keys[slot]
+        if key is not None:
+            del self._slots[key]
+        self._keys[slot] = None
+        self.last_seen[slot] = np.inf
+        self._free.append(slot)
+
+    def get_slot(self, market_id: str, selection_id: int) -> Optional[int]:
+        return self._slots.get((market_id, selection_id))
+
+    def lookup_slots(self, market_id: str, selection_ids: List[Optional[int]]) -> np.ndarray:
+        """ Slots για λίστα selections (-1 όπου δεν υπάρχει ιστορικό). """
+        get = self._slots.get
+        return np.array(
+            [get((market_id, s), -1) for s in selection_ids], dtype=np.int64
+        )
+
+    def lookup_batch(self, batch) -> np.ndarray:
+        """ Read-only εκδοχή του record_batch: slots ανά runner, -1 χωρίς ιστορικό. """
+        ids = batch.market_ids
+        get = self._slots.get
+        return np.array(
+            [get((ids[m], s), -1) if s >= 0 else -1
+             for m, s in zip(batch.market_index.tolist(), batch.selection_id.tolist())],
+            dtype=np.int64,
+        )
+
+    def forget_market(self, market_id: str):
+        """ Απελευθερώνει όλα τα slots ενός market (π.χ. όταν κλείσει). """
+        for key in [k for k in self._slots if k[0] == market_id]:
+            slot = self._slots.pop(key)
+            self._keys[slot] = None
+            self.last_seen[slot] = np.inf
+            self._free.append(slot)
+
+    # ------------------------------------------------------------
+    # Append
+    # ------------------------------------------------------------
+    def append(self, market_id: str, selection_id: int, ts: float,
+               back: Optional[float], lay: Optional[float],
+               volume: Optional[float]):
+        slot = self.slot_for(market_id, selection_id)
+        self._write(
+            np.array([slot]), ts,
+            np.array([_num(back)]), np.array([_num(lay)]), np.array([_num(volume)]),
+        )
+
+    def record_market(self, market: Dict[str, Any], ts: Optional[float] = None):
+        """ Καταγράφει όλους τους runners ενός normalized market. """
+        ts = time.time() if ts is None else ts
+        market_id = market.get("market_id", "")
+        runners = [r for r in market.get("runners", []) if r.get("selection_id") is not None]
+        if not runners:
+            return
+
+        slots = np.array([self.slot_for(market_id, r["selection_id"]) for r in runners])
+        self._write(
+            slots, ts,
+            np.array([_num(r.get("back_odds")) for r in runners]),
+            np.array([_num(r.get("lay_odds")) for r in runners]),
+            np.array([_num(r.get("total_matched")) for r in runners]),
+        )
+
+    def record_batch(self, batch, ts: Optional[float] = None) -> np.ndarray:
+        """
+        Καταγράφει όλους τους runners ενός MarketBatch με ένα vectorized write.
+        Επιστρέφει τα slots (ένα ανά runner, -1 για runners χωρίς selection_id).
+        """
+        ts = time.time() if ts is None else ts
+        ids = batch.market_ids
+        midx = batch.market_index.tolist()
+        sel = batch.selection_id.tolist()
+
+        slots = np.array(
+            [self.slot_for(ids[m], s) if s >= 0 else -1 for m, s in zip(midx, sel)],
+            dtype=np.int64,
+        )
+        valid = slots >= 0
+        if valid.any():
+            self._write(
+                slots[valid], ts,
+                batch.back_price[valid], batch.lay_price[valid], batch.matched[valid],
+            )
+        return slots
+
+    def _write(self, slots: np.ndarray, ts: float,
+               back: np.ndarray, lay: np.ndarray, vol: np.ndarray):
+        w = self.samples
+        pos = self.head[slots]
+        prev = self.back[slots, (pos - 1) % w]
+
+        self.ts[slots, pos] = ts
+        self.back[slots, pos] = back
+        self.lay[slots, pos] = lay
+        self.vol[slots, pos] = vol
+        self.head[slots] = (pos + 1) % w
+        self.last_seen[slots] = ts
+
+        step = back - prev
+        moved = np.isfinite(step)
+        a = self.ewma_alpha
+        upd = slots[moved]
+        self.ewma[upd] = a * step[moved] + (1.0 - a) * self.ewma[upd]
+
+    # ------------------------------------------------------------
+    # Windowed queries (vectorized ανά slots)
+    # ------------------------------------------------------------
+    def _window(self, slots: np.ndarray, seconds: float):
+        """
+        Για κάθε slot: index του τελευταίου sample, του παλαιότερου
+        sample μέσα στο παράθυρο, και του παλαιότερου συνολικά.
+        Το παράθυρο μετριέται από το τελευταίο sample του slot.
+        """
+        ts = self.ts[slots]
+        latest = (self.head[slots] - 1) % self.samples
+        rows = np.arange(len(slots))
+        t_last = ts[rows, latest]
+
+        filled = np.where(np.isnan(ts), np.inf, ts)
+        in_window = np.where(ts >= (t_last - seconds)[:, None], ts, np.inf)
+
+        ref = np.argmin(in_window, axis=1)
+        oldest = np.argmin(filled, axis=1)
+        return rows, latest, ref, oldest, ts
+
+    def price_deltas(self, slots: np.ndarray, seconds: float) -> np.ndarray:
+        """ Μεταβολή best back price μέσα στο παράθυρο (NaN αν δεν υπάρχει). """
+        slots = np.asarray(slots, dtype=np.int64)
+        if not len(slots):
+            return np.zeros(0)
+        rows, latest, ref, _, _ = self._window(slots, seconds)
+        back = self.back[slots]
+        return (back[rows, latest] - back[rows, ref]).astype(np.float64)
+
+    def volume_spike_rates(self, slots: np.ndarray, seconds: float) -> np.ndarray:
+        """
+        Ρυθμός matched volume στο παράθυρο / ρυθμός σε όλο το ιστορικό.
+        1.0 = κανονικός ρυθμός, >1 = spike, 0 = χωρίς δεδομένα.
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        if not len(slots):
+            return np.zeros(0)
+        rows, latest, ref, oldest, ts = self._window(slots, seconds)
+        vol = self.vol[slots].astype(np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            recent = (vol[rows, latest] - vol[rows, ref]) / (ts[rows, latest] - ts[rows, ref])
+            base = (vol[rows, latest] - vol[rows, oldest]) / (ts[rows, latest] - ts[rows, oldest])
+            rate = recent / base
+
+        return np.where(np.isfinite(rate) & (base > 0), rate, 0.0)
+
+    def latest_back(self, slots: np.ndarray) -> np.ndarray:
+        """ Τελευταία καταγεγραμμένη best back price ανά slot. """
+        slots = np.asarray(slots, dtype=np.int64)
+        return self.back[slots, (self.head[slots] - 1) % self.samples].astype(np.float64)
+
+    def ewma_drifts(self, slots: np.ndarray) -> np.ndarray:
+        """ EWMA των βημάτων της best back price (πρόσημο = κατεύθυνση). """
+        return self.ewma[np.asarray(slots, dtype=np.int64)]
+
+    # ------------------------------------------------------------
+    # Scalar helpers
+    # ------------------------------------------------------------
+    def price_delta(self, market_id: str, selection_id: int, seconds: float) -> Optional[float]:
+        slot = self.get_slot(market_id, selection_id)
+        if slot is None:
+            return None
+        v = float(self.price_deltas(np.array([slot]), seconds)[0])
+        return None if v != v else v
+
+    def volume_spike_rate(self, market_id: str, selection_id: int, seconds: float) -> float:
+        slot = self.get_slot(market_id, selection_id)
+        if slot is None:
+            return 0.0
+        return float(self.volume_spike_rates(np.array([slot]), seconds)[0])
+
+    def ewma_drift(self, market_id: str, selection_id: int) -> float:
+        slot = self.get_slot(market_id, selection_id)
+        if slot is None:
+            return 0.0
+        return float(self.ewma[slot])
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        nbytes = sum(a.nbytes for a in (
+            self.ts, self.back, self.lay, self.vol, self.head, self.ewma, self.last_seen
+        ))
+        return {
+            "selections": len(self._slots),
+            "capacity": self._capacity,
+            "max_selections": self.max_selections,
+            "samples": self.samples,
+            "bytes": nbytes,
+        }
+
+
+def _num(v: Optional[float]) -> float:
+    return float("nan") if v is None else v
+
+
+# Singleton instance
+movement_store = MovementStore()
+metrics.add_collector(lambda: stats_families("aimatchlab_movement_store", movement_store.stats()))
@@ -0,0 +1,265 @@
+# ============================================================
+# AI MATCHLAB — CPU OFFLOAD
+# Μεγάλα CPU-bound jobs σε process pool, μικρά inline (event loop ελεύθερος)
+# ============================================================
+
+import asyncio
+import mmap
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from .metrics import metrics, stats_families
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+# 0 → χωρίς process pool (όλα inline / thread όπως πριν)
+OFFLOAD_WORKERS = int(os.getenv("OFFLOAD_WORKERS", max(1, min(4, (os.cpu_count() or 1) - 1))))
+# Size heuristic: κάτω από αυτό το IPC κοστίζει περισσότερο από την ανάλυση
+OFFLOAD_MIN_BODY = int(os.getenv("OFFLOAD_MIN_BODY", 256 * 1024))
+# Out-of-band buffers πάνω από αυτό περνάνε από shared memory, αλλιώς μέσα στο pickle
+OFFLOAD_SHM_BYTES = int(os.getenv("OFFLOAD_SHM_BYTES", 64 * 1024))
+OFFLOAD_SHM_DIR = os.getenv("OFFLOAD_SHM_DIR", "").strip() or (
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+)
+# forkserver: οι workers δεν κληρονομούν threads / sockets του web process
+OFFLOAD_START_METHOD = os.getenv("OFFLOAD_START_METHOD", "forkserver")
+OFFLOAD_PRELOAD = ("services.batch_analysis",)
+
+# (pickle header, shared memory path, [(offset, length)]) ή (header, None, [buffers])
+Packed = Tuple[bytes, Optional[str], tuple]
+
+OFFLOAD_TASKS = metrics.counter(
+    "aimatchlab_offload_tasks_total",
+    "CPU-bound jobs by job name and where they ran (process / inline)",
+    ("job", "mode"),
+)
+OFFLOAD_SECONDS = metrics.histogram(
+    "aimatchlab_offload_seconds",
+    "Process pool round trip per job (IPC + worker time)", ("job",),
+)
+
+
+class CpuOffload:
+    """
+    Process pool για CPU-bound δουλειά (batch analysis μεγάλων bodies):
+    - should_offload(size, threshold): size heuristic, αλλιώς ο caller τρέχει inline
+    - run(fn, *args): args / αποτέλεσμα με pickle-5· τα out-of-band buffers
+      (NumPy columns, raw bodies) γράφονται μία φορά σε shared memory και
+      ο παραλήπτης τα κάνει mmap χωρίς αντιγραφή
+    - Το pool φτιάχνεται στο start() (lifespan)· αν ένας worker πεθάνει
+      το pool ξαναστήνεται και το job τρέχει σε thread. Exceptions του
+      ίδιου του job φτάνουν στον caller όπως είναι
+    """
+
+    def __init__(self, workers: int = OFFLOAD_WORKERS,
+                 start_method: str = OFFLOAD_START_METHOD):
+        self.workers = max(0, workers)
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        self.submitted = 0
+        self.failed = 0
+        self.restarts = 0
+        self.inflight = 0
+        self.shm_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._pool is not None
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self):
+        if self._pool is not None or not self.workers:
+            return
+        self._pool = self._make_pool()
+        # Οι workers ξεκινούν τώρα, όχι στο πρώτο μεγάλο request
+        for _ in range(self.workers):
+            self._pool.submit(_ping)
+
+    async def stop(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, True, cancel_futures=True)
+
+    def _make_pool(self) -> ProcessPoolExecutor:
+        try:
+            ctx = multiprocessing.get_context(self.start_method)
+        except ValueError:
+            ctx = multiprocessing.get_context()
+        if self.start_method == "forkserver":
+            ctx.set_forkserver_preload(list(OFFLOAD_PRELOAD))
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+
+    # ------------------------------------------------------------
+    def should_offload(self, size: int, threshold: int) -> bool:
+        return self._pool is not None and size >= threshold
+
+    def count_inline(self, job: str):
+        OFFLOAD_TASKS.labels(job=job, mode="inline").inc()
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """ fn(*args) σε worker process (fn: module-level function). """
+        job = fn.__name__
+        if self._pool is None:
+            self.count_inline(job)
+            return await asyncio.to_thread(fn, *_local(args))
+
+        t0 = time.perf_counter()
+        packed = pack(args)
+        try:
+            future = self._pool.submit(_call, fn, packed)
+        except BrokenProcessPool:
+            discard(packed)
+            return await self._fallback(fn, args)
+        except RuntimeError:
+            # submit μετά από shutdown (interpreter exit): χωρίς restart, απλώς σε thread
+            discard(packed)
+            self.count_inline(job)
+            return await asyncio.to_thread(fn, *_local(args))
+
+        self.submitted += 1
+        self.inflight += 1
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Ο worker μπορεί να έχει ήδη ξεκινήσει: το shared memory καθαρίζει όποιος μείνει τελευταίος
+            future.add_done_callback(lambda f: _cleanup(f, packed))
+            raise
+        except BrokenProcessPool:
+            discard(packed)
+            return await self._fallback(fn, args)
+        finally:
+            self.inflight -= 1
+
+        OFFLOAD_TASKS.labels(job=job, mode="process").inc()
+        OFFLOAD_SECONDS.labels(job=job).observe(time.perf_counter() - t0)
+        return unpack(result)
+
+    async def _fallback(self, fn: Callable[..., Any], args: tuple) -> Any:
+        self.failed += 1
+        if self._pool is not None:
+            print("[CpuOffload] ❌ Process pool broken, restarting (job runs in a thread)")
+            broken, self._pool = self._pool, self._make_pool()
+            self.restarts += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+        self.count_inline(fn.__name__)
+        return await asyncio.to_thread(fn, *_local(args))
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": int(self.enabled),
+            "workers": self.workers if self.enabled else 0,
+            "inflight": self.inflight,
+            "submitted": self.submitted,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "shm_bytes": self.shm_bytes,
+        }
+
+
+# ------------------------------------------------------------
+# Pickle-5 + shared memory
+# ------------------------------------------------------------
+def pack(obj: Any, shm_min: int = OFFLOAD_SHM_BYTES) -> Packed:
+    """
+    pickle protocol 5 με out-of-band buffers. Μικρά buffers μένουν
+    μέσα στο pickle· μεγάλα γράφονται σε ένα αρχείο του shared memory.
+    """
+    buffers = []
+    header = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    views = [b.raw() for b in buffers]
+    total = sum(v.nbytes for v in views)
+    if total < shm_min:
+        # bytearray: οι arrays του παραλήπτη μένουν writable
+        return header, None, tuple(bytearray(v) for v in views)
+
+    path = os.path.join(OFFLOAD_SHM_DIR, f"aimatchlab-offload-{uuid.uuid4().hex}")
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        os.ftruncate(fd, total)
+        layout, offset = [], 0
+        with mmap.mmap(fd, total) as mm:
+            for v in views:
+                mm[offset:offset + v.nbytes] = v
+                layout.append((offset, v.nbytes))
+                offset += v.nbytes
+    except BaseException:
+        os.unlink(path)
+        raise
+    finally:
+        os.close(fd)
+    cpu_offload.shm_bytes += total
+    return header, path, tuple(layout)
+
+
+def unpack(packed: Packed) -> Any:
+    """
+    Αντίστροφο του pack. Τα buffers γίνονται views πάνω σε ένα private
+    (copy-on-write) mmap: οι arrays είναι writable χωρίς αντιγραφή και η
+    μνήμη ελευθερώνεται όταν φύγει και το τελευταίο view.
+    """
+    header, path, layout = packed
+    if path is None:
+        return pickle.loads(header, buffers=layout)
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_COPY)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+    view = memoryview(mm)
+    return pickle.loads(header, buffers=[view[o:o + n] for o, n in layout])
+
+
+def discard(packed: Optional[Packed]):
+    """ Σβήνει το shared memory ενός packed που δεν θα γίνει ποτέ unpack. """
+    path = packed[1] if packed else None
+    if path is not None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _local(args: tuple) -> tuple:
+    """ Στο ίδιο process ένα PickleBuffer φτάνει στο job ως memoryview, όπως από το pack. """
+    return tuple(a.raw() if isinstance(a, pickle.PickleBuffer) else a for a in args)
+
+
+def _cleanup(future: Future, packed: Packed):
+    if future.cancelled():
+        discard(packed)
+    elif future.exception() is None:
+        discard(future.result())
+
+
+# ------------------------------------------------------------
+# Worker side
+# ------------------------------------------------------------
+def _call(fn: Callable[..., Any], packed: Packed) -> Packed:
+    return pack(fn(*unpack(packed)))
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+# Singleton instance
+cpu_offload = CpuOffload()
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_offload", cpu_offload.stats(),
+    counters=("submitted", "failed", "restarts", "shm_bytes"),
+))
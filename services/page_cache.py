@@ -0,0 +1,189 @@
+# ============================================================
+# AI MATCHLAB — PAGE CACHE
+# Pre-rendered tab pages (gzip / brotli)
+# ============================================================
+
+import gzip
+import hashlib
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from .metrics import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+PAGE_GZIP_LEVEL = int(os.getenv("PAGE_GZIP_LEVEL", 9))
+PAGE_BROTLI_QUALITY = int(os.getenv("PAGE_BROTLI_QUALITY", 11))
+# Κάθε πόσα δευτερόλεπτα ελέγχεται το mtime του template (0 → σε κάθε request)
+PAGE_CHECK_INTERVAL = float(os.getenv("PAGE_CHECK_INTERVAL", 2.0))
+
+HTML_TYPE = "text/html; charset=utf-8"
+
+PAGE_RESPONSES = metrics.counter(
+    "aimatchlab_page_responses_total",
+    "Pre-rendered page responses by encoding and status",
+    ("encoding", "status"),
+)
+
+
+# ------------------------------------------------------------
+# Pre-rendered pages
+# ------------------------------------------------------------
+class _Variant:
+    __slots__ = ("body", "etag", "encoding")
+
+    def __init__(self, body: bytes, etag: str, encoding: str):
+        self.body = body
+        self.etag = etag
+        self.encoding = encoding
+
+
+class PageCache:
+    """
+    Ένα template (index.html) σε N παραλλαγές (default_view), rendered
+    μία φορά και κρατημένες ως bytes ανά encoding (identity / gzip / br):
+    - Strong ETag ανά παραλλαγή + encoding, 304 σε If-None-Match
+    - Re-render όταν αλλάξει το mtime του template
+    - Το request κοστίζει μόνο επιλογή encoding + bytes copy
+    """
+
+    def __init__(self, env, template: str, views: List[str],
+                 check_interval: float = PAGE_CHECK_INTERVAL):
+        self.env = env
+        self.template = template
+        self.views = list(views)
+        self.check_interval = check_interval
+
+        self._pages: Dict[str, Dict[str, _Variant]] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self.renders = 0
+        self.last_render_ms = 0.0
+
+    # ------------------------------------------------------------
+    def load(self):
+        """ Render όλων των παραλλαγών (στο startup και όταν αλλάξει το template). """
+        t0 = time.perf_counter()
+        stamp = self._template_stamp()
+        template = self.env.get_template(self.template)
+
+        pages = {}
+        for view in self.views:
+            html = template.render(default_view=view).encode("utf-8")
+            pages[view] = _encode_variants(html)
+
+        self._pages = pages
+        self._stamp = stamp
+        self._checked = time.monotonic()
+        self.renders += 1
+        self.last_render_ms = (time.perf_counter() - t0) * 1000
+
+    def _template_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            _, filename, _ = self.env.loader.get_source(self.env, self.template)
+            st = os.stat(filename)
+        except Exception:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _ensure_fresh(self):
+        if not self._pages:
+            self.load()
+            return
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        if self._template_stamp() != self._stamp:
+            print(f"[PageCache] ⏳ {self.template} changed, re-rendering {len(self.views)} pages")
+            self.load()
+
+    # ------------------------------------------------------------
+    def response(self, request: Request, view: str) -> Response:
+        self._ensure_fresh()
+        variants = self._pages[view]
+        encoding = pick_encoding(request.headers.get("accept-encoding", ""), variants)
+        variant = variants[encoding]
+
+        headers = {
+            "ETag": variant.etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+        }
+        if etag_matches(request.headers.get("if-none-match", ""), variant.etag):
+            PAGE_RESPONSES.labels(encoding=encoding, status=304).inc()
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        PAGE_RESPONSES.labels(encoding=encoding, status=200).inc()
+        return Response(variant.body, media_type=HTML_TYPE, headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "template": self.template,
+            "views": len(self._pages),
+            "renders": self.renders,
+            "last_render_ms": round(self.last_render_ms, 3),
+            "bytes": {
+                enc: sum(len(v[enc].body) for v in self._pages.values() if enc in v)
+                for enc in ("identity", "gzip", "br")
+            },
+        }
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _encode_variants(html: bytes) -> Dict[str, _Variant]:
+    tag = hashlib.sha256(html).hexdigest()[:20]
+    variants = {"identity": _Variant(html, f'"{tag}"', "identity")}
+    variants["gzip"] = _Variant(
+        gzip.compress(html, compresslevel=PAGE_GZIP_LEVEL, mtime=0), f'"{tag}-gz"', "gzip"
+    )
+    if brotli is not None:
+        variants["br"] = _Variant(
+            brotli.compress(html, quality=PAGE_BROTLI_QUALITY), f'"{tag}-br"', "br"
+        )
+    return variants
+
+
+def pick_encoding(accept_encoding: str, available) -> str:
+    """ br > gzip > identity, σεβόμενο q=0. """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name] = q
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (t.strip() for t in if_none_match.split(","))
+    return any((t[2:] if t.startswith("W/") else t) == etag for t in tags)
@@ -0,0 +1,102 @@
+# ============================================================
+# AI MATCHLAB — SAMPLING PROFILER
+# On-demand stacks όλων των threads → collapsed format (flamegraph)
+# ============================================================
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+PROFILER_TOKEN = os.getenv("PROFILER_ADMIN_TOKEN", "").strip()
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", 60))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", 0.005))
+
+
+class ProfilerBusy(RuntimeError):
+    """ Τρέχει ήδη άλλο capture. """
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler χωρίς instrumentation:
+    - Ένα thread διαβάζει sys._current_frames() κάθε `interval`
+    - Κάθε stack μετατρέπεται σε "root;...;leaf" (Brendan Gregg collapsed)
+    - Ένα capture κάθε φορά· το event loop συνεχίζει κανονικά
+      (το capture τρέχει σε thread και το loop δειγματοληπτείται κι αυτό)
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL,
+                 max_seconds: float = PROFILER_MAX_SECONDS):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self.captures = 0
+        self.last_capture: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------
+    def capture(self, seconds: float, interval: Optional[float] = None) -> str:
+        """ Blocking capture (καλείται μέσω asyncio.to_thread). """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("profiler capture already running")
+
+        try:
+            seconds = max(0.1, min(float(seconds), self.max_seconds))
+            interval = max(0.001, interval or self.interval)
+            me = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+
+            stacks: Counter = Counter()
+            samples = 0
+            t_end = time.monotonic() + seconds
+
+            while time.monotonic() < t_end:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    stacks[collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            self.captures += 1
+            self.last_capture = {
+                "seconds": seconds,
+                "interval": interval,
+                "samples": samples,
+                "stacks": len(stacks),
+            }
+            return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
+
+        finally:
+            self._lock.release()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def collapse(frame, thread_name: str) -> str:
+    """ Frame → "thread;module:function;..." (root πρώτο). """
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        parts.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    parts.append(thread_name)
+    parts.reverse()
+    # ";" και " " έχουν ειδική σημασία στο collapsed format
+    return ";".join(p.replace(";", ",").replace(" ", "_") for p in parts)
+
+
+# Singleton instance
+sampling_profiler = SamplingProfiler()
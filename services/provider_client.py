@@ -6,7 +6,13 @@
 import httpx
 import asyncio
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from .response_cache import ResponseCache, CacheEntry, parse_ttl_rules
+from .transport import ResilientTransport, CircuitOpenError, LATENCY_BUCKETS_MS
+from .metrics import metrics, MetricFamily
+from .feed_recorder import feed_recorder
 
 
 # ------------------------------------------------------------
@@ -16,6 +22,23 @@ from typing import Optional, Dict, Any
 WORKER_URL = os.getenv("WORKER_URL", "").rstrip("/")
 TIMEOUT = float(os.getenv("WORKER_TIMEOUT", 6.0))
 
+# Cache: TTL ανά path prefix, π.χ. "/api/live=2,/api/fixtures=60"
+CACHE_MAX_ENTRIES = int(os.getenv("WORKER_CACHE_MAX_ENTRIES", 512))
+CACHE_DEFAULT_TTL = float(os.getenv("WORKER_CACHE_DEFAULT_TTL", 1.0))
+CACHE_TTL_RULES = parse_ttl_rules(os.getenv("WORKER_CACHE_TTLS", "/api/live=2"))
+
+# HTML (fixtures): cache του φιλτραρισμένου αποτελέσματος ανά URL
+HTML_CACHE_MAX_ENTRIES = int(os.getenv("HTML_CACHE_MAX_ENTRIES", 64))
+HTML_CACHE_TTL = float(os.getenv("HTML_CACHE_TTL", 300))
+# Πάνω από αυτό το μέγεθος το φιλτράρισμα τρέχει εκτός event loop
+HTML_OFFLOAD_BYTES = int(os.getenv("HTML_OFFLOAD_BYTES", 256 * 1024))
+
+# Fetch (με retries / revalidation), outcome: ok / not_modified / stale / error
+FETCH_SECONDS = metrics.histogram(
+    "aimatchlab_upstream_fetch_seconds",
+    "Upstream fetch duration including retries", ("kind", "outcome"),
+)
+
 
 class ProviderClient:
     """
@@ -24,13 +47,77 @@ class ProviderClient:
     - HTML fetch (fixtures)
     - Error handling
     - Timeout management
+    - Request coalescing (ένα upstream request ανά path τη φορά)
+    - TTL/LRU cache με ETag / Cache-Control revalidation
+    - Retries / circuit breaker / hedging μέσω ResilientTransport·
+      όταν ο upstream αποτυγχάνει σερβίρεται το τελευταίο καλό payload
+    - Προαιρετικό recording των JSON payloads (FEED_RECORD_PATH)
+    Ο HTTP client δημιουργείται στο start() (FastAPI lifespan), όχι στο import.
     """
 
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
+        self.transport: Optional[ResilientTransport] = None
+
+        self.cache = ResponseCache(
+            max_entries=CACHE_MAX_ENTRIES,
+            default_ttl=CACHE_DEFAULT_TTL,
+            ttl_rules=CACHE_TTL_RULES,
+        )
+        self.html_cache = ResponseCache(
+            max_entries=HTML_CACHE_MAX_ENTRIES,
+            default_ttl=HTML_CACHE_TTL,
+        )
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    async def start(self):
+        """ Δημιουργεί το connection pool (καλείται από το lifespan). """
         if not WORKER_URL:
             print("[ProviderClient] ⚠ WORKER_URL is missing in environment.")
+        self._get_transport()
+
+    def _get_transport(self) -> ResilientTransport:
+        # Lazy: και εκτός lifespan (scripts, benchmarks) ο client φτιάχνεται όταν χρειαστεί
+        if self.transport is None:
+            self.transport = ResilientTransport(TIMEOUT, client=self._client)
+        return self.transport
 
-        self.client = httpx.AsyncClient(timeout=TIMEOUT)
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._get_transport().client
+
+    # ------------------------------------------------------------
+    # Coalescing helpers
+    # ------------------------------------------------------------
+    async def _coalesce(self, key: str, cache: ResponseCache,
+                        factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ένα upstream request ανά key: οι υπόλοιποι callers περιμένουν το ίδιο task.
+        shield: αν ακυρωθεί ένας caller, οι υπόλοιποι συνεχίζουν να περιμένουν.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            cache.coalesced += 1
+        else:
+            cache.misses += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
 
     # ------------------------------------------------------------
     # JSON GET
@@ -38,25 +125,72 @@ class ProviderClient:
     async def get_json(self, path: str) -> Optional[Dict[str, Any]]:
         """
         Παίρνει JSON από τον Worker: /api/...
+        - Fresh cache entry → επιστρέφεται χωρίς upstream hit
+        - Αν υπάρχει ήδη request για το ίδιο path, περιμένουμε το ίδιο future
+        """
+        entry = self.cache.get(path)
+        if entry is not None and entry.is_fresh():
+            self.cache.hits += 1
+            return entry.data
+
+        return await self._coalesce(
+            path, self.cache, lambda: self._fetch_json(path, entry)
+        )
+
+    # ------------------------------------------------------------
+    async def _fetch_json(self, path: str, entry: Optional[CacheEntry]) -> Optional[Dict[str, Any]]:
+        """
+        Το πραγματικό upstream GET (με conditional headers αν έχουμε stale entry).
         """
         url = f"{WORKER_URL}{path}"
+        headers = self._conditional_headers(entry)
+        t0 = time.perf_counter()
 
         try:
-            resp = await self.client.get(url)
+            resp = await self._get_transport().get(url, headers=headers)
+
+            if resp.status_code == 304 and entry is not None:
+                self.cache.revalidated += 1
+                ttl = self.cache.resolve_ttl(path, resp.headers)
+                entry.refresh(ttl or 0.0)
+                _observe_fetch("json", "not_modified", t0)
+                return entry.data
+
             resp.raise_for_status()
-            return resp.json()
+            data = resp.json()
+            self.cache.put(path, data, resp.headers)
+            # Raw bytes όπως ήρθαν (replay / backtest, βλ. feed_recorder)
+            feed_recorder.record(path, resp.content)
+            _observe_fetch("json", "ok", t0)
+            return data
+
+        except CircuitOpenError:
+            return self._fetch_failed("json", entry, t0)
 
         except httpx.TimeoutException:
             print(f"[ProviderClient] ⏳ Timeout on GET {url}")
-            return None
+            return self._fetch_failed("json", entry, t0)
 
         except httpx.HTTPError as e:
             print(f"[ProviderClient] ❌ HTTP error on GET {url}: {e}")
-            return None
+            return self._fetch_failed("json", entry, t0)
 
         except Exception as e:
             print(f"[ProviderClient] ⚠ Unexpected error on GET {url}: {e}")
+            return self._fetch_failed("json", entry, t0)
+
+    def _fetch_failed(self, kind: str, entry: Optional[CacheEntry], t0: float,
+                      cache: Optional[ResponseCache] = None) -> Any:
+        _observe_fetch(kind, "error" if entry is None else "stale", t0)
+        return self._last_good(entry, cache)
+
+    def _last_good(self, entry: Optional[CacheEntry],
+                   cache: Optional[ResponseCache] = None) -> Any:
+        """ Stale payload από το cache όταν ο upstream δεν απαντά. """
+        if entry is None:
             return None
+        (cache or self.cache).stale_served += 1
+        return entry.data
 
     # ------------------------------------------------------------
     # HTML GET (fixtures, dashboards, κλπ)
@@ -67,7 +201,7 @@ class ProviderClient:
         Δεν περνάει από WORKER_URL.
         """
         try:
-            resp = await self.client.get(url)
+            resp = await self._get_transport().get(url)
             resp.raise_for_status()
             return resp.text
 
@@ -83,13 +217,170 @@ class ProviderClient:
             print(f"[ProviderClient] ⚠ Unexpected error HTML fetch {url}: {e}")
             return None
 
+    # ------------------------------------------------------------
+    # HTML GET με streaming φίλτρο + cache του αποτελέσματος
+    # ------------------------------------------------------------
+    async def get_html_filtered(self, url: str, make_filter: Callable[[], Any]) -> Optional[str]:
+        """
+        Παίρνει HTML σε chunks και το περνάει από φίλτρο με feed()/close()
+        (π.χ. HtmlSanitizer) χωρίς να κρατάει ποτέ ολόκληρη την αρχική σελίδα.
+        Το φιλτραρισμένο αποτέλεσμα μένει στο cache ανά URL· με ETag /
+        Last-Modified γίνεται conditional revalidation όταν λήξει.
+        """
+        entry = self.html_cache.get(url)
+        if entry is not None and entry.is_fresh():
+            self.html_cache.hits += 1
+            return entry.data
+
+        return await self._coalesce(
+            f"html:{url}", self.html_cache,
+            lambda: self._fetch_html_filtered(url, entry, make_filter),
+        )
+
+    async def _fetch_html_filtered(self, url: str, entry: Optional[CacheEntry],
+                                   make_filter: Callable[[], Any]) -> Optional[str]:
+        headers = self._conditional_headers(entry)
+        transport = self._get_transport()
+        breaker = transport.breaker_for(url)
+        t0 = time.perf_counter()
+
+        if not breaker.allow():
+            transport.record_error(url, "circuit_open")
+            return self._fetch_failed("html", entry, t0, self.html_cache)
+
+        try:
+            async with transport.client.stream("GET", url, headers=headers) as resp:
+                if resp.status_code == 304 and entry is not None:
+                    breaker.record_success()
+                    self.html_cache.revalidated += 1
+                    ttl = self.html_cache.resolve_ttl(url, resp.headers)
+                    entry.refresh(ttl or 0.0)
+                    _observe_fetch("html", "not_modified", t0)
+                    return entry.data
+
+                resp.raise_for_status()
+                breaker.record_success()
+
+                size = int(resp.headers.get("content-length") or 0)
+                offload = size >= HTML_OFFLOAD_BYTES
+                filt = make_filter()
+                parts = []
+
+                async for chunk in resp.aiter_text():
+                    if offload or len(chunk) >= HTML_OFFLOAD_BYTES:
+                        parts.append(await asyncio.to_thread(filt.feed, chunk))
+                    else:
+                        parts.append(filt.feed(chunk))
+                parts.append(filt.close())
+
+            html = "".join(parts)
+            self.html_cache.put(url, html, resp.headers)
+            _observe_fetch("html", "ok", t0)
+            return html
+
+        except httpx.TimeoutException:
+            print(f"[ProviderClient] ⏳ Timeout on HTML fetch {url}")
+            breaker.record_failure()
+            transport.record_error(url, "timeout")
+            return self._fetch_failed("html", entry, t0, self.html_cache)
+
+        except httpx.HTTPError as e:
+            print(f"[ProviderClient] ❌ HTTP error on HTML fetch {url}: {e}")
+            breaker.record_failure()
+            transport.record_error(url, type(e).__name__)
+            return self._fetch_failed("html", entry, t0, self.html_cache)
+
+        except Exception as e:
+            print(f"[ProviderClient] ⚠ Unexpected error HTML fetch {url}: {e}")
+            breaker.record_failure()
+            transport.record_error(url, type(e).__name__)
+            return self._fetch_failed("html", entry, t0, self.html_cache)
+
+        finally:
+            # Half-open probe χωρίς success / failure (π.χ. cancel) δεν κλειδώνει τον breaker
+            breaker.release_probe()
+
+    # ------------------------------------------------------------
+    def transport_stats(self) -> Dict[str, Any]:
+        """ Latency histograms ανά path, breakers, retries, hedges. """
+        if self.transport is None:
+            return {}
+        return self.transport.stats()
+
+    # ------------------------------------------------------------
+    def cache_stats(self) -> Dict[str, Any]:
+        """ Hit / miss / coalesced counters για sizing του cache. """
+        stats = self.cache.stats()
+        stats["inflight"] = len(self._inflight)
+        stats["html"] = self.html_cache.stats()
+        return stats
+
     # ------------------------------------------------------------
     async def close(self):
         """ Κλείνει το client σωστά """
-        await self.client.aclose()
+        if self.transport is not None:
+            await self.transport.aclose()
+            self.transport = None
+
+    # ------------------------------------------------------------
+    def collect_metrics(self) -> List[MetricFamily]:
+        """ Cache & transport counters για το /metrics (υπολογίζονται στο scrape). """
+        cache = MetricFamily("aimatchlab_cache_events_total", "counter",
+                             "Response cache events by cache and event")
+        ratio = MetricFamily("aimatchlab_cache_hit_ratio", "gauge", "Response cache hit ratio")
+        entries = MetricFamily("aimatchlab_cache_entries", "gauge", "Response cache entries")
+
+        for name, c in (("json", self.cache), ("html", self.html_cache)):
+            st = c.stats()
+            for event in ("hits", "misses", "coalesced", "revalidated", "evictions", "stale_served"):
+                cache.add({"cache": name, "event": event}, st[event])
+            ratio.add({"cache": name}, st["hit_ratio"])
+            entries.add({"cache": name}, st["entries"])
+
+        out = [cache, ratio, entries,
+               MetricFamily("aimatchlab_upstream_inflight", "gauge",
+                            "Coalesced upstream requests in flight").add({}, len(self._inflight))]
+
+        t = self.transport
+        if t is None:
+            return out
+
+        latency = MetricFamily("aimatchlab_upstream_request_seconds", "histogram",
+                               "Upstream request latency per path (single attempt)")
+        bounds = [ms / 1000 for ms in LATENCY_BUCKETS_MS]
+        for path, h in list(t.histograms.items()):
+            latency.add_histogram({"path": path}, bounds, h.counts, h.total_ms / 1000)
+
+        errors = MetricFamily("aimatchlab_upstream_errors_total", "counter",
+                              "Upstream errors per path and kind")
+        for key, count in list(t.errors.items()):
+            path, _, kind = key.rpartition(":")
+            errors.add({"path": path, "kind": kind}, count)
+
+        breakers = MetricFamily("aimatchlab_upstream_circuit_open", "gauge",
+                                "1 if the host circuit breaker is not closed")
+        for host, b in list(t.breakers.items()):
+            breakers.add({"host": host}, 0 if b.state == "closed" else 1)
+
+        out += [
+            latency, errors, breakers,
+            MetricFamily("aimatchlab_upstream_retries_total", "counter",
+                         "Upstream retries").add({}, t.retries),
+            MetricFamily("aimatchlab_upstream_hedges_total", "counter",
+                         "Hedged upstream requests").add({}, t.hedges),
+        ]
+        return out
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _observe_fetch(kind: str, outcome: str, t0: float):
+    FETCH_SECONDS.labels(kind=kind, outcome=outcome).observe(time.perf_counter() - t0)
 
 
 # ------------------------------------------------------------
 # Singleton instance
 # ------------------------------------------------------------
 provider_client = ProviderClient()
+metrics.add_collector(provider_client.collect_metrics)
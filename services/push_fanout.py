@@ -0,0 +1,576 @@
+# ============================================================
+# AI MATCHLAB — PUSH FANOUT
+# Web Push των SmartMoney alerts σε όλα τα push_subscriptions
+# ============================================================
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from .metrics import metrics, stats_families
+from .transport import LatencyHistogram
+from .smartmoney_engine import ALERT_THRESHOLDS, ALERT_LEVELS
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:
+    ec = None
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+DB_PATH = os.getenv("MATCHES_DB_PATH", "db/matches.db")
+PUSH_ENABLED = os.getenv("PUSH_ENABLED", "1") == "1"
+# VAPID private key: base64url raw (32 bytes) ή PEM
+VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY", "").strip()
+VAPID_SUBJECT = os.getenv("VAPID_SUBJECT", "mailto:admin@aimatchlab.app")
+
+PUSH_MIN_SCORE = int(os.getenv("PUSH_MIN_SCORE", ALERT_THRESHOLDS[1]))
+PUSH_COALESCE_WINDOW = float(os.getenv("PUSH_COALESCE_WINDOW", 3.0))
+PUSH_PAGE_SIZE = int(os.getenv("PUSH_PAGE_SIZE", 1000))
+PUSH_CONCURRENCY = int(os.getenv("PUSH_CONCURRENCY", 256))
+# Connections ανά httpx client: το pool του httpcore σαρώνει όλες τις
+# connections σε κάθε request, οπότε μοιράζουμε τον cap σε μικρά pools
+PUSH_LANE_CONNECTIONS = int(os.getenv("PUSH_LANE_CONNECTIONS", 8))
+PUSH_HOST_CONCURRENCY = int(os.getenv("PUSH_HOST_CONCURRENCY", 64))
+# Requests/s ανά push service host (0 → χωρίς rate limit, μόνο concurrency)
+PUSH_HOST_RATE = float(os.getenv("PUSH_HOST_RATE", 0))
+PUSH_HOST_BURST = float(os.getenv("PUSH_HOST_BURST", 100))
+PUSH_RETRIES = int(os.getenv("PUSH_RETRIES", 1))
+PUSH_TIMEOUT = float(os.getenv("PUSH_TIMEOUT", 10.0))
+PUSH_TTL = int(os.getenv("PUSH_TTL", 300))
+PUSH_PRUNE_BATCH = int(os.getenv("PUSH_PRUNE_BATCH", 500))
+
+GONE_STATUSES = {404, 410}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 30.0
+VAPID_EXPIRY = 12 * 3600
+RECORD_SIZE = 4096
+
+SELECT_SQL = (
+    "SELECT id, endpoint, p256dh, auth FROM push_subscriptions "
+    "WHERE id > ? ORDER BY id LIMIT ?"
+)
+DELETE_SQL = "DELETE FROM push_subscriptions WHERE id = ?"
+
+
+class HostLimiter:
+    """
+    Όρια ανά push service host (FCM, Mozilla, Apple ...):
+    concurrency semaphore + token bucket + pause μετά από 429 Retry-After.
+    """
+
+    __slots__ = ("sem", "rate", "burst", "tokens", "updated", "paused_until")
+
+    def __init__(self, concurrency: int = PUSH_HOST_CONCURRENCY,
+                 rate: float = PUSH_HOST_RATE, burst: float = PUSH_HOST_BURST):
+        self.sem = asyncio.Semaphore(concurrency)
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    async def wait(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            if self.rate <= 0:
+                return
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class _Notification:
+    """ Τα alerts ενός match μέσα στο coalesce window → ένα push. """
+
+    __slots__ = ("match_id", "league", "teams", "score", "minute", "alerts", "first_at")
+
+    def __init__(self, match_id: str, league: Optional[str]):
+        self.match_id = match_id
+        self.league = league
+        self.teams: List[str] = []
+        self.score = 0
+        self.minute = None
+        self.alerts = 0
+        self.first_at = time.monotonic()
+
+    def merge(self, score: int, rows: List[Dict[str, Any]]):
+        self.score = max(self.score, score)
+        self.alerts += len(rows)
+        for row in rows:
+            team = row.get("team")
+            if team and team not in self.teams:
+                self.teams.append(team)
+            if row.get("minute") is not None:
+                self.minute = row["minute"]
+            self.league = self.league or row.get("league")
+
+    def payload(self) -> bytes:
+        level = sum(self.score >= t for t in ALERT_THRESHOLDS)
+        return json.dumps({
+            "type": "smartmoney",
+            "match_id": self.match_id,
+            "league": self.league,
+            "teams": self.teams[:6],
+            "score": self.score,
+            "level": ALERT_LEVELS[level],
+            "minute": self.minute,
+            "alerts": self.alerts,
+            "url": "/smartmoney",
+        }, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def headers(self) -> Dict[str, str]:
+        # Topic: ο push service αντικαθιστά ό,τι δεν έχει παραδοθεί για το ίδιο match
+        topic = _b64(hashlib.sha256(self.match_id.encode()).digest())[:32]
+        return {
+            "TTL": str(PUSH_TTL),
+            "Topic": topic,
+            "Urgency": "high" if self.score >= ALERT_THRESHOLDS[-1] else "normal",
+        }
+
+
+class PushFanout:
+    """
+    Web Push (RFC 8030 / 8291 / 8292) για τα SmartMoney alerts:
+    - notify() από το event loop· alerts του ίδιου match μέσα στο
+      coalesce window γίνονται ένα notification
+    - Subscriptions σε σελίδες (keyset στο id)· η επόμενη σελίδα
+      διαβάζεται και κρυπτογραφείται σε thread όσο στέλνεται η τρέχουσα
+    - Keep-alive httpx pools (lanes), global concurrency cap και όρια ανά host
+    - 404 / 410 → batched DELETE από το push_subscriptions
+    - Χωρίς `cryptography` ή VAPID_PRIVATE_KEY δεν ξεκινάει (τα push services
+      απορρίπτουν pushes χωρίς VAPID)
+    """
+
+    def __init__(self, db_path: str = DB_PATH,
+                 window: float = PUSH_COALESCE_WINDOW,
+                 page_size: int = PUSH_PAGE_SIZE,
+                 concurrency: int = PUSH_CONCURRENCY,
+                 min_score: int = PUSH_MIN_SCORE,
+                 vapid_key: str = VAPID_PRIVATE_KEY):
+        self.db_path = db_path
+        self.window = window
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.min_score = min_score
+        # Το key φορτώνεται στο start() (lifespan), όχι στο import
+        self.vapid_key = vapid_key
+        self.vapid: Optional[_Vapid] = None
+
+        self.lanes: List[httpx.AsyncClient] = []
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, HostLimiter] = {}
+        self._pending: Dict[str, _Notification] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._gone: List[int] = []
+
+        self.notifications = 0
+        self.coalesced = 0
+        self.fanouts = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.pruned = 0
+        self.invalid = 0
+        self.subscriptions = 0
+        self.last_fanout_ms = 0.0
+        self.last_delivery_ms = 0.0
+        self.last_rate = 0.0
+        self.latency = LatencyHistogram()
+
+    @property
+    def encrypted(self) -> bool:
+        return ec is not None
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self):
+        if self._task is not None or not PUSH_ENABLED:
+            return
+        if ec is None:
+            print("[PushFanout] ⚠ 'cryptography' is not installed, web push disabled")
+            return
+        if self.vapid is None:
+            self.vapid = _Vapid.load(self.vapid_key)
+        if self.vapid is None:
+            print("[PushFanout] ⚠ VAPID_PRIVATE_KEY missing or invalid, web push disabled")
+            return
+        per_lane = max(1, PUSH_LANE_CONNECTIONS)
+        self.lanes = [
+            httpx.AsyncClient(
+                timeout=httpx.Timeout(PUSH_TIMEOUT),
+                limits=httpx.Limits(max_connections=per_lane, max_keepalive_connections=per_lane),
+            )
+            for _ in range(max(1, -(-self.concurrency // per_lane)))
+        ]
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._ready = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._pending.clear()
+        if self._gone:
+            await asyncio.to_thread(self._prune)
+        for client in self.lanes:
+            await client.aclose()
+        self.lanes = []
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ------------------------------------------------------------
+    # Producer side (event loop)
+    # ------------------------------------------------------------
+    def notify(self, market: Dict[str, Any], score: int, rows: List[Dict[str, Any]]):
+        """ Από το LivePoller.persist_alerts, μόνο όταν άλλαξε το score του market. """
+        if self._task is None or score < self.min_score or not rows:
+            return
+        match_id = str(rows[0].get("match_id") or market.get("market_id"))
+
+        pending = self._pending.get(match_id)
+        if pending is None:
+            pending = self._pending[match_id] = _Notification(match_id, market.get("competition"))
+            asyncio.get_running_loop().call_later(self.window, self._release, match_id)
+        else:
+            self.coalesced += 1
+        pending.merge(score, rows)
+
+    def _release(self, match_id: str):
+        pending = self._pending.pop(match_id, None)
+        if pending is not None and self._ready is not None:
+            self._ready.put_nowait(pending)
+
+    async def _run(self):
+        while True:
+            batch = [await self._ready.get()]
+            while not self._ready.empty():
+                batch.append(self._ready.get_nowait())
+            try:
+                await self.fanout(batch)
+            except Exception as e:
+                print(f"[PushFanout] ❌ Fan-out error: {e}")
+
+    # ------------------------------------------------------------
+    # Fan-out
+    # ------------------------------------------------------------
+    async def fanout(self, notifications: List[_Notification]) -> Dict[str, Any]:
+        """ Ένα πέρασμα στα subscriptions για όλα τα έτοιμα notifications. """
+        t0 = time.perf_counter()
+        sent0, failed0, pruned0 = self.sent, self.failed, self.pruned
+        payloads = [(n.payload(), n.headers()) for n in notifications]
+        self.notifications += len(notifications)
+
+        subscriptions = 0
+        next_page = asyncio.create_task(asyncio.to_thread(self._prepare_page, 0, payloads))
+        while True:
+            page, last_id, invalid = await next_page
+            self.invalid += len(invalid)
+            self._gone.extend(invalid)
+            if not page and not invalid:
+                break
+            subscriptions += len(page) // max(1, len(payloads))
+            next_page = asyncio.create_task(asyncio.to_thread(self._prepare_page, last_id, payloads))
+            await asyncio.gather(*(self._send(*req) for req in page))
+            if len(self._gone) >= PUSH_PRUNE_BATCH:
+                await asyncio.to_thread(self._prune)
+
+        if self._gone:
+            await asyncio.to_thread(self._prune)
+
+        elapsed = time.perf_counter() - t0
+        self.fanouts += 1
+        self.subscriptions = subscriptions
+        self.last_fanout_ms = elapsed * 1000
+        # Από το πρώτο alert (πριν το coalescing) ως την τελευταία παράδοση
+        self.last_delivery_ms = (time.monotonic() - min(n.first_at for n in notifications)) * 1000
+        delivered = self.sent - sent0
+        self.last_rate = delivered / elapsed if elapsed > 0 else 0.0
+        return {
+            "notifications": len(notifications),
+            "subscriptions": subscriptions,
+            "sent": delivered,
+            "failed": self.failed - failed0,
+            "pruned": self.pruned - pruned0,
+            "elapsed_ms": round(self.last_fanout_ms, 3),
+        }
+
+    def _prepare_page(self, after_id: int, payloads: List[Tuple[bytes, Dict[str, str]]]):
+        """ Thread: μία σελίδα subscriptions → έτοιμα (id, endpoint, body, headers) + άκυρα ids. """
+        with self._db_lock:
+            rows = self._db().execute(SELECT_SQL, (after_id, self.page_size)).fetchall()
+        if not rows:
+            return [], after_id, []
+
+        out, invalid = [], []
+        for sub_id, endpoint, p256dh, auth in rows:
+            try:
+                keys = _recipient_keys(p256dh, auth)
+            except ValueError:
+                invalid.append(sub_id)
+                continue
+
+            auth_header = self.vapid.header(endpoint)
+            for body, headers in payloads:
+                headers = {
+                    **headers,
+                    "Authorization": auth_header,
+                    "Content-Encoding": "aes128gcm",
+                    "Content-Type": "application/octet-stream",
+                }
+                out.append((sub_id, endpoint, encrypt(body, *keys), headers))
+        return out, rows[-1][0], invalid
+
+    async def _send(self, sub_id: int, endpoint: str, body: bytes, headers: Dict[str, str]):
+        host = urlsplit(endpoint).netloc
+        client = self.lanes[sub_id % len(self.lanes)]
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = HostLimiter()
+
+        # Πρώτα το όριο του host, ώστε ένας αργός host να μην κρατάει global slots
+        async with limiter.sem:
+            for attempt in range(PUSH_RETRIES + 1):
+                await limiter.wait()
+                async with self._sem:
+                    t0 = time.perf_counter()
+                    try:
+                        resp = await client.post(endpoint, content=body, headers=headers)
+                    except httpx.HTTPError:
+                        # Connect error / timeout: ξαναδοκιμάζεται όπως ένα 5xx
+                        resp = status = None
+                    else:
+                        status = resp.status_code
+                    self.latency.observe((time.perf_counter() - t0) * 1000)
+
+                if status is not None and 200 <= status < 300:
+                    self.sent += 1
+                    return
+                if status in GONE_STATUSES:
+                    self._gone.append(sub_id)
+                    return
+                if (status is not None and status not in RETRY_STATUSES) or attempt == PUSH_RETRIES:
+                    break
+                self.retries += 1
+                limiter.pause(_retry_after(resp))
+        self.failed += 1
+
+    # ------------------------------------------------------------
+    # SQLite (πάντα από thread)
+    # ------------------------------------------------------------
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+        return self._conn
+
+    def _prune(self):
+        gone, self._gone = sorted(set(self._gone)), []
+        if not gone:
+            return
+        with self._db_lock:
+            conn = self._db()
+            try:
+                conn.execute("BEGIN")
+                conn.executemany(DELETE_SQL, [(i,) for i in gone])
+                conn.execute("COMMIT")
+                self.pruned += len(gone)
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                print(f"[PushFanout] ❌ Prune error ({len(gone)} endpoints): {e}")
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": int(self._task is not None),
+            "encrypted": int(self.encrypted),
+            "pending": len(self._pending),
+            "notifications": self.notifications,
+            "coalesced": self.coalesced,
+            "fanouts": self.fanouts,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "pruned": self.pruned,
+            "invalid": self.invalid,
+            "subscriptions": self.subscriptions,
+            "hosts": len(self._hosts),
+            "lanes": len(self.lanes),
+            "last_fanout_ms": round(self.last_fanout_ms, 3),
+            "last_delivery_ms": round(self.last_delivery_ms, 3),
+            "last_rate": round(self.last_rate, 1),
+            "latency_ms": {
+                k: v for k, v in self.latency.snapshot().items()
+                if k.endswith("_ms") and v is not None
+            },
+        }
+
+
+# ------------------------------------------------------------
+# VAPID (RFC 8292)
+# ------------------------------------------------------------
+class _Vapid:
+    """ ES256 JWT ανά audience (origin του push service), cached ως τη λήξη του. """
+
+    def __init__(self, private_key):
+        self.key = private_key
+        public = private_key.public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+        )
+        self.public_key = _b64(public)
+        self._tokens: Dict[str, Tuple[float, str]] = {}
+
+    @classmethod
+    def load(cls, value: str) -> Optional["_Vapid"]:
+        if not value or ec is None:
+            return None
+        try:
+            if "BEGIN" in value:
+                key = serialization.load_pem_private_key(value.encode(), password=None)
+            else:
+                key = ec.derive_private_key(
+                    int.from_bytes(_unb64(value), "big"), ec.SECP256R1()
+                )
+        except (ValueError, TypeError) as e:
+            print(f"[PushFanout] ❌ Invalid VAPID_PRIVATE_KEY: {e}")
+            return None
+        return cls(key)
+
+    def header(self, endpoint: str) -> str:
+        parts = urlsplit(endpoint)
+        audience = f"{parts.scheme}://{parts.netloc}"
+        now = time.time()
+        cached = self._tokens.get(audience)
+        if cached is None or cached[0] - now < 3600:
+            exp = int(now) + VAPID_EXPIRY
+            cached = self._tokens[audience] = (exp, self._sign(audience, exp))
+        return f"vapid t={cached[1]}, k={self.public_key}"
+
+    def _sign(self, audience: str, exp: int) -> str:
+        header = _b64(b'{"typ":"JWT","alg":"ES256"}')
+        claims = _b64(json.dumps(
+            {"aud": audience, "exp": exp, "sub": VAPID_SUBJECT}, separators=(",", ":")
+        ).encode())
+        signing_input = f"{header}.{claims}".encode()
+        r, s = decode_dss_signature(self.key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        return f"{header}.{claims}.{_b64(r.to_bytes(32, 'big') + s.to_bytes(32, 'big'))}"
+
+
+# ------------------------------------------------------------
+# Payload encryption (RFC 8291, aes128gcm)
+# ------------------------------------------------------------
+_KEY_CACHE: Dict[Tuple[str, str], Tuple[Any, bytes, bytes]] = {}
+_KEY_CACHE_MAX = 100_000
+
+
+def _recipient_keys(p256dh: str, auth: str) -> Tuple[Any, bytes, bytes]:
+    """ (public key object, raw public key, auth secret), parsed μία φορά ανά subscription. """
+    cached = _KEY_CACHE.get((p256dh, auth))
+    if cached is not None:
+        return cached
+    try:
+        raw = _unb64(p256dh)
+        secret = _unb64(auth)
+        key = ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid subscription keys: {e}") from e
+    if len(secret) != 16:
+        raise ValueError("invalid auth secret length")
+    if len(_KEY_CACHE) >= _KEY_CACHE_MAX:
+        _KEY_CACHE.clear()
+    cached = _KEY_CACHE[(p256dh, auth)] = (key, raw, secret)
+    return cached
+
+
+def encrypt(payload: bytes, ua_key, ua_public: bytes, auth_secret: bytes) -> bytes:
+    """ Ένα record aes128gcm: νέο ephemeral key + salt ανά μήνυμα. """
+    as_private = ec.generate_private_key(ec.SECP256R1())
+    as_public = as_private.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    shared = as_private.exchange(ec.ECDH(), ua_key)
+
+    ikm = _hkdf(auth_secret, shared, b"WebPush: info\x00" + ua_public + as_public, 32)
+    salt = os.urandom(16)
+    prk = hmac.new(salt, ikm, hashlib.sha256).digest()
+    cek = _hkdf_expand(prk, b"Content-Encoding: aes128gcm\x00", 16)
+    nonce = _hkdf_expand(prk, b"Content-Encoding: nonce\x00", 12)
+
+    ciphertext = AESGCM(cek).encrypt(nonce, payload + b"\x02", None)
+    return salt + struct.pack(">IB", RECORD_SIZE, len(as_public)) + as_public + ciphertext
+
+
+def _hkdf(salt: bytes, ikm: bytes, info: bytes, length: int) -> bytes:
+    return _hkdf_expand(hmac.new(salt, ikm, hashlib.sha256).digest(), info, length)
+
+
+def _hkdf_expand(prk: bytes, info: bytes, length: int) -> bytes:
+    # length ≤ 32 → ένα block αρκεί
+    return hmac.new(prk, info + b"\x01", hashlib.sha256).digest()[:length]
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _unb64(value: str) -> bytes:
+    value = value.strip()
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _retry_after(resp: Optional[httpx.Response]) -> float:
+    value = resp.headers.get("retry-after") if resp is not None else None
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+# Singleton instance
+push_fanout = PushFanout()
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_push", push_fanout.stats(),
+    counters=("notifications", "coalesced", "fanouts", "sent", "failed",
+              "retries", "pruned", "invalid"),
+))
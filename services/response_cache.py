@@ -0,0 +1,184 @@
+# ============================================================
+# AI MATCHLAB — RESPONSE CACHE
+# Bounded TTL/LRU cache για τα JSON responses του Worker
+# ============================================================
+
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
+
+
+class CacheEntry:
+    """
+    Ένα cached response:
+    - data: το parsed JSON
+    - expires_at: πότε λήγει (monotonic)
+    - etag / last_modified: για conditional revalidation
+    """
+
+    __slots__ = ("data", "expires_at", "etag", "last_modified")
+
+    def __init__(self, data: Any, ttl: float,
+                 etag: Optional[str] = None,
+                 last_modified: Optional[str] = None):
+        self.data = data
+        self.expires_at = time.monotonic() + ttl
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def refresh(self, ttl: float):
+        self.expires_at = time.monotonic() + ttl
+
+
+class ResponseCache:
+    """
+    LRU cache με TTL ανά path prefix:
+    - ttl_rules: [("/api/live", 2.0), ("/api/fixtures", 60.0), ...]
+      (το μακρύτερο prefix κερδίζει)
+    - Upstream Cache-Control (max-age / no-cache / no-store) υπερισχύει
+    - Κρατάει και stale entries με ETag για revalidation (304)
+    """
+
+    def __init__(self, max_entries: int = 512, default_ttl: float = 0.0,
+                 ttl_rules: Optional[List[Tuple[str, float]]] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttl_rules = sorted(ttl_rules or [], key=lambda r: len(r[0]), reverse=True)
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self.stale_served = 0
+
+    # ------------------------------------------------------------
+    def ttl_for(self, path: str) -> float:
+        for prefix, ttl in self.ttl_rules:
+            if path.startswith(prefix):
+                return ttl
+        return self.default_ttl
+
+    # ------------------------------------------------------------
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """ Επιστρέφει το entry (fresh ή stale) και το κάνει most-recent. """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    # ------------------------------------------------------------
+    def put(self, key: str, data: Any, headers: Dict[str, str]) -> Optional[CacheEntry]:
+        """
+        Αποθηκεύει response σύμφωνα με το Cache-Control του upstream.
+        Επιστρέφει None αν το response δεν πρέπει να αποθηκευτεί.
+        """
+        ttl = self.resolve_ttl(key, headers)
+        if ttl is None:
+            self._entries.pop(key, None)
+            return None
+
+        entry = CacheEntry(
+            data, ttl,
+            etag=headers.get("etag"),
+            last_modified=headers.get("last-modified"),
+        )
+
+        # Χωρίς TTL και χωρίς validator δεν έχει νόημα να το κρατήσουμε
+        if ttl <= 0 and not entry.can_revalidate():
+            self._entries.pop(key, None)
+            return None
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return entry
+
+    # ------------------------------------------------------------
+    def resolve_ttl(self, key: str, headers: Dict[str, str]) -> Optional[float]:
+        """
+        None  → no-store (καμία αποθήκευση)
+        0     → no-cache (πάντα revalidation)
+        >0    → max-age ή το TTL του prefix
+        """
+        directives = parse_cache_control(headers.get("cache-control", ""))
+
+        if "no-store" in directives or "private" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0.0
+
+        max_age = directives.get("max-age")
+        if max_age is not None:
+            try:
+                return max(0.0, float(max_age))
+            except ValueError:
+                pass
+
+        return self.ttl_for(key)
+
+    # ------------------------------------------------------------
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "stale_served": self.stale_served,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """ "public, max-age=5" → {"public": None, "max-age": "5"} """
+    out: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip()] = v.strip().strip('"')
+        else:
+            out[part] = None
+    return out
+
+
+def parse_ttl_rules(spec: str) -> List[Tuple[str, float]]:
+    """ "/api/live=2,/api/fixtures=60" → [("/api/live", 2.0), ("/api/fixtures", 60.0)] """
+    rules = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item or "=" not in item:
+            continue
+        prefix, ttl = item.rsplit("=", 1)
+        try:
+            rules.append((prefix.strip(), float(ttl)))
+        except ValueError:
+            print(f"[ResponseCache] ⚠ Invalid TTL rule ignored: {item}")
+    return rules
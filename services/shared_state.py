@@ -0,0 +1,506 @@
+# ============================================================
+# AI MATCHLAB — SHARED STATE
+# Ένα ingest process → mmap snapshot (seqlock) → όλοι οι workers
+# ============================================================
+
+import asyncio
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Iterable, Optional, Callable, Tuple
+
+from config import configure_logging
+from .live_stream import live_hub, live_poller, TOPICS
+from .ingest_scheduler import ingest_scheduler
+from .provider_client import provider_client
+from .alert_sink import alert_sink
+from .feed_recorder import feed_recorder
+from .push_fanout import push_fanout
+from .warm_start import warm_start
+from .metrics import metrics, stats_families
+from .models import dumps, loads
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+# off → κάθε worker κάνει δικό του ingest (όπως πριν)
+# auto → ο πρώτος worker που παίρνει το lock γίνεται writer, οι υπόλοιποι readers
+# reader → ποτέ ingest (π.χ. όταν το ingest τρέχει σε ξεχωριστό process)
+SHARED_STATE_MODE = os.getenv("SHARED_STATE_MODE", "off").strip().lower()
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "").strip() or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+    "aimatchlab.snapshot",
+)
+SHARED_STATE_CAPACITY = int(os.getenv("SHARED_STATE_CAPACITY", 8 * 1024 * 1024))
+SHARED_STATE_INTERVAL = float(os.getenv("SHARED_STATE_INTERVAL", 0.25))
+
+ROLE_STANDALONE = "standalone"
+ROLE_WRITER = "writer"
+ROLE_READER = "reader"
+
+# magic, seq (μονός = εγγραφή σε εξέλιξη), payload length, capacity, hub seq, written_at,
+# index length (το index ακολουθεί το payload)
+_HEADER = struct.Struct("<8sQQQQdQ")
+HEADER_SIZE = 64
+MAGIC = b"AIMLSNP2"
+
+# Ένας reader ξαναδοκιμάζει τόσες φορές πριν παραιτηθεί για αυτό το tick
+_READ_RETRIES = 8
+
+
+class SnapshotFile:
+    """
+    Memory-mapped αρχείο με ένα JSON snapshot και seqlock header:
+    - Μετά το payload ένα μικρό JSON index (byte ranges ανά topic), ώστε
+      οι readers να κάνουν decode μόνο τα topics που χρειάζονται
+    - Ο writer κάνει seq μονό → γράφει payload → seq ζυγό
+    - Ο reader διαβάζει seq, το payload, ξανά seq· αν άλλαξε (ή ήταν
+      μονό) το αποτέλεσμα πετιέται και ξαναδιαβάζει
+    Οι readers δεν παίρνουν ποτέ lock, ο writer δεν περιμένει ποτέ.
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH, writable: bool = False,
+                 capacity: int = SHARED_STATE_CAPACITY):
+        self.path = path
+        self.writable = writable
+        self.capacity = capacity
+        self._fd: Optional[int] = None
+        self._mm: Optional[mmap.mmap] = None
+
+        self.writes = 0
+        self.reads = 0
+        self.retries = 0
+
+    # ------------------------------------------------------------
+    def open(self) -> bool:
+        """ False αν (reader) το αρχείο δεν έχει γραφτεί ακόμα. """
+        if self._mm is not None:
+            return True
+        try:
+            if self.writable:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                size = os.fstat(self._fd).st_size
+                if size < HEADER_SIZE + self.capacity:
+                    os.ftruncate(self._fd, HEADER_SIZE + self.capacity)
+                else:
+                    self.capacity = size - HEADER_SIZE
+                self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_WRITE)
+                self._init_header()
+            else:
+                self._fd = os.open(self.path, os.O_RDONLY)
+                if os.fstat(self._fd).st_size < HEADER_SIZE:
+                    self.close()
+                    return False
+                self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+                if self._mm[:8] != MAGIC:
+                    self.close()
+                    return False
+        except FileNotFoundError:
+            self.close()
+            return False
+        except OSError as e:
+            print(f"[SharedState] ⚠ Cannot open {self.path}: {e}")
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def _init_header(self):
+        magic, seq, length, _, hub_seq, written_at, index_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            seq, length, hub_seq, written_at, index_len = 0, 0, 0, 0.0, 0
+        # Writer που πέθανε στη μέση αφήνει μονό seq· κλείνουμε την εγγραφή
+        if seq % 2:
+            seq += 1
+        _HEADER.pack_into(
+            self._mm, 0, MAGIC, seq, length, self.capacity, hub_seq, written_at, index_len
+        )
+
+    # ------------------------------------------------------------
+    @property
+    def seq(self) -> int:
+        """ Φθηνός έλεγχος για αλλαγές (ένα unpack του header). """
+        if self._mm is None:
+            return 0
+        return _HEADER.unpack_from(self._mm, 0)[1]
+
+    def write(self, payload: bytes, hub_seq: int = 0, index: bytes = b""):
+        mm = self._mm
+        _, seq, _, capacity, _, _, _ = _HEADER.unpack_from(mm, 0)
+        length = len(payload)
+        end = length + len(index)
+
+        if end > capacity:
+            self._grow(end)
+            mm = self._mm
+            capacity = self.capacity
+
+        _HEADER.pack_into(mm, 0, MAGIC, seq + 1, 0, capacity, hub_seq, time.time(), 0)
+        mm[HEADER_SIZE:HEADER_SIZE + length] = payload
+        mm[HEADER_SIZE + length:HEADER_SIZE + end] = index
+        _HEADER.pack_into(
+            mm, 0, MAGIC, seq + 2, length, capacity, hub_seq, time.time(), len(index)
+        )
+        self.writes += 1
+
+    def _grow(self, needed: int):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        print(f"[SharedState] ⏳ Growing snapshot file to {capacity // 1024} KB")
+        self._mm.close()
+        os.ftruncate(self._fd, HEADER_SIZE + capacity)
+        self._mm = mmap.mmap(self._fd, 0, access=mmap.ACCESS_WRITE)
+        self.capacity = capacity
+
+    def read(self, parse: Callable[[memoryview, memoryview], Any]):
+        """
+        parse(memoryview του payload, memoryview του index) χωρίς αντιγραφή·
+        το αποτέλεσμα ισχύει μόνο αν το seq δεν άλλαξε στο μεταξύ.
+        Επιστρέφει (seq, αποτέλεσμα) ή (0, None).
+        """
+        for _ in range(_READ_RETRIES):
+            magic, seq, length, capacity, _, _, index_len = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or seq == 0:
+                return 0, None
+            if seq % 2:
+                self.retries += 1
+                continue
+            if HEADER_SIZE + capacity > len(self._mm):
+                # Ο writer μεγάλωσε το αρχείο
+                self.close()
+                if not self.open():
+                    return 0, None
+                continue
+
+            end = HEADER_SIZE + length
+            try:
+                with memoryview(self._mm) as mv:
+                    result = parse(mv[HEADER_SIZE:end], mv[end:end + index_len])
+            except (ValueError, KeyError, TypeError):
+                result = None
+
+            if _HEADER.unpack_from(self._mm, 0)[1] == seq and result is not None:
+                self.reads += 1
+                return seq, result
+            self.retries += 1
+        return 0, None
+
+    def info(self) -> Dict[str, Any]:
+        if self._mm is None:
+            return {}
+        _, seq, length, capacity, hub_seq, written_at, _ = _HEADER.unpack_from(self._mm, 0)
+        return {
+            "seq": seq,
+            "bytes": length,
+            "capacity": capacity,
+            "hub_seq": hub_seq,
+            "age_s": round(time.time() - written_at, 3) if written_at else None,
+        }
+
+
+class SharedState:
+    """
+    Ρόλοι ανά process (gunicorn workers):
+    - writer: κάνει upstream polling / analysis και δημοσιεύει το
+      LiveHub snapshot στο SnapshotFile όταν αλλάζει το hub.seq
+    - reader: κανένα upstream fetch· σερβίρει το snapshot κατευθείαν από
+      το mmap και γεμίζει το δικό του LiveHub μόνο για SSE / WS / filters,
+      με decode μόνο των topics που ζητήθηκαν και άλλαξαν
+    Σε mode "auto" ο writer ορίζεται από ένα flock· αν πεθάνει, ο πρώτος
+    reader που θα πάρει το lock γίνεται writer (on_promote).
+    """
+
+    def __init__(self, hub, mode: str = SHARED_STATE_MODE, path: str = SHARED_STATE_PATH,
+                 interval: float = SHARED_STATE_INTERVAL):
+        self.hub = hub
+        self.mode = mode if mode in ("off", "auto", "reader") else "off"
+        self.path = path
+        self.interval = interval
+        self.role = ROLE_STANDALONE
+
+        self.file: Optional[SnapshotFile] = None
+        self._lock_fd: Optional[int] = None
+        self._on_promote: Optional[Callable[[], None]] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._written_hub_seq = -1
+        # Writer: topic → (topic seq, encoded items) για encode μόνο των topics που άλλαξαν
+        self._encoded: Dict[str, Tuple[int, bytes]] = {}
+        # Ταυτότητα writer στο index: τα topic seqs δύο writers δεν συγκρίνονται
+        self._writer_id = ""
+        # Reader: topic → (writer id, topic seq) που εφαρμόστηκε στο hub
+        # και topic → file seq του τελευταίου ελέγχου
+        self._applied: Dict[str, tuple] = {}
+        self._checked: Dict[str, int] = {}
+        self._applied_seq = 0
+        self.decodes = 0
+        self.promotions = 0
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self, on_promote: Callable[[], None]):
+        """ on_promote: ξεκινάει το ingest σε αυτό το process. """
+        self._on_promote = on_promote
+        if self.mode == "off":
+            on_promote()
+            return
+
+        if self.mode == "auto" and (self._lock_fd is not None or self._try_lock()):
+            self._become_writer()
+        else:
+            self.role = ROLE_READER
+            self.file = SnapshotFile(self.path)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.role == ROLE_WRITER:
+            self.publish()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+        self.role = ROLE_STANDALONE
+
+    @property
+    def owns_ingest(self) -> bool:
+        return self.role in (ROLE_STANDALONE, ROLE_WRITER)
+
+    def _try_lock(self) -> bool:
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _become_writer(self):
+        # Συνέχεια από το τελευταίο snapshot, ώστε οι readers να μη δουν
+        # άδειο state μέχρι το πρώτο poll του νέου writer
+        if self.file is None:
+            self.file = SnapshotFile(self.path)
+        self.apply_to_hub(stale=True)
+        self.file.close()
+
+        self.file = SnapshotFile(self.path, writable=True)
+        self.file.open()
+        self._writer_id = f"{os.getpid()}:{time.time()}"
+        self._encoded.clear()
+        self.role = ROLE_WRITER
+        self._written_hub_seq = self.hub.seq if self._applied_seq else -1
+        print(f"[SharedState] ✅ pid {os.getpid()} is the ingest writer ({self.path})")
+        if self._on_promote is not None:
+            self._on_promote()
+
+    # ------------------------------------------------------------
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self.role == ROLE_WRITER:
+                    self.publish()
+                else:
+                    if self.mode == "auto" and self._try_lock():
+                        self.promotions += 1
+                        self._become_writer()
+                        continue
+                    if self.hub.subscribers:
+                        self.apply_to_hub(self.hub.subscribed_topics())
+            except Exception as e:
+                print(f"[SharedState] ❌ {self.role} sync error: {e}")
+
+    # ------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------
+    def publish(self):
+        """
+        Γράφει το snapshot μόνο αν το hub άλλαξε από την τελευταία φορά.
+        Ίδιο JSON με το hub.snapshot(), αλλά κάθε topic γίνεται encode μόνο
+        όταν άλλαξαν τα items του· το index κρατάει το byte range του.
+        """
+        hub = self.hub
+        if hub.seq == self._written_hub_seq:
+            return
+
+        stale = sorted(hub.stale)
+        parts = [b'{"type":"snapshot","seq":%d,"topics":{' % hub.seq]
+        pos = len(parts[0])
+        ranges = {}
+        for i, topic in enumerate(TOPICS):
+            topic_seq = hub.topic_seq[topic]
+            cached = self._encoded.get(topic)
+            if cached is None or cached[0] != topic_seq:
+                cached = self._encoded[topic] = (topic_seq, dumps(hub.items(topic)))
+            key = (b"," if i else b"") + dumps(topic) + b":"
+            start = pos + len(key)
+            parts += (key, cached[1])
+            pos = start + len(cached[1])
+            ranges[topic] = [start, pos, topic_seq]
+        parts.append(b'},"stale":' + dumps(stale) + b"}")
+
+        index = dumps({"writer": self._writer_id, "topics": ranges, "stale": stale})
+        self.file.write(b"".join(parts), hub.seq, index)
+        self._written_hub_seq = hub.seq
+
+    # ------------------------------------------------------------
+    # Reader
+    # ------------------------------------------------------------
+    def read_raw(self) -> Optional[bytes]:
+        """ Τα bytes του πλήρους snapshot (ένα memcpy, χωρίς decode / encode). """
+        if self.file is None or not self.file.open():
+            return None
+        return self.file.read(lambda payload, index: bytes(payload))[1]
+
+    def apply_to_hub(self, topics: Iterable[str] = (), stale: bool = False):
+        """
+        Φέρνει το τοπικό LiveHub στο τελευταίο snapshot (diffs προς τους subscribers).
+        topics: μόνο αυτά γίνονται decode, και μόνο αν άλλαξαν.
+        Τα stale topics του writer μένουν stale· stale=True για snapshot
+        από προηγούμενο writer (νέος writer, πριν το πρώτο poll).
+        """
+        if self.file is None or not self.file.open():
+            return
+        # Όπως το Subscription: κενό (ή μόνο άγνωστα topics) = όλα
+        topics = set(topics)
+        wanted = [t for t in TOPICS if t in topics] or list(TOPICS)
+        seq = self.file.seq
+        if all(self._checked.get(t) == seq for t in wanted):
+            return
+
+        def parse(payload: memoryview, index: memoryview):
+            idx = loads(index)
+            decoded = {}
+            for topic in wanted:
+                start, end, topic_seq = idx["topics"][topic]
+                version = (idx["writer"], topic_seq)
+                if self._applied.get(topic) != version:
+                    decoded[topic] = (version, loads(payload[start:end]))
+            return idx, decoded
+
+        seq, result = self.file.read(parse)
+        if result is None:
+            return
+        idx, decoded = result
+        stale_topics = set(idx["stale"])
+        for topic in TOPICS:
+            if topic in decoded:
+                version, items = decoded[topic]
+                self.hub.publish(
+                    topic, items, replace=True,
+                    stale=(stale and bool(items)) or topic in stale_topics,
+                )
+                self._applied[topic] = version
+                self.decodes += 1
+                continue
+            # Items που δεν ζητήθηκαν / δεν άλλαξαν: μόνο το stale flag
+            flag = (stale and bool(self.hub.items(topic))) or topic in stale_topics
+            if flag != (topic in self.hub.stale):
+                self.hub.publish(topic, {}, stale=flag)
+        for topic in wanted:
+            self._checked[topic] = seq
+        self._applied_seq = seq
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        out = {
+            "mode": self.mode,
+            "role": self.role,
+            "pid": os.getpid(),
+            "promotions": self.promotions,
+        }
+        if self.file is not None:
+            out.update({
+                "writes": self.file.writes,
+                "reads": self.file.reads,
+                "decodes": self.decodes,
+                "retries": self.file.retries,
+                "file": self.file.info(),
+            })
+        return out
+
+
+# Singleton instance
+shared_state = SharedState(live_hub)
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_shared_state",
+    {k: v for k, v in shared_state.stats().items() if k not in ("mode", "role", "pid")},
+    counters=("writes", "reads", "decodes", "retries", "promotions"),
+))
+
+
+# ------------------------------------------------------------
+# Lifecycle (κοινό για το main.py lifespan και το standalone ingest)
+# ------------------------------------------------------------
+def start_ingest():
+    """ Upstream polling σε αυτό το process (standalone ή shared-state writer). """
+    feed_recorder.start()
+    ingest_scheduler.start()
+    live_poller.start()
+    push_fanout.start()
+
+
+@asynccontextmanager
+async def ingest_lifecycle(state: SharedState):
+    """
+    Logging, warm start, clients και threads· το ingest ξεκινάει μόνο
+    όταν το process είναι standalone ή writer (on_promote).
+    """
+    configure_logging()
+    await warm_start.restore()
+    await provider_client.start()
+    alert_sink.start(lambda: state.owns_ingest)
+    state.start(on_promote=start_ingest)
+    warm_start.start(lambda: state.owns_ingest)
+    try:
+        yield state
+    finally:
+        await live_poller.stop()
+        await ingest_scheduler.stop()
+        await push_fanout.stop()
+        await warm_start.stop()
+        await state.stop()
+        await provider_client.close()
+        await asyncio.to_thread(feed_recorder.stop)
+        await asyncio.to_thread(alert_sink.stop)
+
+
+# ------------------------------------------------------------
+# Standalone ingest process
+# SHARED_STATE_MODE=reader στους web workers + `python -m services.shared_state`
+# ------------------------------------------------------------
+async def run_ingest():
+    state = SharedState(live_hub, mode="auto")
+    while not state._try_lock():
+        print(f"[SharedState] ⏳ Waiting for {state.path}.lock")
+        await asyncio.sleep(5)
+
+    async with ingest_lifecycle(state):
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_ingest())
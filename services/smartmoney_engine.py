@@ -3,8 +3,30 @@
 # Ελαφρύς εντοπισμός patterns & scoring
 # ============================================================
 
+import os
+import datetime as dt
 from typing import Dict, Any, List, Optional
+
+import numpy as np
+
 from .exchange_engine import exchange_engine
+from .ladder import market_ladder_aggregates
+from .market_batch import (
+    aggregate_runners, MOVEMENT_BACK, MOVEMENT_LAY, VOLATILITY_SPREAD,
+)
+from .movement_store import movement_store
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις movement (βλ. README: >5% σε 10 λεπτά)
+# ------------------------------------------------------------
+DRIFT_WINDOW = float(os.getenv("SMARTMONEY_DRIFT_WINDOW", 600))
+DRIFT_THRESHOLD = float(os.getenv("SMARTMONEY_DRIFT_THRESHOLD", 0.05))
+SPIKE_THRESHOLD = float(os.getenv("SMARTMONEY_SPIKE_THRESHOLD", 2.0))
+
+# Alert levels (ίδια όρια με το generate_alerts)
+ALERT_THRESHOLDS = (20, 40, 70)
+ALERT_LEVELS = ("none", "mild_activity", "increasing_pressure", "possible_sharp_move")
 
 
 class SmartMoneyEngine:
@@ -12,7 +34,9 @@ class SmartMoneyEngine:
     Απλό αλλά αξιόπιστο SmartMoney scoring:
     - Έντονη διαφορά μεταξύ back & lay
     - Πίεση προς ένα selection
+    - Πραγματική μεταβολή odds στο χρόνο (movement_store)
     - Spike στο matched volume
+    - Μονόπλευρο βιβλίο (ladder imbalance)
     """
 
     # ------------------------------------------------------------
@@ -26,8 +50,12 @@ class SmartMoneyEngine:
         if not market:
             return None
 
+        movement_store.record_market(market)
+
         runners = market["runners"]
-        score = self.score_runners(runners)
+        score = self.score_runners(
+            runners, market_id=market["market_id"], raw_runners=raw_market.get("runners") or [],
+        )
         alerts = self.generate_alerts(score)
 
         return {
@@ -40,34 +68,39 @@ class SmartMoneyEngine:
         }
 
     # ------------------------------------------------------------
-    def score_runners(self, runners: List[Dict[str, Any]]) -> int:
+    def score_runners(self, runners: List[Dict[str, Any]],
+                      market_id: Optional[str] = None,
+                      raw_runners: Optional[List[Dict[str, Any]]] = None) -> int:
         """
         Υπολογισμός SmartMoney Score (0–100)
         Αξιολογεί πίεση, odds movement και σχετική ισορροπία.
+        Με market_id χρησιμοποιεί και το ιστορικό του movement_store,
+        με raw_runners και το ladder imbalance (ίδιο score με το AnalysisPipeline).
         """
 
-        back_pressure = 0
-        lay_pressure = 0
-        volatility = 0
-
-        for r in runners:
-            mv = r.get("movement", "none")
+        agg = aggregate_runners(runners)
+        if market_id is not None:
+            agg.update(self.movement_aggregates(market_id, runners))
+        if raw_runners is not None:
+            agg["imbalanced"] = market_ladder_aggregates(raw_runners).get("imbalanced", 0)
+        return self.score_from_aggregates(agg)
 
-            if mv == "pressure_to_back":
-                back_pressure += 1
-            elif mv == "pressure_to_lay":
-                lay_pressure += 1
+    # ------------------------------------------------------------
+    def score_from_aggregates(self, agg: Dict[str, int]) -> int:
+        """
+        Score από έτοιμα shared aggregates
+        (χρησιμοποιείται από το AnalysisPipeline).
+        """
 
-            # Volatility indicator (αν back/lay απέχουν πολύ)
-            bo = r.get("back_odds")
-            lo = r.get("lay_odds")
-            if bo and lo:
-                diff = abs(bo - lo)
-                if diff >= 0.5:
-                    volatility += 1
+        back_pressure = agg["back_pressure"]
+        lay_pressure = agg["lay_pressure"]
+        volatility = agg["volatility"]
+        drifting = agg.get("drifting", 0)
+        volume_spikes = agg.get("volume_spikes", 0)
+        imbalanced = agg.get("imbalanced", 0)
 
         # Βασική λογική scoring:
-        base = back_pressure + lay_pressure + volatility
+        base = back_pressure + lay_pressure + volatility + drifting + volume_spikes + imbalanced
 
         if base == 0:
             return 0
@@ -76,6 +109,123 @@ class SmartMoneyEngine:
         score = min(100, base * 10)
         return score
 
+    # ------------------------------------------------------------
+    # Bulk scoring (columnar)
+    # ------------------------------------------------------------
+    def score_markets(self, batch: Any,
+                      drifting: Optional[np.ndarray] = None,
+                      spiking: Optional[np.ndarray] = None,
+                      imbalanced: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        Vectorized score_runners για όλα τα markets μαζί.
+        batch: MarketBatch ή mapping με columns ανά runner
+        (market_index, back_price, lay_price, movement) και προαιρετικά
+        n_markets / market_ids. drifting / spiking / imbalanced: bool ανά runner
+        (slot_movement / ladder_aggregates "runner_imbalanced"), αλλιώς 0.
+
+        Επιστρέφει compact arrays ανά market (score, pressures, volatility,
+        alert level 0–3) και τα market ids που πέρασαν όριο alert.
+        """
+        cols = _batch_columns(batch)
+        idx = cols["market_index"]
+        n = cols["n_markets"]
+        bp, lp, mv = cols["back_price"], cols["lay_price"], cols["movement"]
+
+        back_pressure = np.bincount(idx, weights=(mv == MOVEMENT_BACK), minlength=n)
+        lay_pressure = np.bincount(idx, weights=(mv == MOVEMENT_LAY), minlength=n)
+
+        with np.errstate(invalid="ignore"):
+            volatile = (np.abs(bp - lp) >= VOLATILITY_SPREAD) & (bp != 0) & (lp != 0)
+        volatility = np.bincount(idx, weights=volatile, minlength=n)
+
+        base = back_pressure + lay_pressure + volatility
+        if drifting is not None:
+            base += np.bincount(idx, weights=drifting, minlength=n)
+        if spiking is not None:
+            base += np.bincount(idx, weights=spiking, minlength=n)
+        if imbalanced is not None:
+            base += np.bincount(idx, weights=imbalanced, minlength=n)
+
+        scores = np.minimum(100, base * 10).astype(np.int16)
+        levels = np.searchsorted(
+            np.asarray(ALERT_THRESHOLDS), scores, side="right"
+        ).astype(np.int8)
+
+        alerting = np.flatnonzero(levels > 0)
+        ids = cols["market_ids"]
+
+        return {
+            "scores": scores,
+            "back_pressure": back_pressure.astype(np.int32),
+            "lay_pressure": lay_pressure.astype(np.int32),
+            "volatility": volatility.astype(np.int32),
+            "alert_levels": levels,
+            "alert_index": alerting,
+            "alert_market_ids": [ids[i] for i in alerting.tolist()] if ids is not None else None,
+        }
+
+    @staticmethod
+    def alerts_for_level(level: int) -> List[str]:
+        """ Alert level (0–3) → η λίστα του generate_alerts. """
+        return [ALERT_LEVELS[k] for k in range(int(level), 0, -1)]
+
+    # ------------------------------------------------------------
+    # Movement over time
+    # ------------------------------------------------------------
+    def runner_movement(self, market_id: str, runners: List[Dict[str, Any]],
+                        now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Για κάθε runner: μεταβολή best back μέσα στο DRIFT_WINDOW,
+        σχετική μεταβολή και volume spike rate (0 αν δεν υπάρχει ιστορικό).
+        now: runners χωρίς sample μέσα στο DRIFT_WINDOW πριν από το now
+        δεν μετράνε ως drifting / spiking (incremental ingestion).
+        """
+        slots = movement_store.lookup_slots(
+            market_id, [r.get("selection_id") for r in runners]
+        )
+        return self.slot_movement(slots, now)
+
+    def slot_movement(self, slots: np.ndarray, now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """ Ίδιο με runner_movement, για έτοιμα slots (-1 = χωρίς ιστορικό). """
+        known = slots >= 0
+        delta = np.zeros(len(slots))
+        spike = np.zeros(len(slots))
+        latest = np.zeros(len(slots))
+
+        if known.any():
+            delta[known] = movement_store.price_deltas(slots[known], DRIFT_WINDOW)
+            spike[known] = movement_store.volume_spike_rates(slots[known], DRIFT_WINDOW)
+            latest[known] = movement_store.latest_back(slots[known])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ref = latest - delta
+            rel = np.where(ref > 0, delta / ref, 0.0)
+
+        delta = np.nan_to_num(delta)
+        rel = np.nan_to_num(rel)
+        drifting = np.abs(rel) >= DRIFT_THRESHOLD
+        spiking = spike >= SPIKE_THRESHOLD
+        if now is not None:
+            fresh = np.zeros(len(slots), dtype=bool)
+            fresh[known] = movement_store.last_seen[slots[known]] >= now - DRIFT_WINDOW
+            drifting &= fresh
+            spiking &= fresh
+        return {
+            "delta": delta,
+            "relative": rel,
+            "spike": spike,
+            "drifting": drifting,
+            "spiking": spiking,
+        }
+
+    def movement_aggregates(self, market_id: str, runners: List[Dict[str, Any]],
+                            now: Optional[float] = None) -> Dict[str, int]:
+        mv = self.runner_movement(market_id, runners, now)
+        return {
+            "drifting": int(np.count_nonzero(mv["drifting"])),
+            "volume_spikes": int(np.count_nonzero(mv["spiking"])),
+        }
+
     # ------------------------------------------------------------
     def generate_alerts(self, score: int) -> List[str]:
         """
@@ -95,6 +245,67 @@ class SmartMoneyEngine:
 
         return alerts
 
+    # ------------------------------------------------------------
+    def alert_rows(self, market: Dict[str, Any], score: int,
+                   minute: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Γραμμές για τον πίνακα smartmoney_alerts:
+        ένας runner ανά γραμμή, με delta_odds = πραγματική μεταβολή
+        back price στο παράθυρο και intensity = volume spike rate.
+        Μόνο όταν το score φτάνει σε alert και ο runner έχει κινηθεί.
+        minute: λεπτό του match (από το live feed)· τα markets δεν το έχουν.
+        """
+        if score < 20:
+            return []
+
+        runners = market.get("runners", [])
+        mv = self.runner_movement(market["market_id"], runners)
+        # Ίδια μορφή με το SQLite CURRENT_TIMESTAMP / τα υπάρχοντα rows (κενό, όχι "T")
+        now = dt.datetime.utcnow().isoformat(sep=" ")
+
+        rows = []
+        for k, r in enumerate(runners):
+            if not (mv["drifting"][k] or mv["spiking"][k]):
+                continue
+
+            rows.append({
+                "match_id": market.get("event_id") or market["market_id"],
+                "league": market.get("competition"),
+                "team": r.get("name"),
+                "event_time": now,
+                "minute": minute if minute is not None else market.get("minute"),
+                "delta_odds": round(float(mv["delta"][k]), 4),
+                "intensity": round(float(mv["spike"][k]), 4),
+            })
+
+        return rows
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _batch_columns(batch: Any) -> Dict[str, Any]:
+    """ MarketBatch ή dict από columns → ενιαίο σχήμα για το score_markets. """
+    if isinstance(batch, dict):
+        get = batch.get
+    else:
+        get = lambda k, d=None: getattr(batch, k, d)
+
+    idx = np.asarray(get("market_index"), dtype=np.int64)
+    ids = get("market_ids")
+    n = get("n_markets")
+    if n is None:
+        n = len(ids) if ids is not None else (int(idx.max()) + 1 if len(idx) else 0)
+
+    return {
+        "market_index": idx,
+        "back_price": np.asarray(get("back_price"), dtype=np.float64),
+        "lay_price": np.asarray(get("lay_price"), dtype=np.float64),
+        "movement": np.asarray(get("movement"), dtype=np.int8),
+        "market_ids": ids,
+        "n_markets": n,
+    }
+
 
 # Singleton instance
 smartmoney_engine = SmartMoneyEngine()
@@ -0,0 +1,305 @@
+# ============================================================
+# AI MATCHLAB — TRANSPORT
+# Retries, circuit breakers, hedging & latency histograms για upstream GETs
+# ============================================================
+
+import asyncio
+import os
+import random
+import time
+from bisect import bisect_left
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+MAX_CONNECTIONS = int(os.getenv("WORKER_MAX_CONNECTIONS", 100))
+MAX_KEEPALIVE = int(os.getenv("WORKER_MAX_KEEPALIVE", 20))
+KEEPALIVE_EXPIRY = float(os.getenv("WORKER_KEEPALIVE_EXPIRY", 30.0))
+CONNECT_TIMEOUT = float(os.getenv("WORKER_CONNECT_TIMEOUT", 2.0))
+HTTP2 = os.getenv("WORKER_HTTP2", "0") == "1"
+
+RETRIES = int(os.getenv("WORKER_RETRIES", 2))
+RETRY_BACKOFF = float(os.getenv("WORKER_RETRY_BACKOFF", 0.1))
+RETRY_BUDGET_RATIO = float(os.getenv("WORKER_RETRY_BUDGET_RATIO", 0.2))
+RETRY_BUDGET_MAX = float(os.getenv("WORKER_RETRY_BUDGET_MAX", 10.0))
+
+BREAKER_FAILURES = int(os.getenv("WORKER_BREAKER_FAILURES", 5))
+BREAKER_RESET = float(os.getenv("WORKER_BREAKER_RESET", 15.0))
+
+HEDGE = os.getenv("WORKER_HEDGE", "1") == "1"
+HEDGE_MIN_SAMPLES = int(os.getenv("WORKER_HEDGE_MIN_SAMPLES", 20))
+
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Όρια buckets σε ms (Prometheus-style, σωρευτικά)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """ Ο breaker του host είναι ανοιχτός: fail fast χωρίς upstream request. """
+
+
+class LatencyHistogram:
+    """ Fixed-bucket histogram (ms) με εκτίμηση percentiles. """
+
+    __slots__ = ("counts", "count", "total_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """ Άνω όριο του bucket που περιέχει το q-percentile. """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip([*map(str, LATENCY_BUCKETS_MS), "+Inf"], self.counts)),
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket: κάθε request καταθέτει `ratio` tokens, κάθε retry ξοδεύει 1.
+    Έτσι τα retries δεν ξεπερνούν ~ratio του traffic όταν ο upstream πέφτει.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, max_tokens: float = RETRY_BUDGET_MAX):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    closed → (N συνεχόμενα failures) → open → (reset timeout) → half_open
+    half_open: ένα probe request· επιτυχία → closed, αποτυχία → open.
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._probe = False
+        if self.state == "half_open" and not self._probe:
+            self._probe = True
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probe = False
+
+    def release_probe(self):
+        """ Probe που δεν κατέληξε (cancel / άσχετο exception): επιτρέπεται νέο probe. """
+        if self.state == "half_open":
+            self._probe = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.max_failures:
+            if self.state != "open":
+                print(f"[Transport] 🔌 Circuit opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probe = False
+
+
+class ResilientTransport:
+    """
+    Τυλίγει ένα httpx.AsyncClient:
+    - Ρητά pool limits / keep-alive, προαιρετικά HTTP/2
+    - Jittered exponential retry μέσα σε retry budget
+    - Circuit breaker ανά host (fail fast)
+    - Hedged GET: δεύτερο request αν το πρώτο αργεί πάνω από το p95 του path
+    - Latency histogram ανά upstream path
+    """
+
+    def __init__(self, timeout: float, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or self._build_client(timeout)
+        self.budget = RetryBudget()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+        self.retries = 0
+        self.hedges = 0
+        self.errors: Dict[str, int] = {}
+
+    @staticmethod
+    def _build_client(timeout: float) -> httpx.AsyncClient:
+        http2 = HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("[Transport] ⚠ WORKER_HTTP2=1 but 'h2' is not installed, using HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout)),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            http2=http2,
+        )
+
+    # ------------------------------------------------------------
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).netloc
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker()
+        return breaker
+
+    def histogram_for(self, url: str) -> LatencyHistogram:
+        path = urlsplit(url).path or "/"
+        hist = self.histograms.get(path)
+        if hist is None:
+            hist = self.histograms[path] = LatencyHistogram()
+        return hist
+
+    def record_error(self, url: str, kind: str):
+        key = f"{urlsplit(url).path or '/'}:{kind}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+    # ------------------------------------------------------------
+    # GET με retries / breaker / hedging
+    # ------------------------------------------------------------
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+                  hedge: bool = HEDGE) -> httpx.Response:
+        breaker = self.breaker_for(url)
+        if not breaker.allow():
+            self.record_error(url, "circuit_open")
+            raise CircuitOpenError(f"circuit open for {urlsplit(url).netloc}")
+
+        try:
+            return await self._get(url, headers, hedge, breaker)
+        finally:
+            breaker.release_probe()
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]],
+                   hedge: bool, breaker: CircuitBreaker) -> httpx.Response:
+        hist = self.histogram_for(url)
+        attempt = 0
+
+        while True:
+            t0 = time.perf_counter()
+            try:
+                resp = await self._send(url, headers, hist if hedge else None)
+                hist.observe((time.perf_counter() - t0) * 1000)
+
+                if resp.status_code in RETRY_STATUSES or resp.status_code >= 500:
+                    raise httpx.HTTPStatusError(
+                        f"upstream status {resp.status_code}", request=resp.request, response=resp
+                    )
+
+                breaker.record_success()
+                self.budget.deposit()
+                return resp
+
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                kind = "timeout" if isinstance(e, httpx.TimeoutException) else type(e).__name__
+                self.record_error(url, kind)
+                breaker.record_failure()
+
+                if attempt >= RETRIES or breaker.state == "open" or not self.budget.withdraw():
+                    raise
+
+                attempt += 1
+                self.retries += 1
+                # Full jitter: τυχαίο διάστημα μέχρι backoff * 2^attempt
+                await asyncio.sleep(random.uniform(0, RETRY_BACKOFF * (2 ** attempt)))
+
+    async def _send(self, url: str, headers: Optional[Dict[str, str]],
+                    hist: Optional[LatencyHistogram]) -> httpx.Response:
+        """ Ένα request· με hist, hedged μετά το p95 του path. """
+        if hist is None or hist.count < HEDGE_MIN_SAMPLES:
+            return await self.client.get(url, headers=headers)
+
+        delay = hist.percentile(0.95)
+        if delay is None or delay == float("inf"):
+            return await self.client.get(url, headers=headers)
+
+        primary = asyncio.ensure_future(self.client.get(url, headers=headers))
+        done, _ = await asyncio.wait({primary}, timeout=delay / 1000)
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        backup = asyncio.ensure_future(self.client.get(url, headers=headers))
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ------------------------------------------------------------
+    async def aclose(self):
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "retry_budget": round(self.budget.tokens, 2),
+            "errors": dict(self.errors),
+            "breakers": {
+                host: {"state": b.state, "failures": b.failures}
+                for host, b in self.breakers.items()
+            },
+            "latency": {path: h.snapshot() for path, h in self.histograms.items()},
+        }
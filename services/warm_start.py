@@ -0,0 +1,237 @@
+# ============================================================
+# AI MATCHLAB — WARM START
+# Τελευταίο analyzed snapshot στο δίσκο → άμεσες απαντήσεις μετά από restart
+# ============================================================
+
+import asyncio
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from .live_stream import LiveHub, LivePoller, live_hub, live_poller, TOPICS
+from .metrics import metrics, stats_families
+from .models import dumps, loads
+
+
+# ------------------------------------------------------------
+# Ρυθμίσεις
+# ------------------------------------------------------------
+# Κενό → /tmp (επιβιώνει restarts / deploys στο ίδιο host), "off" → απενεργοποιημένο
+WARM_START_PATH = os.getenv("WARM_START_PATH", "").strip() or os.path.join(
+    tempfile.gettempdir(), "aimatchlab.warm"
+)
+WARM_START_INTERVAL = float(os.getenv("WARM_START_INTERVAL", 30))
+# Παλιότερο snapshot αγνοείται (τα matches έχουν αλλάξει πολύ)
+WARM_START_MAX_AGE = float(os.getenv("WARM_START_MAX_AGE", 3600))
+# zlib level (0 = χωρίς συμπίεση)
+WARM_START_LEVEL = int(os.getenv("WARM_START_LEVEL", 1))
+
+# magic, version, flags, crc32(payload), payload length, hub seq, written_at
+_HEADER = struct.Struct("<8sHHIQQd")
+MAGIC = b"AIMLWRM1"
+VERSION = 1
+FLAG_ZLIB = 1
+
+
+class WarmStart:
+    """
+    Γράφει περιοδικά το LiveHub state (markets, indicators, scores) και τα
+    scores του LivePoller σε ένα binary αρχείο (header + zlib(JSON) + crc32):
+    - write: σε .tmp και os.replace, ώστε ένα crash να μην αφήνει μισό αρχείο
+    - restore: mmap, έλεγχος header / crc, τα topics μπαίνουν στο hub ως
+      stale μέχρι το πρώτο poll από upstream
+    Γράφει μόνο το process που κάνει ingest, και μόνο όταν κανένα
+    topic δεν είναι stale (ένα παλιό snapshot δεν ξαναγράφεται ως νέο).
+    """
+
+    def __init__(self, hub: LiveHub = live_hub, poller: LivePoller = live_poller,
+                 path: str = WARM_START_PATH, interval: float = WARM_START_INTERVAL,
+                 max_age: float = WARM_START_MAX_AGE, level: int = WARM_START_LEVEL):
+        self.hub = hub
+        self.poller = poller
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.level = level
+
+        self._should_write: Callable[[], bool] = lambda: True
+        self._task: Optional[asyncio.Task] = None
+        self._written_hub_seq = -1
+
+        self.writes = 0
+        self.errors = 0
+        self.bytes = 0
+        self.last_write_ms = 0.0
+        self.restored_items = 0
+        self.restored_age_s: Optional[float] = None
+        self.restore_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.path.lower() != "off"
+
+    # ------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------
+    def start(self, should_write: Callable[[], bool] = lambda: True):
+        """ should_write: π.χ. μόνο ο shared-state writer / standalone. """
+        self._should_write = should_write
+        if self._task is None and self.enabled and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            await self.save()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    # ------------------------------------------------------------
+    # Write
+    # ------------------------------------------------------------
+    async def save(self) -> bool:
+        if not self.enabled or not self._should_write():
+            return False
+        if self.hub.seq == self._written_hub_seq or self.hub.stale or not self.hub.seq:
+            return False
+
+        # Αντίγραφο στο loop (τα items δεν αλλάζουν in-place), encode / I/O σε thread
+        hub_seq = self.hub.seq
+        snap = {
+            "topics": self.hub.snapshot()["topics"],
+            "poller": self.poller.export_state(),
+        }
+        try:
+            await asyncio.to_thread(self._write, snap, hub_seq)
+        except Exception as e:
+            self.errors += 1
+            print(f"[WarmStart] ⚠ Write error ({self.path}): {e}")
+            return False
+        self._written_hub_seq = hub_seq
+        return True
+
+    def _write(self, snap: Dict[str, Any], hub_seq: int):
+        t0 = time.perf_counter()
+        payload = dumps(snap)
+        flags = 0
+        if self.level > 0:
+            payload = zlib.compress(payload, self.level)
+            flags |= FLAG_ZLIB
+        header = _HEADER.pack(MAGIC, VERSION, flags, zlib.crc32(payload),
+                              len(payload), hub_seq, time.time())
+
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(header)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        self.writes += 1
+        self.bytes = len(header) + len(payload)
+        self.last_write_ms = (time.perf_counter() - t0) * 1000
+
+    # ------------------------------------------------------------
+    # Restore
+    # ------------------------------------------------------------
+    async def restore(self) -> int:
+        """ Items που μπήκαν στο hub (0 αν δεν υπάρχει έγκυρο / πρόσφατο snapshot). """
+        if not self.enabled:
+            return 0
+        t0 = time.perf_counter()
+        try:
+            found = await asyncio.to_thread(read_snapshot, self.path)
+        except (OSError, ValueError) as e:
+            print(f"[WarmStart] ⚠ Ignoring snapshot {self.path}: {e}")
+            return 0
+        if found is None:
+            return 0
+
+        snap, written_at = found
+        age = time.time() - written_at
+        if self.max_age and age > self.max_age:
+            print(f"[WarmStart] ⏳ Snapshot is {age:.0f}s old, starting cold")
+            return 0
+
+        items = 0
+        for topic, topic_items in (snap.get("topics") or {}).items():
+            if topic in TOPICS and topic_items:
+                self.hub.publish(topic, topic_items, replace=True, stale=True)
+                items += len(topic_items)
+        self.poller.restore_state(snap.get("poller") or {})
+
+        self.restored_items = items
+        self.restored_age_s = round(age, 3)
+        self.restore_ms = (time.perf_counter() - t0) * 1000
+        print(f"[WarmStart] ✅ Restored {items} items ({age:.0f}s old) from {self.path}")
+        return items
+
+    # ------------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": int(self.enabled),
+            "writes": self.writes,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "last_write_ms": round(self.last_write_ms, 3),
+            "restored_items": self.restored_items,
+            "restored_age_s": self.restored_age_s,
+            "restore_ms": round(self.restore_ms, 3),
+        }
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def read_snapshot(path: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    """ (snapshot, written_at) μέσω mmap· None αν δεν υπάρχει, ValueError αν είναι χαλασμένο. """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return None
+    try:
+        size = os.fstat(fd).st_size
+        if size < _HEADER.size:
+            raise ValueError("file shorter than header")
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            magic, version, flags, crc, length, _, written_at = _HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("unknown format")
+            if _HEADER.size + length > size:
+                raise ValueError("truncated payload")
+            with memoryview(mm) as mv, mv[_HEADER.size:_HEADER.size + length] as payload:
+                if zlib.crc32(payload) != crc:
+                    raise ValueError("checksum mismatch")
+                data = zlib.decompress(payload) if flags & FLAG_ZLIB else payload
+                snap = loads(data)
+                del data
+    finally:
+        os.close(fd)
+    return snap, written_at
+
+
+# Singleton instance
+warm_start = WarmStart()
+metrics.add_collector(lambda: stats_families(
+    "aimatchlab_warm_start",
+    {k: v for k, v in warm_start.stats().items() if v is not None},
+    counters=("writes", "errors"),
+))
@@ -1,2 +1,4 @@
 #!/bin/bash
+# Ένας worker κάνει το upstream ingest, οι υπόλοιποι διαβάζουν το shared snapshot
+export SHARED_STATE_MODE="${SHARED_STATE_MODE:-auto}"
 gunicorn -k uvicorn.workers.UvicornWorker app.main:app
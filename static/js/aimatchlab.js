@@ -13,6 +13,9 @@ const API_STATUS = `${WORKER_BASE}/api/status`;
 const API_LIVE = `${WORKER_BASE}/api/live`; // unified live/recent/upcoming feed
 
 const BACKEND_HEALTH = "/health";
+const BACKEND_STREAM = "/api/stream?topics=live"; // ένας backend poller για όλους
+const BACKEND_SNAPSHOT = "/api/snapshot?topics=live"; // precomputed state (χωρίς upstream)
+const STREAM_MAX_ERRORS = 3;
 
 // ---- DOM REFS ------------------------------------------
 
@@ -50,6 +53,8 @@ const widgetsContainer = document.getElementById("widgetsContainer");
 let currentFilter = "all";
 let lastMatches = [];
 let lastScoreMap = new Map();
+let streamActive = false;
+let streamMatches = new Map();
 
 // =======================================================
 // THEME SYSTEM
@@ -84,10 +89,7 @@ themeToggleBtn.addEventListener("click", () => {
 
 async function fetchJSON(url) {
     try {
-        const res = await fetch(
-            url + (url.includes("?") ? "&" : "?") + "t=" + Date.now(),
-            { cache: "no-store" }
-        );
+        const res = await fetch(url, { cache: "no-cache" });
         const text = await res.text();
         try {
             return JSON.parse(text);
@@ -410,6 +412,15 @@ async function loadLive() {
     showSkeleton(true);
     showPlaceholder(false);
 
+    // Πρώτα η έτοιμη κατάσταση του backend· απευθείας Worker μόνο αν ο backend δεν έχει δεδομένα
+    const snap = await fetchJSON(BACKEND_SNAPSHOT);
+    const snapLive = snap?.topics?.live;
+    if (snapLive && Object.keys(snapLive).length) {
+        liveDebugBox.textContent = JSON.stringify(snap, null, 2);
+        applyLiveData({ matches: Object.values(snapLive) }, BACKEND_SNAPSHOT);
+        return;
+    }
+
     const data = await fetchJSON(API_LIVE);
 
     liveDebugBox.textContent = JSON.stringify(data, null, 2);
@@ -427,6 +438,14 @@ async function loadLive() {
         return;
     }
 
+    applyLiveData(data, API_LIVE);
+}
+
+// =======================================================
+// LIVE STREAM (SSE) — fallback σε polling
+// =======================================================
+
+function applyLiveData(data, source) {
     const matches = extractMatches(data);
     lastMatches = matches;
 
@@ -445,7 +464,7 @@ async function loadLive() {
     debugPanel.textContent = JSON.stringify(
         {
             status: "OK",
-            source: API_LIVE,
+            source,
             count: matches.length,
             preview: matches.slice(0, 5)
         },
@@ -458,6 +477,47 @@ async function loadLive() {
     renderMatches(currentFilter);
 }
 
+function onStreamMessage(e) {
+    let msg;
+    try {
+        msg = JSON.parse(e.data);
+    } catch (err) {
+        console.error("[AIML] Stream parse error:", err);
+        return;
+    }
+
+    if (msg.type === "snapshot") {
+        streamMatches = new Map(Object.entries(msg.topics?.live || {}));
+    } else if (msg.type === "diff" && msg.topic === "live") {
+        (msg.removed || []).forEach((k) => streamMatches.delete(k));
+        Object.entries(msg.upserts || {}).forEach(([k, v]) => streamMatches.set(k, v));
+    } else {
+        return;
+    }
+
+    streamActive = true;
+    applyLiveData({ matches: Array.from(streamMatches.values()) }, BACKEND_STREAM);
+}
+
+function startLiveStream() {
+    if (!("EventSource" in window)) return;
+
+    let errors = 0;
+    const es = new EventSource(BACKEND_STREAM);
+
+    es.addEventListener("snapshot", (e) => { errors = 0; onStreamMessage(e); });
+    es.addEventListener("diff", (e) => { errors = 0; onStreamMessage(e); });
+    es.onerror = () => {
+        errors += 1;
+        if (errors >= STREAM_MAX_ERRORS || es.readyState === EventSource.CLOSED) {
+            console.warn("[AIML] Stream unavailable, falling back to polling");
+            es.close();
+            streamActive = false;
+            loadLive();
+        }
+    };
+}
+
 // =======================================================
 // TABS & FILTER
 // =======================================================
@@ -516,7 +576,10 @@ function initWidgetsPlaceholder() {
 // =======================================================
 
 async function refreshAll() {
-    await Promise.all([checkBackend(), loadStatus(), loadLive()]);
+    // Με ενεργό stream το live feed έρχεται push, όχι με polling
+    const tasks = [checkBackend(), loadStatus()];
+    if (!streamActive) tasks.push(loadLive());
+    await Promise.all(tasks);
 }
 
 refreshBtn.addEventListener("click", () => {
@@ -548,5 +611,6 @@ toggleDebugBtn.addEventListener("click", () => {
     initTheme();
     initWidgetsPlaceholder();
     setActiveTab("all");
+    startLiveStream();
     refreshAll();
 })();
@@ -10,9 +10,12 @@ console.log("[AI MATCHLAB] app.js enterprise engine loaded");
    CONFIG
 ------------------------------------------------------------ */
 
-const WORKER_ENDPOINT = "/worker/betfair/live"; // <-- εδώ θα βάζεις τον Worker σου
-const FETCH_INTERVAL_MS = 5000;                 // κάθε 5s refresh
+const SNAPSHOT_ENDPOINT = "/api/snapshot?topics=live,smartmoney"; // precomputed state του backend
+const FETCH_INTERVAL_MS = 5000;                 // κάθε 5s refresh (μόνο fallback)
+const STREAM_ENDPOINT = "/api/stream?topics=live,smartmoney";
+const STREAM_MAX_ERRORS = 3;                    // μετά από τόσα errors → polling
 let deferredPrompt = null;
+let pollTimer = null;
 
 /* ------------------------------------------------------------
    HELPERS
@@ -265,24 +268,22 @@ function renderSystemSummary(data) {
 }
 
 /* ------------------------------------------------------------
-   WORKER FETCH LOOP
+   SNAPSHOT FETCH LOOP (fallback: ο backend κάνει το ingestion,
+   εδώ διαβάζουμε μόνο την έτοιμη κατάσταση)
 ------------------------------------------------------------ */
 
 async function fetchWorkerData() {
     try {
-        updateStatus("Fetching data from worker...");
-        const resp = await fetch(WORKER_ENDPOINT, { cache: "no-store" });
+        updateStatus("Fetching live snapshot...");
+        const resp = await fetch(SNAPSHOT_ENDPOINT, { cache: "no-store" });
         if (!resp.ok) {
             throw new Error("HTTP " + resp.status);
         }
         const json = await resp.json();
-        console.log("[Worker] data received", json);
+        console.log("[Worker] snapshot received", json);
 
-        setWorkerStatus(true);
+        applyStreamMessage(json);
         updateStatus("Live data loaded.");
-        renderMatches(json);
-        renderTools(json);
-        renderSystemSummary(json);
     } catch (err) {
         console.error("[Worker] fetch error:", err);
         setWorkerStatus(false);
@@ -291,64 +292,87 @@ async function fetchWorkerData() {
 }
 
 /* ------------------------------------------------------------
-   FALLBACK DUMMY DATA (ΑΝ ΘΕΛΕΙΣ ΝΑ ΒΛΕΠΕΙΣ ΚΑΤΙ ΧΩΡΙΣ WORKER)
+   LIVE STREAM (SSE) — ένας backend poller για όλους τους clients
 ------------------------------------------------------------ */
 
-function loadDummyOnceIfNeeded() {
-    const container = $("matches-container");
-    if (!container) return;
-    if (container.children.length > 0) return; // αν έχει ήδη δεδομένα, δεν χρειάζεται
-
-    console.log("[Dummy] Loading fallback data.");
-    const dummy = {
-        matches: [
-            {
-                id: "dm-1",
-                home: "AI United",
-                away: "Data City",
-                league: "ENG · Premier League",
-                minute: "41'",
-                score: "2 – 1",
-                odds: { o1: "1.88", x: "3.40", o2: "4.20" },
-                volume: 134200,
-                signal: "SmartMoney"
-            },
-            {
-                id: "dm-2",
-                home: "Signal FC",
-                away: "Liquidity Rovers",
-                league: "EU · Champions League",
-                minute: "HT",
-                score: "1 – 1",
-                odds: { o1: "2.20", x: "3.20", o2: "3.40" },
-                volume: 98250,
-                signal: "Balanced"
-            }
-        ],
-        trends: [
-            { label: "UCL · Over 2.5", value: "↑ 12.5%" },
-            { label: "ENG · Match Odds", value: "€ 76k / 5min" }
-        ],
-        alerts: [
-            { level: "strong", message: "Dummy: Suspended market (sample)" }
-        ],
+const streamState = { live: new Map(), smartmoney: new Map() };
+
+function applyStreamMessage(msg) {
+    if (msg.type === "snapshot") {
+        Object.keys(streamState).forEach((topic) => {
+            streamState[topic] = new Map(Object.entries(msg.topics?.[topic] || {}));
+        });
+    } else if (msg.type === "diff" && streamState[msg.topic]) {
+        const map = streamState[msg.topic];
+        (msg.removed || []).forEach((k) => map.delete(k));
+        Object.entries(msg.upserts || {}).forEach(([k, v]) => map.set(k, v));
+    }
+
+    const matches = Array.from(streamState.live.values());
+    const alerts = [];
+    streamState.smartmoney.forEach((m) => {
+        (m.alerts || []).forEach((a) => {
+            alerts.push({
+                level: a === "possible_sharp_move" ? "strong" : "soft",
+                message: `${m.market_name || m.market_id}: ${a}`
+            });
+        });
+    });
+
+    setWorkerStatus(true);
+    updateStatus("Live stream connected.");
+    renderMatches({ matches });
+    renderTools({ alerts, stats: { markets: streamState.smartmoney.size } });
+    renderSystemSummary({
         summary: {
-            liveMatches: 2,
-            activeMarkets: 12,
-            lastUpdate: new Date().toLocaleTimeString()
-        },
-        stats: {
-            markets: 12,
-            latencyMs: 42,
-            aiRules: 8
+            liveMatches: matches.length,
+            activeMarkets: streamState.smartmoney.size
+        }
+    });
+}
+
+function startPolling() {
+    if (pollTimer) return;
+    console.log("[Stream] Falling back to polling.");
+    fetchWorkerData();
+    pollTimer = setInterval(fetchWorkerData, FETCH_INTERVAL_MS);
+}
+
+function stopPolling() {
+    if (!pollTimer) return;
+    clearInterval(pollTimer);
+    pollTimer = null;
+}
+
+function startStream() {
+    if (!("EventSource" in window)) {
+        startPolling();
+        return;
+    }
+
+    let errors = 0;
+    const es = new EventSource(STREAM_ENDPOINT);
+
+    const onMessage = (e) => {
+        errors = 0;
+        stopPolling();
+        try {
+            applyStreamMessage(JSON.parse(e.data));
+        } catch (err) {
+            console.error("[Stream] bad message:", err);
         }
     };
 
-    setWorkerStatus(false);
-    renderMatches(dummy);
-    renderTools(dummy);
-    renderSystemSummary(dummy);
-    updateStatus("Dummy data loaded (no worker).");
+    es.addEventListener("snapshot", onMessage);
+    es.addEventListener("diff", onMessage);
+    es.onerror = () => {
+        errors += 1;
+        setWorkerStatus(false);
+        if (errors >= STREAM_MAX_ERRORS || es.readyState === EventSource.CLOSED) {
+            es.close();
+            startPolling();
+        }
+    };
 }
 
 /* ------------------------------------------------------------
@@ -359,19 +383,8 @@ function init() {
     console.log("[AI MATCHLAB] Initializing enterprise UI...");
     updateStatus("AI MatchLab ready.");
 
-    // Πρώτο fetch στον Worker
-    fetchWorkerData()
-        .then(() => {
-            // Αν θέλεις dummy ΜΟΝΟ σε αποτυχία, μπορείς να αφαιρέσεις το loadDummyOnceIfNeeded εδώ.
-            console.log("[Init] Worker fetch initial completed.");
-        })
-        .catch(() => {
-            // Fallback dummy αν κάτι πάει πολύ λάθος
-            loadDummyOnceIfNeeded();
-        });
-
-    // Περιοδικό refresh
-    setInterval(fetchWorkerData, FETCH_INTERVAL_MS);
+    // Live stream· polling μόνο αν το stream δεν είναι διαθέσιμο
+    startStream();
 }
 
 document.addEventListener("DOMContentLoaded", init);